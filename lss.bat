@@ -1 +1,3 @@
-python %~dp0\source\lss.py %*
\ No newline at end of file
+@setlocal
+@set PYTHONPATH=%~dp0;%PYTHONPATH%
+@python -m source %*
\ No newline at end of file
@@ -0,0 +1,10 @@
+"""
+run the lss command tool as a module: python -m lss
+"""
+# import standard modules
+import sys
+
+# import local modules
+from .lss import main
+
+sys.exit(main())
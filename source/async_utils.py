@@ -0,0 +1,142 @@
+"""
+async_utils.py: directory scans for asyncio services, without blocking the event loop.
+
+The listing and the grouping run in an executor, a thread pool by default, so the event loop only awaits them:
+    scanner = AsyncScanner(concurrency=4)
+    sequences = await scanner.scan("/renders/shot_010")
+    lines = await scanner.scan_lines("/renders/shot_010")
+    results = await scanner.scan_directories(["/renders/shot_010", "/renders/shot_020"])
+The files of one sequence always share one skeleton, see string_utils.extract_skeleton,
+so the listed files are grouped in batches of whole skeletons, and the scan awaits in between two batches.
+The scan can be cancelled in between the batches, the asyncio way, with task.cancel() or asyncio.wait_for.
+At most concurrency scans run at the same time, the others wait on a semaphore,
+so one huge directory cannot take up every worker of the executor.
+
+In a thread pool the grouping still shares the GIL with the event loop, and a skeleton with a hundred thousand files
+is sorted in one go, holding the loop up for a few hundred milliseconds. A process pool keeps the loop free:
+    scanner = AsyncScanner(executor=ProcessPoolExecutor())
+"""
+# import standard modules
+import asyncio
+
+# import local modules
+from . import utils
+from . import path_utils
+from . import string_utils
+from . import sequence_utils
+from . import grid_utils
+from . import filter_utils
+from . import convention_utils
+from . import rank_utils
+
+# define local variables
+DEFAULT_CONCURRENCY = 4
+BATCH_SIZE = 4096
+
+
+def list_batches(directory_name="", file_filter=None, batch_size=BATCH_SIZE):
+    """
+    list the directory and split the files into batches of whole skeletons, in skeleton order.
+    :param directory_name: <str> the directory.
+    :param file_filter: <FileFilter> the files to keep.
+    :param batch_size: <int> the number of files a batch is filled up to. a skeleton with more files is a batch alone.
+    :return: <list> batches of file names.
+    """
+    return list(string_utils.skeleton_batches(path_utils.list_files_from_dir(directory_name, file_filter), batch_size))
+
+
+def group_batch(files=(), conventions=None, file_filter=None, grids=False):
+    """
+    group one batch of files, in the executor.
+    :param files: <list> file names.
+    :param conventions: <list> compiled naming conventions.
+    :param file_filter: <FileFilter> the file filter, for its minimum sequence length.
+    :param grids: <bool> group the files numbered on two axes into grids, see grid_utils.
+    :return: <dict> FileSequence or GridSequence by key name, in the order PatternFinder prints them.
+    """
+    pf = utils.PatternFinder(files=files, conventions=conventions, file_filter=file_filter, grids=grids)
+    return dict([(key_name, v_data['files']) for key_name, v_data in pf.group_files().items()])
+
+
+def merge_sequences(sequences, batch_sequences):
+    """
+    merge the sequences of a batch into the sequences of the batches before it.
+    two skeletons can strip to the same key name, a1b.png and ab1.png both to ab.png, so a later entry on a taken
+    key name gets its unique key name, the same as in a single PatternFinder, see sequence_utils.add_entry.
+    :param sequences: <dict> FileSequence by key name, merged into.
+    :param batch_sequences: <dict> FileSequence by key name of the batch.
+    :return: <dict> the merged sequences.
+    """
+    for key_name, sequence in batch_sequences.items():
+        if key_name in sequences:
+            key_name = sequence_utils.unique_key_name(sequence)
+        sequences[key_name] = sequence
+    return sequences
+
+
+class AsyncScanner:
+    """
+    scan directories from an event loop, a bounded number at a time.
+    """
+    def __init__(self, concurrency=DEFAULT_CONCURRENCY, executor=None, batch_size=BATCH_SIZE):
+        """
+        :param concurrency: <int> the number of scans running at the same time.
+        :param executor: <Executor> runs the listings and groupings. <None> for the default executor of the loop.
+        :param batch_size: <int> the number of files grouped in between two awaits.
+        """
+        self.concurrency = concurrency
+        self.executor = executor
+        self.batch_size = batch_size
+        self._semaphore = None
+
+    @property
+    def semaphore(self):
+        """
+        the semaphore bounding the scans, created in the running event loop.
+        :return: <asyncio.Semaphore>
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._semaphore
+
+    async def scan(self, directory_name=""):
+        """
+        scan the directory.
+        :param directory_name: <str> the directory.
+        :return: <dict> FileSequence by key name, like PatternFinder.FILE_SEQUENCES, with the GridSequence of every grid
+            when the grids are grouped, see grid_utils.
+        """
+        if not path_utils.is_dir(directory_name):
+            raise IOError("[AsyncScan] :: Incorrect directory given. directory_name: {}".format(directory_name))
+        loop = asyncio.get_running_loop()
+        conventions = convention_utils.get_conventions()
+        file_filter = filter_utils.get_file_filter()
+        grids = grid_utils.get_grids()
+
+        async with self.semaphore:
+            batches = await loop.run_in_executor(
+                self.executor, list_batches, directory_name, file_filter, self.batch_size)
+            sequences = {}
+            while batches:
+                # every await is a point the scan can be cancelled at
+                merge_sequences(sequences, await loop.run_in_executor(
+                    self.executor, group_batch, batches.pop(0), conventions, file_filter, grids))
+        return sequences
+
+    async def scan_lines(self, directory_name=""):
+        """
+        scan the directory into its display lines.
+        :param directory_name: <str> the directory.
+        :return: <list> display lines, the same as PatternFinder.information_lines.
+        """
+        sequences = await self.scan(directory_name)
+        return [rank_utils.sequence_line(sequence) for sequence in sequences.values()]
+
+    async def scan_directories(self, directory_names=()):
+        """
+        scan the directories concurrently, at most concurrency of them at a time.
+        :param directory_names: <list> the directories.
+        :return: <dict> FileSequence by key name, by directory name.
+        """
+        results = await asyncio.gather(*[self.scan(directory_name) for directory_name in directory_names])
+        return dict(zip(directory_names, results))
@@ -0,0 +1,210 @@
+"""
+batch_utils.py: renumber, repad, copy or hard link a detected sequence as one planned batch.
+
+The batch is planned and validated before anything is touched:
+    every target name must be unique, and no target may overwrite a file that is not moved away by the batch itself.
+Renames in place are ordered so no file is renamed onto a name that is still in use,
+renames going around in a cycle are broken up through a temporary name.
+Copies and hard links are independent of each other, so they run in a pool of worker threads.
+
+Example:
+    lss --sequence /renders/image-%04d.png --renumber 1001
+    lss --sequence /renders/image-%d.png --pad 4 --copy /deliveries/shot_010 --dry-run
+"""
+# import standard modules
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# import local modules
+from . import utils
+from . import path_utils
+from . import file_utils
+
+# define local variables
+BATCH_MODES = ("rename", "copy", "link")
+TEMPORARY_SUFFIX = ".lss-tmp"
+
+
+def target_number_string(frame=0, width=1, padding=None):
+    """
+    format the new frame number of a file.
+    :param frame: <int> the new frame number.
+    :param width: <int> the width of the original number string, used when the padding does not change.
+    :param padding: <int> the new padding, 0 for no padding. <None> to keep the original padding.
+    :return: <str> number string.
+    """
+    if padding is None:
+        padding = width
+    return str(frame).zfill(padding)
+
+
+def is_unpadded(sequence):
+    """
+    check if none of the frame numbers of the sequence starts with a padding zero.
+    :param sequence: <FileSequence> the sequence.
+    :return: <bool> True for success. <bool> False for failure.
+    """
+    return all([len(str(frame)) == width for frame, width in zip(sequence.frames, sequence.padding)])
+
+
+def plan_batch(directory_name, sequence, start=None, padding=None, destination="", mode="rename"):
+    """
+    plan the operations for every file of the sequence.
+    :param directory_name: <str> the directory of the sequence.
+    :param sequence: <FileSequence> the sequence.
+    :param start: <int> renumber the sequence so it starts at this frame. <None> to keep the frame numbers.
+    :param padding: <int> the new padding, 0 for no padding. <None> to keep the padding.
+    :param destination: <str> the target directory. defaults to the directory of the sequence.
+    :param mode: <str> rename, copy or link.
+    :return: <list> (source path, target path) operations.
+    """
+    if mode not in BATCH_MODES:
+        raise ValueError("[PlanBatch] :: Unknown batch mode: {}".format(mode))
+    if not len(sequence.frames):
+        raise ValueError("[PlanBatch] :: Not a sequence: {}".format(sequence.format_name()))
+
+    offset = 0
+    if start is not None:
+        offset = start - min(sequence.frames)
+        if start < 0:
+            raise ValueError("[PlanBatch] :: Frame numbers cannot be negative. start: {}".format(start))
+
+    # an unpadded sequence stays unpadded, frames 10-12 renumbered from 1 become 1-3 and not 01-03
+    if padding is None and is_unpadded(sequence):
+        padding = 0
+
+    destination = destination or directory_name
+    operations = []
+    for index in range(len(sequence)):
+        number_string = target_number_string(sequence.frames[index] + offset, sequence.padding[index], padding)
+        source = path_utils.join_file_path(directory_name, sequence.file_name(index))
+        target = path_utils.join_file_path(destination, sequence.head + number_string + sequence.tail)
+        if source != target:
+            operations.append((source, target))
+    return operations
+
+
+def validate_batch(operations, mode="rename"):
+    """
+    make sure the batch will not lose any file.
+    :param operations: <list> (source path, target path) operations.
+    :param mode: <str> rename, copy or link.
+    :return: <bool> True for success.
+    """
+    sources = set([source for source, target in operations])
+    targets = set()
+    for source, target in operations:
+        if target in targets:
+            raise ValueError("[ValidateBatch] :: Two files would become {}".format(target))
+        targets.add(target)
+
+        # a rename may move onto a file that is renamed away itself
+        if mode == "rename" and target in sources:
+            continue
+        if os.path.lexists(target):
+            raise ValueError("[ValidateBatch] :: Target already exists: {}".format(target))
+    return True
+
+
+def temporary_name(file_name="", taken=()):
+    """
+    a temporary name next to the file that neither exists nor is taken by the plan, so no file is renamed over.
+    :param file_name: <str> the file to park.
+    :param taken: <set> the names used by the planned operations.
+    :return: <str> temporary file name.
+    """
+    candidate = file_name + TEMPORARY_SUFFIX
+    index = 0
+    while candidate in taken or os.path.lexists(candidate):
+        index += 1
+        candidate = "{}{}.{}".format(file_name, TEMPORARY_SUFFIX, index)
+    return candidate
+
+
+def order_renames(operations):
+    """
+    order the renames so no file is renamed onto a name that is still in use.
+    :param operations: <list> (source path, target path) operations.
+    :return: <list> ordered (source path, target path) operations.
+    """
+    targets_by_source = dict(operations)
+    taken = set(targets_by_source) | set(targets_by_source.values())
+    done = set()
+    ordered = []
+    for source, _ in operations:
+        if source in done:
+            continue
+
+        # walk along the files occupying the next target
+        chain = []
+        current = source
+        while current in targets_by_source and current not in done:
+            done.add(current)
+            chain.append(current)
+            current = targets_by_source[current]
+
+        if current == chain[0] and len(chain) > 1:
+            # the chain is a cycle, park the first file under a temporary name
+            parked_name = temporary_name(chain[0], taken)
+            taken.add(parked_name)
+            ordered.append((chain[0], parked_name))
+            for f_name in reversed(chain[1:]):
+                ordered.append((f_name, targets_by_source[f_name]))
+            ordered.append((parked_name, targets_by_source[chain[0]]))
+        else:
+            for f_name in reversed(chain):
+                ordered.append((f_name, targets_by_source[f_name]))
+    return ordered
+
+
+def execute_batch(operations, mode="rename", workers=None):
+    """
+    run the planned operations.
+    renames run one after another in their order, copies and hard links run in a pool of worker threads.
+    :param operations: <list> (source path, target path) operations.
+    :param mode: <str> rename, copy or link.
+    :param workers: <int> the number of worker threads. defaults to the number of cpus.
+    :return: <int> the number of operations done.
+    """
+    if mode == "rename":
+        for source, target in operations:
+            os.rename(source, target)
+        return len(operations)
+
+    operation = file_utils.copy_file if mode == "copy" else file_utils.link_file
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        # consume the results, so the first failure raises here
+        for _ in executor.map(lambda paths: operation(*paths), operations):
+            pass
+    return len(operations)
+
+
+def do_batch(spec="", start=None, padding=None, destination="", mode="rename", dry_run=False, workers=None):
+    """
+    renumber, repad, copy or hard link the sequence given by the spec.
+    :param spec: <str> sequence spec, see utils.find_sequence.
+    :param start: <int> renumber the sequence so it starts at this frame. <None> to keep the frame numbers.
+    :param padding: <int> the new padding, 0 for no padding. <None> to keep the padding.
+    :param destination: <str> the target directory for copies and links.
+    :param mode: <str> rename, copy or link.
+    :param dry_run: <bool> only print the planned operations.
+    :param workers: <int> the number of worker threads for copies and links.
+    :return: <bool> True for success.
+    """
+    if mode != "rename" and not path_utils.is_dir(destination):
+        raise IOError("[DoBatch] :: Incorrect path given. path_name: {}".format(destination))
+
+    directory_name, sequence = utils.find_sequence(spec)
+    operations = plan_batch(directory_name, sequence, start, padding, destination, mode)
+    validate_batch(operations, mode)
+    if mode == "rename":
+        operations = order_renames(operations)
+
+    if dry_run:
+        for source, target in operations:
+            print('{} {} -> {}'.format(mode, source, target))
+        return True
+
+    count = execute_batch(operations, mode, workers)
+    print('{} {}\t{} files'.format(mode, sequence.format_name(), count))
+    return True
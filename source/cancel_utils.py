@@ -0,0 +1,120 @@
+"""
+cancel_utils.py: deadlines and cancellation for scans, so a slow filesystem cannot hang lss.
+
+A scan given a CancelToken stops once the token is cancelled or its deadline passes,
+and returns the results it has so far, flagged as partial:
+    token = CancelToken(timeout=2.0)
+    pf = utils.PatternFinder(directory_name="/mnt/archive", cancel_token=token)
+    pf.FILE_SEQUENCES, pf.PARTIAL
+    lss -p /mnt/archive --timeout 2
+The listing runs in a thread the caller stops waiting for at the deadline, so a listing stuck in the filesystem
+does not hold up the results. The listing checks the token once for every batch of the listing backend,
+see listing_utils, and the grouping checks it every CHECK_INTERVAL files.
+"""
+# import standard modules
+import sys
+import time
+import threading
+
+# import local modules
+from . import listing_utils
+
+# define local variables
+CHECK_INTERVAL = 1024
+
+
+class CancelToken:
+    """
+    the cancellation of a scan, by the caller or by a deadline.
+    """
+    def __init__(self, timeout=None):
+        """
+        :param timeout: <float> seconds from now until the token cancels itself. <None> for no deadline.
+        """
+        self.timeout = timeout
+        self.deadline = None if timeout is None else time.monotonic() + timeout
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """
+        cancel the scans using this token.
+        :return: <None>
+        """
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        """
+        returns True if the token was cancelled, or its deadline passed.
+        :return: <bool>
+        """
+        if self._cancelled.is_set():
+            return True
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            self._cancelled.set()
+            return True
+        return False
+
+    def remaining(self):
+        """
+        the seconds left until the deadline.
+        :return: <float> seconds, 0 once cancelled. <None> for no deadline.
+        """
+        if self._cancelled.is_set():
+            return 0.0
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+
+def list_directory(directory_name="", file_filter=None, cancel_token=None, progress=None):
+    """
+    list the files of the directory until the token is cancelled.
+    :param directory_name: <str> the directory.
+    :param file_filter: <function> keep only the file names passing this filter.
+    :param cancel_token: <CancelToken> the cancellation of the listing.
+    :param progress: <Progress> report the files listed after every batch of the backend, see progress_utils.
+    :return: <tuple> the files listed, <bool> True if the listing is complete.
+    """
+    names = []
+    errors = []
+    finished = threading.Event()
+
+    def lister():
+        try:
+            for batch in listing_utils.iter_batches(directory_name):
+                if cancel_token.cancelled:
+                    return
+                length_of_names = len(names)
+                names.extend([name for name, d_type in batch if file_filter(name)])
+                if progress is not None:
+                    progress.update(listed=len(names) - length_of_names)
+            finished.set()
+        except OSError as error:
+            errors.append(error)
+
+    # a daemon thread, a listing stuck in the filesystem must not keep lss from exiting
+    thread = threading.Thread(target=lister, name="lss-list", daemon=True)
+    thread.start()
+    thread.join(cancel_token.remaining())
+    if thread.is_alive():
+        cancel_token.cancel()
+        # a copy, the thread may still append until it sees the cancellation
+        return tuple(names[:]), False
+    if errors:
+        raise errors[0]
+    return tuple(names), finished.is_set()
+
+
+def partial_message(cancel_token=None):
+    """
+    print the warning for partial results on the standard error.
+    :param cancel_token: <CancelToken> the cancelled token.
+    :return: <bool> True for success.
+    """
+    if cancel_token.timeout is not None:
+        reason = "the scan ran out of its {}s budget".format(cancel_token.timeout)
+    else:
+        reason = "the scan was cancelled"
+    print("lss: partial results, {}.".format(reason), file=sys.stderr)
+    return True
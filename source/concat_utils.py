@@ -0,0 +1,59 @@
+"""
+concat_utils.py: concatenate the frames of a detected sequence into a single stream, in frame order.
+
+The frames are appended by the kernel with os.copy_file_range or os.sendfile, see file_utils.append_file,
+so the data never passes through python buffers.
+The gaps in the frame ranges are reported on stderr before the concatenation starts.
+
+Example:
+    lss --cat /dumps/frame_%06d.yuv -o /dumps/frames.yuv
+    lss --cat /dumps/chunk_0001.pcm | ffplay -f s16le -
+"""
+# import standard modules
+import os
+import sys
+
+# import local modules
+from . import utils
+from . import path_utils
+from . import file_utils
+
+
+def concatenate_sequence(directory_name, sequence, out_fd=1):
+    """
+    append every frame of the sequence to the output file descriptor, in frame order.
+    :param directory_name: <str> the directory of the sequence.
+    :param sequence: <FileSequence> the sequence.
+    :param out_fd: <int> output file descriptor.
+    :return: <int> bytes written.
+    """
+    copy_functions = file_utils.kernel_copy_functions(out_fd)
+    written = 0
+    for file_name in sequence.file_names():
+        written += file_utils.append_file(path_utils.join_file_path(directory_name, file_name), out_fd, copy_functions)
+    return written
+
+
+def do_cat(spec="", output=""):
+    """
+    concatenate the sequence given by the spec into the output file, or to stdout.
+    :param spec: <str> sequence spec, see utils.find_sequence.
+    :param output: <str> the output file. stdout if empty or '-'.
+    :return: <bool> True for success.
+    """
+    directory_name, sequence = utils.find_sequence(spec)
+    gaps = sequence.gaps()
+    if gaps:
+        print('[DoCat] :: {} has gaps: {}'.format(
+            sequence.format_name(), ' '.join(['{}-{}'.format(start, end) for start, end in gaps])), file=sys.stderr)
+
+    if output and output != '-':
+        output_directory, output_name = os.path.split(os.path.abspath(output))
+        if output_directory == os.path.abspath(directory_name) and output_name in sequence:
+            raise IOError("[DoCat] :: The output is a frame of the sequence. path_name: {}".format(output))
+        with open(output, 'wb') as out_obj:
+            concatenate_sequence(directory_name, sequence, out_obj.fileno())
+    else:
+        sys.stdout.flush()
+        concatenate_sequence(directory_name, sequence, sys.stdout.fileno())
+    return True
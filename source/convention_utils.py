@@ -0,0 +1,137 @@
+r"""
+convention_utils.py: known file naming conventions, grouped with a single regex match per file.
+
+A convention is a regular expression matching the whole file name, with a named "frame" group on the frame number:
+    ^.+\.(?P<frame>\d+)\.\w+$           name.####.ext
+    ^.+_v\d+_(?P<frame>\d+)\.exr$       name_v###_####.exr
+
+The files matching a convention go straight into their sequence with their frame number,
+only the other files are left to the neighbour heuristics of utils.PatternFinder.
+A convention group holding a single file is left to the heuristics as well, as it may be numbered on another number.
+
+Conventions are given on the command line, or one per line in a conventions file:
+    lss --convention '^.+\.(?P<frame>\d+)\.\w+$'
+    lss --conventions ~/.lss_conventions
+The LSS_CONVENTIONS environment variable names the default conventions file.
+"""
+# import standard modules
+import os
+import re
+
+# import local modules
+from . import path_utils
+from . import string_utils
+
+# define local variables
+CONVENTIONS_ENV = "LSS_CONVENTIONS"
+FRAME_GROUP = "frame"
+__conventions__ = None
+
+
+def compile_convention(pattern=""):
+    """
+    compile a convention, checking it has the frame group.
+    :param pattern: <str> the convention regular expression.
+    :return: <re.Pattern> compiled convention.
+    """
+    try:
+        regex = re.compile(pattern)
+    except re.error as error:
+        raise ValueError("[CompileConvention] :: Invalid convention {}: {}".format(pattern, error))
+    if FRAME_GROUP not in regex.groupindex:
+        raise ValueError("[CompileConvention] :: The convention has no (?P<frame>...) group: {}".format(pattern))
+    return regex
+
+
+def load_conventions(file_name=""):
+    """
+    load the conventions file, one regular expression per line. empty lines and lines starting with # are skipped.
+    :param file_name: <str> conventions file name.
+    :return: <list> compiled conventions.
+    """
+    if not path_utils.is_file(file_name):
+        raise IOError("[LoadConventions] :: Incorrect path given. path_name: {}".format(file_name))
+    conventions = []
+    with open(file_name) as f_obj:
+        for line in f_obj:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                conventions.append(compile_convention(line))
+    return conventions
+
+
+def set_conventions(patterns=(), file_names=()):
+    """
+    set the conventions every PatternFinder uses by default.
+    :param patterns: <list> convention regular expressions.
+    :param file_names: <list> conventions files.
+    :return: <list> compiled conventions.
+    """
+    global __conventions__
+    conventions = []
+    for file_name in file_names:
+        conventions.extend(load_conventions(file_name))
+    conventions.extend([compile_convention(pattern) for pattern in patterns])
+    __conventions__ = conventions
+    return conventions
+
+
+def get_conventions():
+    """
+    get the default conventions, loading the LSS_CONVENTIONS file on first use.
+    :return: <list> compiled conventions.
+    """
+    global __conventions__
+    if __conventions__ is None:
+        file_name = os.environ.get(CONVENTIONS_ENV)
+        __conventions__ = load_conventions(file_name) if file_name else []
+    return __conventions__
+
+
+def match_frame(file_name="", conventions=()):
+    """
+    match the file name against the conventions, the first match wins.
+    the frame must be a whole number of the file name, not a part of a longer number.
+    :param file_name: <str> the file name.
+    :param conventions: <list> compiled conventions.
+    :return: <tuple> head, frame number string, tail. <None> if no convention matches.
+    """
+    for regex in conventions:
+        match = regex.fullmatch(file_name)
+        if not match:
+            continue
+        start, end = match.span(FRAME_GROUP)
+        head, frame, tail = file_name[:start], file_name[start:end], file_name[end:]
+        if not frame.isdigit() or head[-1:].isdigit() or tail[:1].isdigit():
+            return None
+        return head, frame, tail
+    return None
+
+
+def group_by_conventions(files=(), conventions=()):
+    """
+    group the files matching the conventions by their name around the frame number.
+    :param files: <list> the files to group.
+    :param conventions: <list> compiled conventions.
+    :return: <dict> (head, tail, position, [frame number strings]) by key name, <list> the files left over.
+    """
+    groups = {}
+    leftover = []
+    for file_name in files:
+        match = match_frame(file_name, conventions)
+        if not match or not string_utils.is_frame_number(match[1]):
+            leftover.append(file_name)
+            continue
+        head, frame, tail = match
+        key_name = head + tail
+        if key_name not in groups:
+            # the numbers before the frame give its position within the numbers of the file name
+            groups[key_name] = (head, tail, len(string_utils.extract_numbers(head)), [])
+        groups[key_name][3].append(frame)
+
+    for key_name in list(groups):
+        head, tail, position, frames = groups[key_name]
+        if len(frames) == 1:
+            leftover.append(head + frames[0] + tail)
+            del groups[key_name]
+    return groups, leftover
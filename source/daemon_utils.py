@@ -0,0 +1,243 @@
+"""
+daemon_utils.py: the optional lss daemon, serving directory scans from a warm cache over a Unix domain socket.
+
+Start it with "lss --serve". Every lss call then asks the daemon for its directory scan first,
+and scans in-process when no daemon is running.
+The cached scan of a directory is reused for as long as the directory inode and modification time stay the same.
+
+Protocol, one request per connection:
+    client: {"path": "/abs/dir", "conventions": "/home/me/.lss_conventions"}\n
+    daemon: {"lines": ["21 image-%04d.png\t0001-0021", ...]}\n  or  {"error": "..."}\n
+The conventions are the LSS_CONVENTIONS file of the client, see convention_utils.
+The daemon refuses a request with other conventions than its own, and the client scans in-process then.
+The client side only needs this module, so a warm scan does not pay for importing the scanning modules.
+"""
+# import standard modules
+import os
+import sys
+import json
+import signal
+import time
+import socket
+import tempfile
+import threading
+import socketserver
+from collections import OrderedDict
+
+# import local modules
+from . import convention_utils
+
+# define local variables
+SOCKET_ENV = "LSS_SOCKET"
+MAX_CACHE_ENTRIES = 1024
+CONNECT_TIMEOUT = 0.5
+# a directory changed this recently may change again within the same time stamp, so it is not cached yet.
+RACY_SECONDS = 1.0
+
+
+def socket_path():
+    """
+    get the path of the daemon socket, from the LSS_SOCKET environment variable or the per-user default.
+    :return: <str> socket path.
+    """
+    if os.environ.get(SOCKET_ENV):
+        return os.environ[SOCKET_ENV]
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.path.join(runtime_dir, "lss-{}.sock".format(os.getuid()))
+
+
+def conventions_source():
+    """
+    get the conventions file the scans of this process use by default, from the LSS_CONVENTIONS environment variable.
+    :return: <str> absolute conventions file name. <str> empty for no conventions.
+    """
+    file_name = os.environ.get(convention_utils.CONVENTIONS_ENV, "")
+    return os.path.abspath(file_name) if file_name else ""
+
+
+def display_lines(lines=()):
+    """
+    prints the display lines, the same way PatternFinder.display_information does without verbosity.
+    :param lines: <list> display lines.
+    :return: <bool> True for success.
+    """
+    if lines:
+        print("\n")
+        for line in lines:
+            print(line)
+        print("\n")
+    else:
+        print(
+            "\n"
+            "There is nothing here."
+            "\n"
+        )
+    return True
+
+
+def has_unix_sockets():
+    """
+    check if this platform supports Unix domain sockets.
+    :return: <bool> True for success. <bool> False for failure.
+    """
+    return hasattr(socket, "AF_UNIX")
+
+
+class ScanCache:
+    """
+    a thread safe, least recently used cache of directory scans, validated by the directory modification time.
+    """
+    def __init__(self, scan_function, max_entries=MAX_CACHE_ENTRIES, racy_seconds=RACY_SECONDS):
+        """
+        :param scan_function: <function> scans a directory name and returns its display lines.
+        :param max_entries: <int> the number of directories to keep warm.
+        :param racy_seconds: <float> do not cache directories modified this recently.
+        """
+        self.scan_function = scan_function
+        self.max_entries = max_entries
+        self.racy_seconds = racy_seconds
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, directory_name=""):
+        """
+        get the display lines of the directory, from the cache if the directory has not changed.
+        :param directory_name: <str> the absolute directory name.
+        :return: <list> display lines.
+        """
+        dir_stat = os.stat(directory_name)
+        stamp = (dir_stat.st_ino, dir_stat.st_mtime_ns)
+        with self.lock:
+            entry = self.entries.get(directory_name)
+            if entry and entry[0] == stamp:
+                self.entries.move_to_end(directory_name)
+                return entry[1]
+
+        lines = self.scan_function(directory_name)
+
+        if time.time() - dir_stat.st_mtime >= self.racy_seconds:
+            with self.lock:
+                self.entries[directory_name] = (stamp, lines)
+                self.entries.move_to_end(directory_name)
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+        return lines
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class ScanRequestHandler(socketserver.StreamRequestHandler):
+    """
+    answers a single scan request from the server scan cache.
+    """
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline().decode("utf-8"))
+            # the scans of the daemon are grouped with its own conventions only
+            if request.get("conventions", "") != self.server.conventions:
+                raise ValueError("[ScanRequest] :: The daemon scans with other conventions: {}".format(
+                    self.server.conventions or "none"))
+            response = {"lines": self.server.scan_cache.get(request["path"])}
+        except Exception as error:
+            response = {"error": "{}: {}".format(type(error).__name__, error)}
+        self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+
+def make_server(scan_function, path_name=""):
+    """
+    create the daemon server, bound to the socket path. only the current user can connect to it.
+    :param scan_function: <function> scans a directory name and returns its display lines.
+    :param path_name: <str> the socket path, defaults to socket_path().
+    :return: <socketserver.ThreadingUnixStreamServer> the server.
+    """
+    if not has_unix_sockets():
+        raise OSError("[MakeServer] :: The lss daemon needs Unix domain sockets.")
+    path_name = path_name or socket_path()
+    if os.path.exists(path_name):
+        if request_ping(path_name):
+            raise OSError("[MakeServer] :: An lss daemon is already serving on {}".format(path_name))
+        # a stale socket left behind by a daemon that did not shut down
+        os.remove(path_name)
+
+    old_umask = os.umask(0o177)
+    try:
+        server = socketserver.ThreadingUnixStreamServer(path_name, ScanRequestHandler)
+    finally:
+        os.umask(old_umask)
+    server.daemon_threads = True
+    server.scan_cache = ScanCache(scan_function)
+    server.conventions = conventions_source()
+    return server
+
+
+def serve(scan_function, path_name=""):
+    """
+    run the lss daemon until it is interrupted.
+    :param scan_function: <function> scans a directory name and returns its display lines.
+    :param path_name: <str> the socket path, defaults to socket_path().
+    :return: <bool> True for success.
+    """
+    server = make_server(scan_function, path_name)
+    print("[Serve] :: lss daemon listening on {}".format(server.server_address))
+    # shut down cleanly on a plain kill too, so the socket is removed
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(server.server_address):
+            os.remove(server.server_address)
+    return True
+
+
+def _send_request(request, path_name="", timeout=None):
+    """
+    send one request to the daemon and read its response.
+    :param request: <dict> the request.
+    :param path_name: <str> the socket path.
+    :param timeout: <float> seconds to wait for the response, None to wait until the scan finishes.
+    :return: <dict> the response. <None> when no daemon answers.
+    """
+    if not has_unix_sockets():
+        return None
+    path_name = path_name or socket_path()
+    if not os.path.exists(path_name):
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(CONNECT_TIMEOUT)
+            sock.connect(path_name)
+            sock.settimeout(timeout)
+            sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+            with sock.makefile("rb") as response_file:
+                response = response_file.readline()
+        return json.loads(response.decode("utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def request_ping(path_name=""):
+    """
+    check if a daemon is answering on the socket path.
+    :param path_name: <str> the socket path.
+    :return: <bool> True for success. <bool> False for failure.
+    """
+    return _send_request({"path": ""}, path_name, timeout=CONNECT_TIMEOUT) is not None
+
+
+def request_scan(directory_name="", path_name="", timeout=None):
+    """
+    ask the daemon for the display lines of the directory.
+    :param directory_name: <str> the directory to scan.
+    :param path_name: <str> the socket path.
+    :param timeout: <float> seconds to wait for the lines, None to wait until the scan finishes.
+    :return: <list> display lines. <None> when no daemon answers, scan in-process then.
+    """
+    response = _send_request({"path": os.path.abspath(directory_name), "conventions": conventions_source()},
+                             path_name, timeout=timeout)
+    if not response or "lines" not in response:
+        return None
+    return response["lines"]
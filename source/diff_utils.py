@@ -0,0 +1,368 @@
+"""
+diff_utils.py: snapshots of a directory scan, and the differences between two snapshots of the same sequences.
+
+A snapshot keeps the frames of every sequence as intervals, with the file sizes in frame order.
+The differences are interval set operations on the frame ranges, the file names are never compared.
+
+Frames are kept apart by their padding: 0 for numbers without leading zeroes, otherwise the padding width.
+This way image_01.png and image_0001.png never end up as the same frame.
+
+Snapshot layout, also used for the saved scan files:
+    {"lss_scan": 1,
+     "directory": "/abs/dir",
+     "sequences": {"image-.png": {"format_name": "image-%04d.png",
+                                  "frames": [{"padding": 4, "intervals": [[1, 20], [22, 22]], "sizes": [...]}],
+                                  "sizes": None},
+                   "emptyfile.bmp": {"format_name": "emptyfile.bmp", "frames": [], "sizes": [0]}}}
+"""
+# import standard modules
+import os
+import json
+from array import array
+from bisect import bisect_right
+
+# import local modules
+from . import utils
+from . import path_utils
+from . import sequence_utils
+
+# define local variables
+SNAPSHOT_VERSION = 1
+DIFF_STATES = ("added", "removed", "changed")
+
+
+def frame_padding(frame=0, width=1):
+    """
+    get the padding of a frame number from the width of its number string.
+    :param frame: <int> frame number.
+    :param width: <int> the width of the number string in the file name.
+    :return: <int> the padding width. <int> 0 for a number without leading zeroes.
+    """
+    if width > len(str(frame)):
+        return width
+    return 0
+
+
+def frame_intervals(frames=()):
+    """
+    collapse sorted frame numbers into intervals of incrementing frames.
+    :param frames: <list> sorted frame numbers.
+    :return: <list> [start, end] intervals.
+    """
+    intervals = []
+    for frame in frames:
+        if intervals and frame == intervals[-1][1] + 1:
+            intervals[-1][1] = frame
+        else:
+            intervals.append([frame, frame])
+    return intervals
+
+
+def interval_difference(intervals_a=(), intervals_b=()):
+    """
+    the frames of the first intervals that are not in the second intervals.
+    :param intervals_a: <list> sorted, non overlapping [start, end] intervals.
+    :param intervals_b: <list> sorted, non overlapping [start, end] intervals.
+    :return: <list> [start, end] intervals.
+    """
+    difference = []
+    index_b = 0
+    length_of_b = len(intervals_b)
+    for start, end in intervals_a:
+        # skip the intervals ending before this one
+        while index_b < length_of_b and intervals_b[index_b][1] < start:
+            index_b += 1
+
+        cursor = start
+        index = index_b
+        while index < length_of_b and intervals_b[index][0] <= end:
+            b_start, b_end = intervals_b[index]
+            if b_start > cursor:
+                difference.append([cursor, b_start - 1])
+            cursor = max(cursor, b_end + 1)
+            index += 1
+
+        if cursor <= end:
+            difference.append([cursor, end])
+    return difference
+
+
+def interval_intersection(intervals_a=(), intervals_b=()):
+    """
+    the frames found in both intervals.
+    :param intervals_a: <list> sorted, non overlapping [start, end] intervals.
+    :param intervals_b: <list> sorted, non overlapping [start, end] intervals.
+    :return: <list> [start, end] intervals.
+    """
+    intersection = []
+    index_a = index_b = 0
+    while index_a < len(intervals_a) and index_b < len(intervals_b):
+        start = max(intervals_a[index_a][0], intervals_b[index_b][0])
+        end = min(intervals_a[index_a][1], intervals_b[index_b][1])
+        if start <= end:
+            intersection.append([start, end])
+        if intervals_a[index_a][1] < intervals_b[index_b][1]:
+            index_a += 1
+        else:
+            index_b += 1
+    return intersection
+
+
+def _size_index(intervals, starts, offsets, frame):
+    """
+    find the index of the frame in the sizes list kept along the intervals.
+    :param intervals: <list> [start, end] intervals.
+    :param starts: <list> the start frame of every interval.
+    :param offsets: <list> the index of the first size of every interval.
+    :param frame: <int> frame number, it must be inside the intervals.
+    :return: <int> sizes index.
+    """
+    position = bisect_right(starts, frame) - 1
+    return offsets[position] + frame - intervals[position][0]
+
+
+def _interval_offsets(intervals=()):
+    """
+    the start frames and the first sizes index of every interval.
+    :param intervals: <list> [start, end] intervals.
+    :return: <list> starts, <list> offsets.
+    """
+    starts = []
+    offsets = []
+    offset = 0
+    for start, end in intervals:
+        starts.append(start)
+        offsets.append(offset)
+        offset += end - start + 1
+    return starts, offsets
+
+
+def changed_intervals(frames_a, frames_b):
+    """
+    the frames found in both frame entries whose file size changed.
+    only the sizes inside the intersecting intervals are compared.
+    :param frames_a: <dict> frame entry with padding, intervals and sizes.
+    :param frames_b: <dict> frame entry with padding, intervals and sizes.
+    :return: <list> [start, end] intervals.
+    """
+    sizes_a = frames_a["sizes"]
+    sizes_b = frames_b["sizes"]
+    if sizes_a is None or sizes_b is None:
+        return []
+
+    starts_a, offsets_a = _interval_offsets(frames_a["intervals"])
+    starts_b, offsets_b = _interval_offsets(frames_b["intervals"])
+
+    changed = []
+    for start, end in interval_intersection(frames_a["intervals"], frames_b["intervals"]):
+        index_a = _size_index(frames_a["intervals"], starts_a, offsets_a, start)
+        index_b = _size_index(frames_b["intervals"], starts_b, offsets_b, start)
+        for step in range(end - start + 1):
+            if sizes_a[index_a + step] != sizes_b[index_b + step]:
+                frame = start + step
+                if changed and changed[-1][1] == frame - 1:
+                    changed[-1][1] = frame
+                else:
+                    changed.append([frame, frame])
+    return changed
+
+
+def file_size(directory_name="", file_name=""):
+    """
+    get the size of the file in the directory.
+    :param directory_name: <str> directory name.
+    :param file_name: <str> file name.
+    :return: <int> size in bytes.
+    """
+    return os.stat(path_utils.join_file_path(directory_name, file_name)).st_size
+
+
+def sequence_snapshot(sequence, directory_name="", sizes=True):
+    """
+    build the snapshot entry of one sequence.
+    :param sequence: <FileSequence> the sequence.
+    :param directory_name: <str> the directory of the sequence files, used for the sizes.
+    :param sizes: <bool> also record the file sizes.
+    :return: <dict> snapshot entry.
+    """
+    entry = {"format_name": sequence.format_name(), "frames": [], "sizes": None}
+    if sequence.position is None:
+        if sizes:
+            entry["sizes"] = [file_size(directory_name, sequence.file_name())]
+        return entry
+
+    frames_by_padding = {}
+    sizes_by_padding = {}
+    for index in range(len(sequence)):
+        frame = sequence.frames[index]
+        padding = frame_padding(frame, sequence.padding[index])
+        if padding not in frames_by_padding:
+            frames_by_padding[padding] = array(sequence_utils.FRAME_TYPECODE)
+            sizes_by_padding[padding] = []
+        frames_by_padding[padding].append(frame)
+        if sizes:
+            sizes_by_padding[padding].append(file_size(directory_name, sequence.file_name(index)))
+
+    for padding in sorted(frames_by_padding):
+        entry["frames"].append({
+            "padding": padding,
+            "intervals": frame_intervals(frames_by_padding[padding]),
+            "sizes": sizes_by_padding[padding] if sizes else None,
+        })
+    return entry
+
+
+def scan_snapshot(directory_name="", sizes=True):
+    """
+    scan the directory and build its snapshot.
+    :param directory_name: <str> the directory to scan.
+    :param sizes: <bool> also record the file sizes.
+    :return: <dict> snapshot.
+    """
+    # a snapshot holds frame sequences only, the files numbered on two axes stay in their sequences of frames
+    pattern_finder = utils.PatternFinder(directory_name=directory_name, grids=False)
+    sequences = {}
+    for key_name, sequence in pattern_finder.FILE_SEQUENCES.items():
+        sequences[key_name] = sequence_snapshot(sequence, directory_name, sizes)
+    return {"lss_scan": SNAPSHOT_VERSION, "directory": os.path.abspath(directory_name), "sequences": sequences}
+
+
+def save_snapshot(snapshot, file_name=""):
+    """
+    save the snapshot to a scan file.
+    :param snapshot: <dict> snapshot.
+    :param file_name: <str> the scan file to write.
+    :return: <bool> True for success.
+    """
+    with open(file_name, 'w') as f_obj:
+        json.dump(snapshot, f_obj, separators=(',', ':'))
+    return True
+
+
+def load_snapshot(path_name=""):
+    """
+    get the snapshot of a directory, by scanning it, or of a saved scan file.
+    :param path_name: <str> a directory or a saved scan file.
+    :return: <dict> snapshot.
+    """
+    path_check = path_utils.check_path_name(path_name)
+    if path_check == 'directory':
+        return scan_snapshot(path_name)
+    if path_check == 'filename':
+        with open(path_name) as f_obj:
+            try:
+                snapshot = json.load(f_obj)
+            except ValueError:
+                snapshot = None
+        if not isinstance(snapshot, dict) or snapshot.get("lss_scan") != SNAPSHOT_VERSION:
+            raise ValueError("[LoadSnapshot] :: Not an lss scan file. path_name: {}".format(path_name))
+        return snapshot
+    raise IOError("[LoadSnapshot] :: Incorrect path given. path_name: {}".format(path_name))
+
+
+def sequence_difference(entry_a=None, entry_b=None):
+    """
+    the difference between two snapshot entries of the same sequence.
+    :param entry_a: <dict> the first snapshot entry. <None> if the sequence is not in the first snapshot.
+    :param entry_b: <dict> the second snapshot entry. <None> if the sequence is not in the second snapshot.
+    :return: <dict> format_name, then (padding, [start, end]) intervals for the added, removed and changed frames.
+        single files get a 'file' state instead. <dict> empty for no difference.
+    """
+    format_name = (entry_b or entry_a)["format_name"]
+    difference = {"format_name": format_name, "added": [], "removed": [], "changed": [], "file": ""}
+
+    # single files
+    if not (entry_a or entry_b)["frames"]:
+        if entry_a is None:
+            difference["file"] = "added"
+        elif entry_b is None:
+            difference["file"] = "removed"
+        elif entry_a["sizes"] is not None and entry_b["sizes"] is not None and entry_a["sizes"] != entry_b["sizes"]:
+            difference["file"] = "changed"
+        return difference if difference["file"] else {}
+
+    frames_a = dict([(f_entry["padding"], f_entry) for f_entry in (entry_a or {}).get("frames", ())])
+    frames_b = dict([(f_entry["padding"], f_entry) for f_entry in (entry_b or {}).get("frames", ())])
+    for padding in sorted(set(frames_a) | set(frames_b)):
+        intervals_a = frames_a[padding]["intervals"] if padding in frames_a else []
+        intervals_b = frames_b[padding]["intervals"] if padding in frames_b else []
+        for interval in interval_difference(intervals_b, intervals_a):
+            difference["added"].append((padding, interval))
+        for interval in interval_difference(intervals_a, intervals_b):
+            difference["removed"].append((padding, interval))
+        if padding in frames_a and padding in frames_b:
+            for interval in changed_intervals(frames_a[padding], frames_b[padding]):
+                difference["changed"].append((padding, interval))
+
+    if not any([difference[state] for state in DIFF_STATES]):
+        return {}
+    return difference
+
+
+def diff_snapshots(snapshot_a, snapshot_b):
+    """
+    the differences of every sequence between two snapshots.
+    :param snapshot_a: <dict> the first snapshot.
+    :param snapshot_b: <dict> the second snapshot.
+    :return: <dict> sequence differences by key name, only for the sequences that differ.
+    """
+    sequences_a = snapshot_a["sequences"]
+    sequences_b = snapshot_b["sequences"]
+    differences = {}
+    for key_name in sorted(set(sequences_a) | set(sequences_b)):
+        difference = sequence_difference(sequences_a.get(key_name), sequences_b.get(key_name))
+        if difference:
+            differences[key_name] = difference
+    return differences
+
+
+def difference_line(difference):
+    """
+    format the difference of one sequence into its display line.
+    :param difference: <dict> sequence difference.
+    :return: <str> display line.
+    """
+    parts = [difference["format_name"]]
+    if difference["file"]:
+        parts.append(difference["file"])
+
+    for state in DIFF_STATES:
+        if not difference[state]:
+            continue
+        count = sum([end - start + 1 for padding, (start, end) in difference[state]])
+        ranges = ' '.join(['{}-{}'.format(str(start).zfill(padding), str(end).zfill(padding))
+                           for padding, (start, end) in difference[state]])
+        parts.append('{} {}: {}'.format(state, count, ranges))
+    return '\t'.join(parts)
+
+
+def do_diff(path_a="", path_b=""):
+    """
+    print the differences between two directories or saved scans.
+    :param path_a: <str> a directory or a saved scan file.
+    :param path_b: <str> a directory or a saved scan file.
+    :return: <bool> True when there are no differences. <bool> False when there are.
+    """
+    differences = diff_snapshots(load_snapshot(path_a), load_snapshot(path_b))
+    if differences:
+        utils.display_lines([difference_line(difference) for difference in differences.values()])
+    else:
+        print(
+            "\n"
+            "There are no differences."
+            "\n"
+        )
+    return not differences
+
+
+def do_save_scan(path_name="", file_name=""):
+    """
+    scan the directory and save it for a later diff.
+    :param path_name: <str> the directory, or a file inside the directory.
+    :param file_name: <str> the scan file to write.
+    :return: <bool> True for success.
+    """
+    directory_name = path_utils.get_directory_from_file_name(path_name)
+    if not directory_name:
+        raise IOError("[DoSaveScan] :: Incorrect path given. path_name: {}".format(path_name))
+    return save_snapshot(scan_snapshot(directory_name), file_name)
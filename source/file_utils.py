@@ -4,98 +4,125 @@ file_utils.py modules for all file handling related objects.
 
 # import standard modules
 import os
+import stat
+import errno
+import shutil
 
 # import local modules
-import path_utils
+from . import path_utils
+from . import log_utils
+
+# define local variables
+COPY_BUFFER_SIZE = 1024 * 1024
+# the errors of a kernel copy between files it does not support, the next copy function is tried then
+KERNEL_COPY_ERRORS = (errno.EXDEV, errno.EINVAL, errno.ENOSYS, errno.EOPNOTSUPP, errno.EBADF)
 
 
 def delete_logfile():
     """
-    deletes the log file.
+    deletes the log file. the queued records are written first, so none end up in a new log.
     :return: <bool> True for success.
     """
-    log_file = path_utils.log_filename()
+    log_utils.close_log()
+    log_file = log_utils.log_path()
     if path_utils.is_file(log_file):
         return os.remove(log_file)
     return True
 
 
-def open_logfile_obj():
+def _copy_range(in_fd, out_fd, offset, count):
+    """
+    copy a range of the input file to the output file position with os.copy_file_range.
+    :return: <int> bytes copied.
+    """
+    return os.copy_file_range(in_fd, out_fd, count, offset)
+
+
+def _send_file(in_fd, out_fd, offset, count):
     """
-    opens a file log object.
-    :return: <fileObj>
+    send a range of the input file to the output file position with os.sendfile.
+    :return: <int> bytes sent.
     """
-    f_obj = open(path_utils.log_filename(), 'a+')
-    return f_obj
+    return os.sendfile(out_fd, in_fd, offset, count)
 
 
-def close_logfile_obj(f_obj=None):
+def kernel_copy_functions(out_fd):
     """
-    closes the file log object.
-    :param f_obj: <fileObj> file object variable.
-    :return: <fileObj>
+    get the kernel copy functions that can write to the output file descriptor, the preferred one first.
+    os.copy_file_range needs a regular output file, os.sendfile writes to pipes and sockets as well.
+    :param out_fd: <int> output file descriptor.
+    :return: <list> copy functions.
     """
-    f_obj.close()
-    return f_obj
+    copy_functions = []
+    if hasattr(os, 'copy_file_range') and stat.S_ISREG(os.fstat(out_fd).st_mode):
+        copy_functions.append(_copy_range)
+    if hasattr(os, 'sendfile'):
+        copy_functions.append(_send_file)
+    return copy_functions
 
 
-def write_logfile_obj(f_obj, string_line=""):
+def append_file(source="", out_fd=1, copy_functions=None):
     """
-    write the strings to a file.
-    :param f_obj: <fileObj> file object variable.
-    :param string_line: <str> the string line to write to the file.
+    append the file contents at the position of the output file descriptor.
+    the data is copied by the kernel, so it does not pass through python buffers.
+    falls back to a buffered copy where the kernel cannot copy between these files.
+    :param source: <str> the file to append.
+    :param out_fd: <int> output file descriptor.
+    :param copy_functions: <list> the kernel copy functions to use, from kernel_copy_functions.
+    :return: <int> bytes appended.
+    """
+    if copy_functions is None:
+        copy_functions = kernel_copy_functions(out_fd)
+
+    with open(source, 'rb') as src_obj:
+        in_fd = src_obj.fileno()
+        size = os.fstat(in_fd).st_size
+        offset = 0
+        for copy_function in copy_functions:
+            try:
+                while offset < size:
+                    copied = copy_function(in_fd, out_fd, offset, size - offset)
+                    if not copied:
+                        break
+                    offset += copied
+            except OSError as error:
+                if error.errno not in KERNEL_COPY_ERRORS:
+                    raise
+            if offset >= size:
+                return offset
+
+        src_obj.seek(offset)
+        while True:
+            chunk = src_obj.read(COPY_BUFFER_SIZE)
+            if not chunk:
+                break
+            view = memoryview(chunk)
+            while view:
+                view = view[os.write(out_fd, view):]
+            offset += len(chunk)
+    return offset
+
+
+def copy_file(source="", target=""):
+    """
+    copy the file contents, with the kernel copy functions of append_file.
+    the target must not exist yet.
+    :param source: <str> the file to copy.
+    :param target: <str> the new file.
     :return: <bool> True for success.
     """
-    f_obj.write(string_line)
+    with open(target, 'xb') as dst_obj:
+        append_file(source, dst_obj.fileno())
+    shutil.copymode(source, target)
     return True
 
 
-class LogFile:
+def link_file(source="", target=""):
     """
-    a handy class object to deal with files opening, writing and closing.
+    hard link the file.
+    :param source: <str> the file to link.
+    :param target: <str> the new link.
+    :return: <bool> True for success.
     """
-    def __init__(self):
-        self.file_obj = open_logfile_obj()
-
-    def write_file(self, string_line=""):
-        """
-        write the line to the file object.
-        :param string_line: <str> the message to write.
-        :return: <None>
-        """
-        write_logfile_obj(self.file_obj, string_line)
-
-    def close_file(self):
-        """
-        close the opened file object.
-        :return: <None>
-        """
-        close_logfile_obj(self.file_obj)
-
-    @staticmethod
-    def delete_file():
-        """
-        deletes the log file.
-        :return: <None>
-        """
-        delete_logfile()
-
-    @property
-    def is_active(self):
-        """
-        returns True if the file is not closed. False is the file is closed.
-        :return: <bool>
-        """
-        return not self.file_obj.closed
-
-    @property
-    def is_closed(self):
-        """
-        returns True if the file is closed. False if the file is not closed.
-        :return: <bool>
-        """
-        return self.file_obj.closed
-
-    def __del__(self):
-        self.close_file()
-        # print("[LogFile] :: is closed: {}".format(self.is_closed))
+    os.link(source, target)
+    return True
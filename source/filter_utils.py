@@ -0,0 +1,114 @@
+"""
+filter_utils.py: the file filters, applied while the directory is listed so filtered files never reach the grouping.
+
+The extensions, include globs and exclude globs are compiled into a single matcher:
+    lss -p /renders --ext exr,dpx --exclude '*_tmp*'
+    lss -p /renders --include 'beauty.*' --min-length 10
+The include and exclude globs are joined into one regular expression each, so every file is matched at most twice.
+The minimum sequence length can only be known after grouping, it is applied to the found sequences.
+"""
+# import standard modules
+import os
+import re
+import fnmatch
+
+# define local variables
+__file_filter__ = None
+
+
+def split_extensions(extensions=()):
+    """
+    normalize the extensions, they may be given comma separated, with or without the leading dot.
+    :param extensions: <list> extensions.
+    :return: <frozenset> lower case extensions, with the leading dot.
+    """
+    normalized = set()
+    for extension in extensions:
+        for name in extension.split(","):
+            name = name.strip().lower()
+            if name:
+                normalized.add(name if name.startswith(".") else "." + name)
+    return frozenset(normalized)
+
+
+def compile_globs(globs=()):
+    """
+    join the globs into one regular expression.
+    :param globs: <list> glob patterns.
+    :return: <re.Pattern> compiled globs. <None> when no globs are given.
+    """
+    if not globs:
+        return None
+    return re.compile("|".join(["(?:{})".format(fnmatch.translate(pattern)) for pattern in globs]))
+
+
+class FileFilter:
+    """
+    a single matcher for the extensions, include and exclude globs of the listed files.
+    without any filter it keeps the files with an extension, as the listing always did.
+    """
+    def __init__(self, extensions=(), include=(), exclude=(), min_length=0):
+        """
+        :param extensions: <list> keep only the files with these extensions.
+        :param include: <list> keep only the files matching one of these globs.
+        :param exclude: <list> drop the files matching one of these globs.
+        :param min_length: <int> drop the sequences and single files with fewer files.
+        """
+        self.extensions = split_extensions(extensions)
+        self.include = compile_globs(include)
+        self.exclude = compile_globs(exclude)
+        self.min_length = min_length or 0
+
+    def __call__(self, file_name=""):
+        """
+        check if the file name passes the filter.
+        :param file_name: <str> the file name.
+        :return: <bool> True for success. <bool> False for failure.
+        """
+        extension = os.path.splitext(file_name)[1]
+        if not extension:
+            return False
+        if self.extensions and extension.lower() not in self.extensions:
+            return False
+        if self.include and not self.include.match(file_name):
+            return False
+        if self.exclude and self.exclude.match(file_name):
+            return False
+        return True
+
+    def filter_files(self, files=()):
+        """
+        filter the file names.
+        :param files: <list> file names.
+        :return: <tuple> the file names passing the filter.
+        """
+        return tuple(filter(self, files))
+
+    @property
+    def is_empty(self):
+        """
+        returns True if no extensions or globs are given, only the files without an extension are filtered then.
+        :return: <bool>
+        """
+        return not (self.extensions or self.include or self.exclude)
+
+
+def set_file_filter(extensions=(), include=(), exclude=(), min_length=0):
+    """
+    set the file filter every PatternFinder uses by default.
+    :return: <FileFilter> the file filter.
+    """
+    global __file_filter__
+    __file_filter__ = FileFilter(extensions, include, exclude, min_length)
+    return __file_filter__
+
+
+def get_file_filter():
+    """
+    get the default file filter.
+    :return: <FileFilter> the file filter.
+    """
+    global __file_filter__
+    if __file_filter__ is None:
+        __file_filter__ = FileFilter()
+    return __file_filter__
@@ -0,0 +1,92 @@
+"""
+grid_utils.py: the files numbered on two axes, grouped into grids: tiles by frames, or UDIM-style u and v tiles.
+
+The files of a grid share one skeleton, see string_utils.extract_skeleton, with exactly two of their numbers varying:
+    render_tile_01_0001.exr ... render_tile_04_0024.exr     96 render_tile_%02d_%04d.exr	01-04 x 0001-0024
+    tex_1001_u1_v1.exr ... tex_1001_u10_v3.exr              30 tex_1001_u%d_v%d.exr	1-10 x 1-3
+A grid with holes in it prints the number of files missing from the full grid:
+    95 render_tile_%02d_%04d.exr	01-04 x 0001-0024 (1 missing)
+
+Grids are off by default: versions by frames are numbered the same way as tiles by frames,
+and lss keeps printing them as one sequence of frames per version. They are turned on for a scan with:
+    lss --grid
+"""
+# import local modules
+from . import string_utils
+from . import sequence_utils
+
+# define local variables
+MIN_GRID_LENGTH = 4
+__grids__ = False
+
+
+def set_grids(enabled=True):
+    """
+    set whether every PatternFinder groups the grids by default.
+    :param enabled: <bool> group the grids.
+    :return: <bool> the setting.
+    """
+    global __grids__
+    __grids__ = bool(enabled)
+    return __grids__
+
+
+def get_grids():
+    """
+    get whether every PatternFinder groups the grids by default.
+    :return: <bool> the setting.
+    """
+    return __grids__
+
+
+def find_grid(files=()):
+    """
+    find the grid of the files sharing one skeleton: exactly two of their numbers vary, and every number of
+    one axis comes with more than one number of the other, so a single diagonal is not taken for a grid.
+    :param files: <list> the files of one skeleton.
+    :return: <GridSequence> the grid. <None> if the files are not a grid.
+    """
+    if len(files) < MIN_GRID_LENGTH:
+        return None
+    numbers = [string_utils.extract_numbers(file_name) for file_name in files]
+    columns = list(zip(*numbers))
+    varying = [position for position, column in enumerate(columns) if len(set(column)) > 1]
+    if len(varying) != 2:
+        return None
+    first, second = varying
+    if not all([string_utils.is_frame_number(n) for n in columns[first] + columns[second]]):
+        return None
+    if len(files) <= max(len(set(columns[first])), len(set(columns[second]))):
+        return None
+
+    # the numbers that do not vary are the same in every file, so the name parts of the first file hold for all
+    file_name = files[0]
+    indices = string_utils.extract_numbers_indices(file_name)
+    grid = sequence_utils.GridSequence(
+        file_name[:indices[first][0]], file_name[indices[first][1]:indices[second][0]],
+        file_name[indices[second][1]:], (first, second))
+    for first_string, second_string in zip(columns[first], columns[second]):
+        grid.append(first_string, second_string)
+    grid.sort()
+    return grid
+
+
+def group_grids(files=()):
+    """
+    group the files numbered on two axes into grids.
+    :param files: <list> the files to group.
+    :return: <dict> GridSequence by key name, the file name without its two numbers. <list> the files left over.
+    """
+    skeleton_groups = {}
+    for file_name in files:
+        skeleton_groups.setdefault(string_utils.extract_skeleton(file_name), []).append(file_name)
+
+    grids = {}
+    leftover = []
+    for skeleton_files in skeleton_groups.values():
+        grid = find_grid(skeleton_files)
+        if grid is None:
+            leftover.extend(skeleton_files)
+            continue
+        grids[grid.head + grid.middle + grid.tail] = grid
+    return grids, leftover
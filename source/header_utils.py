@@ -0,0 +1,273 @@
+"""
+header_utils.py: the frame consistency check of the sequences, from the image headers only.
+
+Only the first bytes of every frame are read, never the pixels, and no image library is needed:
+    png     the IHDR chunk
+    exr     the channels and dataWindow attributes of the header
+    dpx     the image information header
+    jpg     the start of frame segment
+Every frame gets its format, width, height, channels and bit depth, and the frames differing from the majority
+of their sequence are reported, together with the frames whose header cannot be read:
+    lss -p /deliveries/shot_010 --headers
+    100000 shot_%04d.exr	exr 2048x1152 4ch 16bit	exr 2048x1152 3ch 16bit 1: 42017-42017
+The headers are read with a single pread in a pool of worker threads, a header longer than the first read,
+like a JPEG with a large EXIF block, is read again with a larger size.
+"""
+# import standard modules
+import os
+import struct
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+# import local modules
+from . import utils
+from . import path_utils
+from . import sequence_utils
+
+# define local variables
+HEADER_SIZE = 1024
+MAX_HEADER_SIZE = 1024 * 1024
+CHUNK_SIZE = 256
+HEADER_EXTENSIONS = (".png", ".exr", ".dpx", ".jpg", ".jpeg")
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+PNG_CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+EXR_MAGIC = b"\x76\x2f\x31\x01"
+# the bits of the uint, half and float pixel types
+EXR_PIXEL_BITS = {0: 32, 1: 16, 2: 32}
+DPX_CHANNELS = {1: 1, 2: 1, 3: 1, 4: 1, 6: 1, 50: 3, 51: 4, 52: 4}
+# the start of frame markers, all but the DHT, JPG and DAC markers in between
+JPEG_SOF_MARKERS = frozenset([0xc0, 0xc1, 0xc2, 0xc3, 0xc5, 0xc6, 0xc7, 0xc9, 0xca, 0xcb, 0xcd, 0xce, 0xcf])
+JPEG_STANDALONE_MARKERS = frozenset([0x01] + list(range(0xd0, 0xd8)))
+
+
+def parse_png(data=b""):
+    """
+    parse the IHDR chunk, the first chunk after the signature.
+    :param data: <bytes> the first bytes of the file.
+    :return: <tuple> (format, width, height, channels, depth). <None> if the data holds no complete header.
+    """
+    if len(data) < 29 or data[12:16] != b"IHDR":
+        return None
+    width, height, depth, color_type = struct.unpack(">IIBB", data[16:26])
+    return "png", width, height, PNG_CHANNELS.get(color_type, 0), depth
+
+
+def parse_exr(data=b""):
+    """
+    parse the attributes of the header, up to the null byte ending it.
+    :param data: <bytes> the first bytes of the file.
+    :return: <tuple> (format, width, height, channels, depth). <None> if the data holds no complete header.
+    :raises ValueError: the header is corrupt, reading more of the file does not help.
+    """
+    channels = None
+    window = None
+    offset = 8
+    while offset < len(data):
+        if data[offset] == 0:
+            break
+        name_end = data.find(b"\0", offset)
+        type_end = data.find(b"\0", name_end + 1)
+        if name_end < 0 or type_end < 0 or type_end + 5 > len(data):
+            return None
+        name = data[offset:name_end]
+        size = struct.unpack("<i", data[type_end + 1:type_end + 5])[0]
+        if size < 0:
+            raise ValueError("[ParseExr] :: Negative attribute size: {}".format(size))
+        value = data[type_end + 5:type_end + 5 + size]
+        if len(value) < size:
+            return None
+        if name == b"channels":
+            channels = []
+            index = 0
+            while index < len(value) and value[index]:
+                index = value.find(b"\0", index) + 1
+                # every channel name is followed by its pixel type, linearity, sampling: 16 bytes
+                if not index or index + 16 > len(value):
+                    raise ValueError("[ParseExr] :: Truncated channel list.")
+                channels.append(struct.unpack("<i", value[index:index + 4])[0])
+                index += 16
+        elif name == b"dataWindow":
+            if len(value) < 16:
+                raise ValueError("[ParseExr] :: Truncated dataWindow attribute.")
+            window = struct.unpack("<iiii", value[:16])
+        offset = type_end + 5 + size
+    else:
+        # the data ended before the header did
+        return None
+    if channels is None or window is None:
+        return None
+    depth = max([EXR_PIXEL_BITS.get(pixel_type, 0) for pixel_type in channels] or [0])
+    return "exr", window[2] - window[0] + 1, window[3] - window[1] + 1, len(channels), depth
+
+
+def parse_dpx(data=b""):
+    """
+    parse the image information header of the first image element, in the byte order of the magic number.
+    :param data: <bytes> the first bytes of the file.
+    :return: <tuple> (format, width, height, channels, depth). <None> if the data holds no complete header.
+    """
+    if len(data) < 804:
+        return None
+    order = ">" if data[:4] == b"SDPX" else "<"
+    width, height = struct.unpack(order + "II", data[772:780])
+    descriptor, depth = data[800], data[803]
+    return "dpx", width, height, DPX_CHANNELS.get(descriptor, 0), depth
+
+
+def parse_jpeg(data=b""):
+    """
+    parse the start of frame segment, skipping the segments before it.
+    :param data: <bytes> the first bytes of the file.
+    :return: <tuple> (format, width, height, channels, depth). <None> if the data holds no complete header.
+    :raises ValueError: the header is corrupt, reading more of the file does not help.
+    """
+    offset = 2
+    while offset + 4 <= len(data):
+        if data[offset] != 0xff:
+            return None
+        marker = data[offset + 1]
+        if marker == 0xff:
+            # a fill byte
+            offset += 1
+            continue
+        if marker in JPEG_STANDALONE_MARKERS:
+            offset += 2
+            continue
+        length = struct.unpack(">H", data[offset + 2:offset + 4])[0]
+        # the length counts its own two bytes
+        if length < 2:
+            raise ValueError("[ParseJpeg] :: Segment length too short: {}".format(length))
+        if marker in JPEG_SOF_MARKERS:
+            if offset + 10 > len(data):
+                return None
+            depth, height, width, channels = struct.unpack(">BHHB", data[offset + 4:offset + 10])
+            return "jpg", width, height, channels, depth
+        offset += 2 + length
+    return None
+
+
+def parse_header(data=b""):
+    """
+    parse the image header, by the magic number at the start of the file.
+    :param data: <bytes> the first bytes of the file.
+    :return: <tuple> (format, width, height, channels, depth). <None> for an unknown or incomplete header.
+    """
+    if data.startswith(PNG_SIGNATURE):
+        return parse_png(data)
+    if data.startswith(EXR_MAGIC):
+        return parse_exr(data)
+    if data[:4] in (b"SDPX", b"XPDS"):
+        return parse_dpx(data)
+    if data.startswith(b"\xff\xd8"):
+        return parse_jpeg(data)
+    return None
+
+
+def read_header(file_name=""):
+    """
+    read and parse the header of the file, reading more of the file only while the header is incomplete.
+    a corrupt header is reported as unreadable, it never stops the check of the other frames.
+    :param file_name: <str> the file name.
+    :return: <tuple> (format, width, height, channels, depth). <None> if the header cannot be read.
+    """
+    try:
+        fd = os.open(file_name, os.O_RDONLY)
+    except OSError:
+        return None
+    try:
+        size = HEADER_SIZE
+        while True:
+            data = os.pread(fd, size, 0)
+            header = parse_header(data)
+            # the file ended before the header did, or the header is too long to be one
+            if header is not None or len(data) < size or size >= MAX_HEADER_SIZE:
+                return header
+            size *= 4
+    except (OSError, ValueError, IndexError, struct.error):
+        return None
+    finally:
+        os.close(fd)
+
+
+def read_headers(file_names=(), workers=None):
+    """
+    read the headers of the files in a pool of worker threads, a chunk of files at a time.
+    :param file_names: <list> file names.
+    :param workers: <int> the number of worker threads. defaults to the number of cpus.
+    :return: <list> the headers, in the order of the files.
+    """
+    chunks = [file_names[index:index + CHUNK_SIZE] for index in range(0, len(file_names), CHUNK_SIZE)]
+    headers = []
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        for chunk_headers in executor.map(lambda chunk: list(map(read_header, chunk)), chunks):
+            headers.extend(chunk_headers)
+    return headers
+
+
+def header_text(header=None):
+    """
+    format the header for display.
+    :param header: <tuple> (format, width, height, channels, depth).
+    :return: <str> header text.
+    """
+    if header is None:
+        return "unreadable"
+    return "{} {}x{} {}ch {}bit".format(*header)
+
+
+def check_sequence(directory_name, sequence, workers=None):
+    """
+    read the headers of every frame and compare them to the header most of the frames have.
+    :param directory_name: <str> the directory of the sequence.
+    :param sequence: <FileSequence> the sequence.
+    :param workers: <int> the number of worker threads.
+    :return: <tuple> the majority header, <dict> the indices of the differing frames by their header.
+    """
+    headers = read_headers([path_utils.join_file_path(directory_name, file_name) for file_name in sequence],
+                           workers)
+    tally = Counter(headers)
+    majority = max(tally, key=lambda header: (header is not None, tally[header]))
+    differing = {}
+    for index, header in enumerate(headers):
+        if header != majority:
+            differing.setdefault(header, []).append(index)
+    return majority, differing
+
+
+def frame_ranges(sequence, indices=()):
+    """
+    the frame ranges of the frames at the indices, for display.
+    :param sequence: <FileSequence> the sequence.
+    :param indices: <list> the indices of the frames, in frame order.
+    :return: <str> ranges.
+    """
+    ranges = sequence_utils.number_ranges(
+        [sequence.frames[index] for index in indices], [sequence.padding[index] for index in indices])
+    return ' '.join(['{}-{}'.format(start, end) for start, end in ranges])
+
+
+def do_headers(path_name="", workers=None):
+    """
+    check the frames of every image sequence in the directory against the majority header of their sequence.
+    :param path_name: <str> the directory, or a file inside the directory.
+    :param workers: <int> the number of worker threads.
+    :return: <bool> True for success. <bool> False when frames differ or cannot be read.
+    """
+    directory_name = path_utils.get_directory_from_file_name(path_name)
+    if not directory_name:
+        raise IOError("[CheckHeaders] :: Incorrect path given. path_name: {}".format(path_name))
+    # the headers are compared within the sequences of frames, the files numbered on two axes are not grouped into grids
+    pf = utils.PatternFinder(directory_name=directory_name, grids=False)
+    success = True
+    lines = []
+    for sequence in pf.FILE_SEQUENCES.values():
+        if sequence.position is None or not sequence.tail.lower().endswith(HEADER_EXTENSIONS):
+            continue
+        majority, differing = check_sequence(directory_name, sequence, workers)
+        parts = ['{} {}'.format(len(sequence), sequence.format_name()), header_text(majority)]
+        for header, indices in sorted(differing.items(), key=lambda item: item[1][0]):
+            success = False
+            parts.append('{} {}: {}'.format(header_text(header), len(indices), frame_ranges(sequence, indices)))
+        lines.append('\t'.join(parts))
+    utils.display_lines(lines)
+    return success
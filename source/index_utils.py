@@ -0,0 +1,102 @@
+"""
+index_utils.py: the single file lookup, finding the sequence of one file without grouping the whole directory.
+
+The filtered directory listing is sorted once and cached, for as long as the directory and the file filter do not change.
+The files of a sequence all start with the text before their frame number,
+so bisect finds their range in the sorted listing, and only the names in that range are checked.
+
+Example:
+    lss -p /renders/image-0023.png
+"""
+# import standard modules
+import os
+import re
+import time
+import bisect
+from collections import OrderedDict
+
+# import local modules
+from . import string_utils
+from . import filter_utils
+from . import listing_utils
+from . import convention_utils
+
+# define local variables
+MAX_INDEX_ENTRIES = 64
+# a directory changed this recently may change again within the same time stamp, so it is not cached yet.
+RACY_SECONDS = 1.0
+__index_cache__ = OrderedDict()
+
+
+def sorted_listing(directory_name="", file_filter=None):
+    """
+    list the directory with the listing backend, only the names passing the filter, sorted for bisect.
+    :param directory_name: <str> the directory.
+    :param file_filter: <FileFilter> the files to keep. <None> for the default file filter.
+    :return: <list> sorted file names.
+    """
+    return sorted(listing_utils.iter_names(directory_name, file_filter or filter_utils.get_file_filter()))
+
+
+def cached_listing(directory_name=""):
+    """
+    get the sorted listing of the directory, from the cache if neither the directory nor the file filter changed.
+    :param directory_name: <str> the absolute directory name.
+    :return: <list> sorted file names.
+    """
+    file_filter = filter_utils.get_file_filter()
+    dir_stat = os.stat(directory_name)
+    stamp = (dir_stat.st_ino, dir_stat.st_mtime_ns, file_filter)
+    entry = __index_cache__.get(directory_name)
+    if entry and entry[0] == stamp:
+        __index_cache__.move_to_end(directory_name)
+        return entry[1]
+
+    names = sorted_listing(directory_name, file_filter)
+    if time.time() - dir_stat.st_mtime >= RACY_SECONDS:
+        __index_cache__[directory_name] = (stamp, names)
+        __index_cache__.move_to_end(directory_name)
+        while len(__index_cache__) > MAX_INDEX_ENTRIES:
+            __index_cache__.popitem(last=False)
+    return names
+
+
+def prefix_range(names, prefix=""):
+    """
+    find the range of the sorted names starting with the prefix.
+    :param names: <list> sorted file names.
+    :param prefix: <str> the prefix.
+    :return: <int> start index, <int> end index.
+    """
+    if not prefix:
+        return 0, len(names)
+    start = bisect.bisect_left(names, prefix)
+    # the first string past every string starting with the prefix
+    end = bisect.bisect_left(names, prefix[:-1] + chr(ord(prefix[-1]) + 1), start)
+    return start, end
+
+
+def sequence_siblings(directory_name="", file_name=""):
+    """
+    find the files of the sequence the file name belongs to, the file name included.
+    the files of a sequence differ only in the digits of one number, so the numbers are tried from the last one on:
+    the files sharing the text before that number are found with bisect, then only checked for the same text after it.
+    the first number with other files along it is the frame number.
+    :param directory_name: <str> the directory.
+    :param file_name: <str> the base name of the file.
+    :return: <tuple> file names, <re.Pattern> a naming convention matching them, so they skip the heuristics.
+        <tuple> with only the file name, <None> when it is a single file.
+    """
+    names = cached_listing(os.path.abspath(directory_name))
+    for start, end in reversed(string_utils.extract_numbers_indices(file_name)):
+        prefix, suffix = file_name[:start], file_name[end:]
+        range_start, range_end = prefix_range(names, prefix)
+        siblings = []
+        for name in names[range_start:range_end]:
+            if name.endswith(suffix) and name[start:len(name) - len(suffix)].isdigit():
+                siblings.append(name)
+        if len(siblings) > 1:
+            convention = convention_utils.compile_convention(
+                "{}(?P<frame>\\d+){}".format(re.escape(prefix), re.escape(suffix)))
+            return tuple(siblings), convention
+    return (file_name,), None
@@ -0,0 +1,263 @@
+"""
+listing_utils.py: the directory listing backends, for huge flat directories.
+
+A backend lists a directory in batches of (name, d_type) tuples, so a scan can start on the first batch
+while the rest of the directory is still read:
+    listdir     os.listdir, a single batch once the whole directory is read, the types are not known.
+    scandir     os.scandir, batches of BATCH_SIZE entries, with the directories and links told apart.
+    getdents    the Linux getdents64 system call through ctypes, one batch for every large buffer read,
+                with the d_type of every entry as the filesystem reports it.
+    auto        getdents on Linux, scandir elsewhere.
+The backend is chosen for every scan, or on the command line:
+    lss -p /deliveries/flat --listing getdents
+Compare the backends on a directory with:
+    python -c "from lss import listing_utils; print(listing_utils.benchmark('/deliveries/flat'))"
+"""
+# import standard modules
+import os
+import sys
+import stat
+import time
+import ctypes
+import struct
+import platform
+
+# define local variables
+BACKENDS = ("auto", "listdir", "scandir", "getdents")
+BATCH_SIZE = 4096
+BUFFER_SIZE = 1024 * 1024
+DT_UNKNOWN = 0
+DT_DIR = 4
+DT_REG = 8
+DT_LNK = 10
+# the getdents64 system call number of every architecture using the generic or the i386 table
+SYS_GETDENTS64 = {"x86_64": 217, "aarch64": 61, "arm64": 61, "riscv64": 61, "ppc64le": 202, "ppc64": 202,
+                  "s390x": 220, "i386": 220, "i686": 220, "armv7l": 217}
+# struct linux_dirent64: d_ino, d_off, d_reclen, d_type, then the name ending on a null byte
+DIRENT64_HEADER = struct.Struct("=Q8xHB")
+__backend__ = "listdir"
+__libc__ = None
+
+
+def getdents_available():
+    """
+    check if the getdents backend can be used on this system.
+    :return: <bool> True for success. <bool> False for failure.
+    """
+    return sys.platform.startswith("linux") and platform.machine() in SYS_GETDENTS64
+
+
+def resolve_backend(backend=None):
+    """
+    the backend to list with: auto picks getdents on Linux and scandir elsewhere.
+    :param backend: <str> backend name. <None> for the configured one.
+    :return: <str> backend name.
+    """
+    backend = backend or __backend__
+    if backend not in BACKENDS:
+        raise ValueError("[ListingBackend] :: Unknown listing backend: {}".format(backend))
+    if backend == "auto":
+        return "getdents" if getdents_available() else "scandir"
+    if backend == "getdents" and not getdents_available():
+        raise ValueError("[ListingBackend] :: The getdents backend needs Linux, this is {} {}".format(
+            sys.platform, platform.machine()))
+    return backend
+
+
+def set_backend(backend="listdir"):
+    """
+    set the listing backend every directory scan uses by default.
+    :param backend: <str> backend name, one of BACKENDS.
+    :return: <str> backend name.
+    """
+    global __backend__
+    resolve_backend(backend)
+    __backend__ = backend
+    return __backend__
+
+
+def get_backend():
+    """
+    get the listing backend every directory scan uses by default.
+    :return: <str> backend name.
+    """
+    return __backend__
+
+
+def iter_listdir(directory_name=""):
+    """
+    list the directory with os.listdir, in a single batch.
+    :param directory_name: <str> the directory.
+    :return: <generator> lists of (name, d_type) tuples.
+    """
+    yield [(name, DT_UNKNOWN) for name in os.listdir(directory_name)]
+
+
+def iter_scandir(directory_name="", batch_size=BATCH_SIZE):
+    """
+    list the directory with os.scandir, in batches.
+    :param directory_name: <str> the directory.
+    :param batch_size: <int> the number of entries in a batch.
+    :return: <generator> lists of (name, d_type) tuples.
+    """
+    batch = []
+    with os.scandir(directory_name) as entries:
+        for entry in entries:
+            # scandir takes these from the d_type too, no stat is made unless the filesystem does not report it
+            if entry.is_dir(follow_symlinks=False):
+                batch.append((entry.name, DT_DIR))
+            elif entry.is_symlink():
+                batch.append((entry.name, DT_LNK))
+            else:
+                batch.append((entry.name, DT_REG))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def get_libc():
+    """
+    load the C library for its syscall function, once.
+    :return: <ctypes.CDLL> the C library.
+    """
+    global __libc__
+    if __libc__ is None:
+        libc = ctypes.CDLL(None, use_errno=True)
+        libc.syscall.restype = ctypes.c_long
+        __libc__ = libc
+    return __libc__
+
+
+def iter_getdents(directory_name="", buffer_size=BUFFER_SIZE):
+    """
+    list the directory with the getdents64 system call, one batch for every buffer the kernel fills.
+    :param directory_name: <str> the directory.
+    :param buffer_size: <int> the bytes read from the directory at a time.
+    :return: <generator> lists of (name, d_type) tuples.
+    """
+    libc = get_libc()
+    number = ctypes.c_long(SYS_GETDENTS64[platform.machine()])
+    buffer = ctypes.create_string_buffer(buffer_size)
+    size = ctypes.c_size_t(buffer_size)
+    header_size = DIRENT64_HEADER.size
+    unpack_from = DIRENT64_HEADER.unpack_from
+    encoding = sys.getfilesystemencoding()
+
+    fd = os.open(directory_name, os.O_RDONLY | os.O_DIRECTORY | os.O_CLOEXEC)
+    try:
+        while True:
+            # ctypes lets go of the GIL during the call, so other threads run while the kernel reads
+            length = libc.syscall(number, ctypes.c_int(fd), buffer, size)
+            if length < 0:
+                error = ctypes.get_errno()
+                raise OSError(error, os.strerror(error), directory_name)
+            if not length:
+                break
+            raw = buffer.raw[:length]
+            find = raw.find
+            names = []
+            d_types = []
+            offset = 0
+            while offset < length:
+                inode, record_length, d_type = unpack_from(raw, offset)
+                if inode:
+                    names.append(raw[offset + header_size:find(b"\0", offset + header_size)])
+                    d_types.append(d_type)
+                offset += record_length
+            if not names:
+                continue
+            # the names are decoded all at once, a name never holds a null byte
+            names = b"\0".join(names).decode(encoding, "surrogateescape").split("\0")
+            batch = [entry for entry in zip(names, d_types) if entry[0] != "." and entry[0] != ".."]
+            if batch:
+                yield batch
+    finally:
+        os.close(fd)
+
+
+def typed_backend(backend=None):
+    """
+    the backend to walk a directory tree with, telling the directories apart without a stat of every entry.
+    listdir does not know the types of the entries, so scandir lists in its place.
+    :param backend: <str> backend name. <None> for the configured one.
+    :return: <str> backend name.
+    """
+    backend = resolve_backend(backend)
+    if backend == "listdir":
+        return "scandir"
+    return backend
+
+
+def iter_batches(directory_name="", backend=None):
+    """
+    list the directory in batches, with the backend given.
+    :param directory_name: <str> the directory.
+    :param backend: <str> backend name. <None> for the configured one.
+    :return: <generator> lists of (name, d_type) tuples, the d_type is DT_UNKNOWN when the backend does not know it.
+    """
+    backend = resolve_backend(backend)
+    if backend == "getdents":
+        return iter_getdents(directory_name)
+    if backend == "scandir":
+        return iter_scandir(directory_name)
+    return iter_listdir(directory_name)
+
+
+def iter_names(directory_name="", file_filter=None, backend=None):
+    """
+    stream the names of the directory passing the filter, batch by batch.
+    :param directory_name: <str> the directory.
+    :param file_filter: <function> keep only the names passing this filter. <None> keeps every name.
+    :param backend: <str> backend name. <None> for the configured one.
+    :return: <generator> names.
+    """
+    for batch in iter_batches(directory_name, backend):
+        for name, d_type in batch:
+            if file_filter is None or file_filter(name):
+                yield name
+
+
+def is_directory(directory_name="", name="", d_type=DT_UNKNOWN):
+    """
+    check if the entry is a directory, without following links. only stats the entry if its d_type is unknown.
+    :param directory_name: <str> the directory of the entry.
+    :param name: <str> the entry name.
+    :param d_type: <int> the d_type of the entry.
+    :return: <bool> True for success. <bool> False for failure.
+    """
+    if d_type != DT_UNKNOWN:
+        return d_type == DT_DIR
+    try:
+        return stat.S_ISDIR(os.lstat(os.path.join(directory_name, name)).st_mode)
+    except OSError:
+        return False
+
+
+def benchmark(directory_name="", backends=("listdir", "scandir", "getdents"), repeat=3):
+    """
+    time the backends listing the directory, the best of the repeats, with the time to the first batch.
+    :param directory_name: <str> the directory.
+    :param backends: <list> backend names.
+    :param repeat: <int> the number of listings for every backend.
+    :return: <dict> (seconds to the first batch, seconds for the whole listing, number of entries) by backend name.
+    """
+    results = {}
+    for backend in backends:
+        if backend == "getdents" and not getdents_available():
+            continue
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            first = None
+            count = 0
+            for batch in iter_batches(directory_name, backend):
+                if first is None:
+                    first = time.perf_counter() - start
+                count += len(batch)
+            timing = (first or 0.0, time.perf_counter() - start, count)
+            if best is None or timing[1] < best[1]:
+                best = timing
+        results[backend] = best
+    return results
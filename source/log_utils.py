@@ -0,0 +1,227 @@
+"""
+log_utils.py: the lss log, structured records written by a background thread in large batches.
+
+Every record is one json line:
+    {"time": 1597412345.12, "pid": 4242, "event": "scan", "path": "/renders", "count": 21, "lines": [...]}
+
+Records are put on a bounded queue and return right away, the writer thread drains the queue
+and writes everything waiting with a single append, so the scans never wait on the disk.
+A batch only holds whole lines and the log is opened in append mode,
+so concurrent lss runs logging to the same file never interleave their lines.
+The log is rotated by size: logfile.log, logfile.log.1, logfile.log.2, ...
+
+The log goes to the LSS_LOG environment variable when set, else to logfile.log next to the lss sources.
+"""
+# import standard modules
+import os
+import json
+import time
+import queue
+import atexit
+import threading
+
+# import local modules
+from . import path_utils
+
+# define local variables
+LOG_ENV = "LSS_LOG"
+MAX_QUEUE_RECORDS = 4096
+BATCH_BYTES = 1024 * 1024
+MAX_LOG_BYTES = 10 * 1024 * 1024
+BACKUP_COUNT = 3
+__log_path__ = ""
+__log_writer__ = None
+
+
+def log_path():
+    """
+    get the log file name, set by configure, the LSS_LOG environment variable, or next to the lss sources.
+    :return: <str> log file name.
+    """
+    return __log_path__ or os.environ.get(LOG_ENV) or path_utils.log_filename()
+
+
+def configure(path_name=""):
+    """
+    send the log to this file. closes the running writer, the next record opens the new file.
+    :param path_name: <str> log file name.
+    :return: <bool> True for success.
+    """
+    global __log_path__
+    close_log()
+    __log_path__ = path_name
+    return True
+
+
+def record_line(event="", **fields):
+    """
+    format a structured record as a json line.
+    :param event: <str> the record event name.
+    :param fields: <dict> the record fields, they must be json serializable.
+    :return: <str> json line.
+    """
+    record = {"time": round(time.time(), 3), "pid": os.getpid(), "event": event}
+    record.update(fields)
+    return json.dumps(record) + "\n"
+
+
+class LogWriter:
+    """
+    writes log lines from a bounded queue in a background thread, rotating the log file by size.
+    """
+    def __init__(self, path_name="", max_bytes=MAX_LOG_BYTES, backup_count=BACKUP_COUNT,
+                 max_records=MAX_QUEUE_RECORDS):
+        """
+        :param path_name: <str> log file name.
+        :param max_bytes: <int> rotate the log before it grows past this size. 0 to never rotate.
+        :param backup_count: <int> the number of rotated logs to keep.
+        :param max_records: <int> the queue size. writing blocks when the writer thread falls this far behind.
+        """
+        self.path_name = path_name or log_path()
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.queue = queue.Queue(maxsize=max_records)
+        self.file_descriptor = None
+        self.thread = threading.Thread(target=self._run, name="lss-log-writer", daemon=True)
+        self.thread.start()
+
+    def write(self, event="", **fields):
+        """
+        queue a structured record for the writer thread.
+        :param event: <str> the record event name.
+        :param fields: <dict> the record fields.
+        :return: <None>
+        """
+        self.queue.put(record_line(event, **fields))
+
+    def flush(self):
+        """
+        wait until every queued record is written.
+        :return: <None>
+        """
+        if self.thread.is_alive():
+            self.queue.join()
+
+    def close(self):
+        """
+        write everything still queued, then stop the writer thread and close the log.
+        :return: <None>
+        """
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+
+    @property
+    def is_closed(self):
+        """
+        returns True if the writer thread has stopped.
+        :return: <bool>
+        """
+        return not self.thread.is_alive()
+
+    def _run(self):
+        """
+        the writer thread: wait for a line, take everything else already waiting, write it all at once.
+        """
+        running = True
+        while running:
+            lines = [self.queue.get()]
+            size = len(lines[0] or "")
+            while size < BATCH_BYTES:
+                try:
+                    lines.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+                size += len(lines[-1] or "")
+            if None in lines:
+                running = False
+                lines = [line for line in lines if line is not None]
+            if lines:
+                try:
+                    self._write_batch("".join(lines).encode("utf-8"))
+                except OSError:
+                    # logging must never break the scans
+                    pass
+            for _ in range(len(lines) + (not running)):
+                self.queue.task_done()
+        if self.file_descriptor is not None:
+            os.close(self.file_descriptor)
+            self.file_descriptor = None
+
+    def _open(self):
+        """
+        open the log for appending, reopening it when another lss run rotated it away.
+        :return: <int> file descriptor.
+        """
+        if self.file_descriptor is not None:
+            try:
+                if os.stat(self.path_name).st_ino == os.fstat(self.file_descriptor).st_ino:
+                    return self.file_descriptor
+            except FileNotFoundError:
+                pass
+            os.close(self.file_descriptor)
+        self.file_descriptor = os.open(self.path_name, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        return self.file_descriptor
+
+    def _rotate(self):
+        """
+        shift the rotated logs up by one: log.2 -> log.3, log.1 -> log.2, log -> log.1.
+        """
+        for index in range(self.backup_count - 1, 0, -1):
+            source = "{}.{}".format(self.path_name, index)
+            if os.path.exists(source):
+                os.replace(source, "{}.{}".format(self.path_name, index + 1))
+        if self.backup_count:
+            os.replace(self.path_name, self.path_name + ".1")
+        else:
+            os.remove(self.path_name)
+
+    def _write_batch(self, data=b""):
+        """
+        append the batch with a single write, rotating the log first when it would grow too large.
+        """
+        file_descriptor = self._open()
+        if self.max_bytes and os.fstat(file_descriptor).st_size and \
+                os.fstat(file_descriptor).st_size + len(data) > self.max_bytes:
+            self._rotate()
+            file_descriptor = self._open()
+        view = memoryview(data)
+        while view:
+            view = view[os.write(file_descriptor, view):]
+
+
+def get_log_writer():
+    """
+    get the running log writer, starting it on first use. it is closed when the interpreter exits.
+    :return: <LogWriter> the log writer.
+    """
+    global __log_writer__
+    if __log_writer__ is None or __log_writer__.is_closed:
+        __log_writer__ = LogWriter(log_path())
+    return __log_writer__
+
+
+def log_record(event="", **fields):
+    """
+    log a structured record through the background writer.
+    :param event: <str> the record event name.
+    :param fields: <dict> the record fields, they must be json serializable.
+    :return: <bool> True for success.
+    """
+    get_log_writer().write(event, **fields)
+    return True
+
+
+def close_log():
+    """
+    write the queued records and stop the log writer.
+    :return: <bool> True for success.
+    """
+    global __log_writer__
+    if __log_writer__ is not None:
+        __log_writer__.close()
+        __log_writer__ = None
+    return True
+
+
+atexit.register(close_log)
@@ -3,40 +3,292 @@ The lss command tool command interface.
 """
 # import standard modules
 import os
+import sys
+import atexit
 import argparse
 
 # import local modules
-import utils
+# only the modules a warm daemon scan needs, the scanning modules are imported once the daemon did not answer
+from . import daemon_utils
+from . import listing_utils
+from . import log_utils
+from . import cancel_utils
+from . import memprofile_utils
 
 # define global variables
 PATH = os.getcwd()
 VERBOSITY = 0
+# the arguments a daemon scan is asked with, any other argument scans in-process
+DAEMON_ARGS = ("path", "timeout")
 
 
-def argument_parse():
+def argument_parser():
     """
-    parse through incoming file names.
-    :return: <tuple> incoming file name.
+    the parser of the lss arguments.
+    :return: <argparse.ArgumentParser> argument parser.
     """
-    parser = argparse.ArgumentParser(description='Process some files.')
+    parser = argparse.ArgumentParser(prog='lss', description='Process some files.')
     parser.add_argument('filename', metavar='FILENAME', type=str, nargs="?",
-                        help='glob file name search.')
+                        help='glob file name search, or - to read the paths from the standard input.')
     parser.add_argument('-p', dest='path', metavar="PATH", action="store",
                         help='Optionally specify a directory or a file path.')
-    parser.add_argument('-v', dest='verbosity', metavar="VERBOSITY", action="store", default=0,
+    parser.add_argument('-v', dest='verbosity', metavar="VERBOSITY", action="store", default=0, type=int,
                         help='Specify verbosity. Options: 0, 1, 2.')
-    return parser.parse_args()
+    parser.add_argument('--from-file', dest='from_file', metavar='LIST', action="store",
+                        help='Read the paths from this list instead of listing directories, - for the standard input.')
+    parser.add_argument('--timeout', dest='timeout', metavar='SECONDS', action="store", type=float,
+                        help='Stop the scan or --summary after this many seconds, and print the partial results. '
+                             'Not allowed with the other modes.')
+    parser.add_argument('--progress', dest='progress', action="store_true",
+                        help='Show the progress of the scan or --summary on stderr.')
+    parser.add_argument('--memprofile', dest='memprofile', metavar='FORMAT', nargs="?", const="text",
+                        choices=memprofile_utils.PROFILE_FORMATS,
+                        help='Report the memory of every scan stage on stderr, as text or json.')
+    parser.add_argument('--log', dest='log', metavar='LOG', action="store",
+                        help='Log every scan to this file. The LSS_LOG environment variable sets it too.')
+    parser.add_argument('--listing', dest='listing', metavar='BACKEND', choices=listing_utils.BACKENDS,
+                        help='The directory listing backend: auto, listdir, scandir or getdents. Defaults to listdir.')
+    parser.add_argument('--grid', dest='grid', action="store_true",
+                        help='Group the files numbered on two axes, like tiles by frames, into grids. '
+                             'Not allowed with the modes working on sequences of frames, like --top or --diff.')
+    parser.add_argument('--convention', dest='convention', metavar='REGEX', action="append", default=[],
+                        help='A naming convention with a (?P<frame>...) group, its files skip the heuristics.')
+    parser.add_argument('--conventions', dest='conventions', metavar='FILE', action="append", default=[],
+                        help='A file of naming conventions, one per line. Defaults to the LSS_CONVENTIONS file.')
+    parser.add_argument('--ext', dest='ext', metavar='EXT', action="append", default=[],
+                        help='Only list the files with these extensions, comma separated: --ext exr,dpx')
+    parser.add_argument('--include', dest='include', metavar='GLOB', action="append", default=[],
+                        help='Only list the files matching this glob.')
+    parser.add_argument('--exclude', dest='exclude', metavar='GLOB', action="append", default=[],
+                        help='Do not list the files matching this glob.')
+    parser.add_argument('--min-length', dest='min_length', metavar='N', action="store", type=int, default=0,
+                        help='Only list the sequences with at least this many files.')
+    parser.add_argument('--count', dest='count', action="store_true",
+                        help='Only print the number of sequences, frames and single files.')
+    parser.add_argument('--summary', dest='summary', action="store_true",
+                        help='Summarize the sequences, frames, single files and gaps of the directory tree.')
+    parser.add_argument('--bytes', dest='bytes', action="store_true",
+                        help='Add up the size of the files in the --summary.')
+    parser.add_argument('--top', dest='top', metavar='N', action="store", type=int,
+                        help='Only list the top N sequences, see --sort.')
+    parser.add_argument('--sort', dest='sort', metavar='KEY', action="store",
+                        help='Sort the sequences by count, size, gaps or name. Defaults to count with --top.')
+    parser.add_argument('--out-of-core', dest='out_of_core', action="store_true",
+                        help='Group the directory one partition at a time, for directories larger than memory. '
+                             'With --from-file, the paths may come in any order.')
+    parser.add_argument('--memory', dest='memory', metavar='MB', action="store", type=int,
+                        help='The memory budget of a partition for --out-of-core, in megabytes. Defaults to 512.')
+    parser.add_argument('--spill-dir', dest='spill_dir', metavar='DIR', action="store",
+                        help='The directory for the temporary spill files of --out-of-core.')
+    parser.add_argument('--serve', dest='serve', action="store_true",
+                        help='Run the lss daemon, serving directory scans from a warm cache. '
+                             'Not allowed with the arguments changing the scan, like --ext or --grid.')
+    parser.add_argument('--no-daemon', dest='no_daemon', action="store_true",
+                        help='Always scan in-process, even when an lss daemon is running.')
+    parser.add_argument('--diff', dest='diff', metavar=('A', 'B'), nargs=2,
+                        help='Compare the sequences of two directories or saved scans.')
+    parser.add_argument('--save-scan', dest='save_scan', metavar='SCAN', action="store",
+                        help='Save the scan of the directory to a file, to --diff against later.')
+    parser.add_argument('--cat', dest='cat', metavar='SPEC', action="store",
+                        help='Concatenate the frames of the sequence in frame order, by its format name or one of its files.')
+    parser.add_argument('-o', dest='output', metavar='OUT', action="store",
+                        help='The output file of --cat, stdout if not given.')
+    parser.add_argument('--sequence', dest='sequence', metavar='SPEC', action="store",
+                        help='The sequence to renumber, repad, copy or link, by its format name or one of its files.')
+    parser.add_argument('--renumber', dest='renumber', metavar='START', action="store", type=int,
+                        help='Renumber the sequence so it starts at this frame.')
+    parser.add_argument('--pad', dest='pad', metavar='PADDING', action="store", type=int,
+                        help='Change the padding of the frame numbers, 0 for no padding.')
+    parser.add_argument('--copy', dest='copy', metavar='DIR', action="store",
+                        help='Copy the sequence into this directory.')
+    parser.add_argument('--link', dest='link', metavar='DIR', action="store",
+                        help='Hard link the sequence into this directory.')
+    parser.add_argument('--dry-run', dest='dry_run', action="store_true",
+                        help='Print the planned operations without running them.')
+    parser.add_argument('--workers', dest='workers', metavar='N', action="store", type=int,
+                        help='The number of worker threads for copies, links and checksums, '
+                             'or processes for --summary and --from-file.')
+    parser.add_argument('--manifest', dest='manifest', action="store_true",
+                        help='Write a checksum manifest for every sequence in the directory, resuming a partial one.')
+    parser.add_argument('--verify', dest='verify', action="store_true",
+                        help='Verify the sequences in the directory against their checksum manifests.')
+    parser.add_argument('--manifest-dir', dest='manifest_dir', metavar='DIR', action="store", default="",
+                        help='Keep the checksum manifests in this directory instead of the hidden .lss-manifests '
+                             'directory of the sequences.')
+    parser.add_argument('--headers', dest='headers', action="store_true",
+                        help='Check that every frame of the image sequences in the directory has the same header.')
+    return parser
+
+
+def argument_parse():
+    """
+    parse through incoming file names.
+    :return: <argparse.Namespace> the parsed arguments.
+    """
+    return argument_parser().parse_args()
 
 
-def main():
+def request_daemon_scan(parser, args, cancel_token=None):
     """
-    the main function call.
-    :return: <bool> True for success. <bool> False for failure.
+    ask a running lss daemon for the plain scan of the directory, before the scanning modules are imported.
+    :param parser: <argparse.ArgumentParser> the argument parser, for the argument defaults.
+    :param args: <argparse.Namespace> the parsed arguments.
+    :param cancel_token: <CancelToken> the time limit of the scan.
+    :return: <list> display lines. <None> to scan in-process.
     """
-    args = argument_parse()
+    for name, value in vars(args).items():
+        if name not in DAEMON_ARGS and value != parser.get_default(name):
+            return None
+    # a logged scan is written to the log by this process
+    if os.environ.get(log_utils.LOG_ENV):
+        return None
+    path_name = args.path or os.getcwd()
+    if not os.path.isdir(path_name):
+        return None
+    return daemon_utils.request_scan(path_name, timeout=cancel_token and cancel_token.remaining())
+
+
+def main(argv=None):
+    """
+    the main function call, also used as the lss console entry point.
+    :param argv: <list> the command line arguments. <None> for sys.argv.
+    :return: <int> 0 for success. <int> 1 for failure.
+    """
+    parser = argument_parser()
+    args = parser.parse_args(argv)
+    cancel_token = None
+    if args.timeout is not None:
+        cancel_token = cancel_utils.CancelToken(args.timeout)
+    lines = request_daemon_scan(parser, args, cancel_token)
+    if lines is not None:
+        daemon_utils.display_lines(lines)
+        return 0
+
+    # the daemon did not answer, or cannot serve these arguments
+    from . import utils
+    from . import diff_utils
+    from . import batch_utils
+    from . import concat_utils
+    from . import manifest_utils
+    from . import header_utils
+    from . import convention_utils
+    from . import grid_utils
+    from . import filter_utils
+    from . import spill_utils
+    from . import rank_utils
+    from . import summary_utils
+    from . import stream_utils
+    from . import progress_utils
+
+    if args.sort and args.sort not in rank_utils.SORT_KEYS:
+        parser.error("argument --sort: invalid choice: '{}' (choose from {})".format(
+            args.sort, ", ".join(rank_utils.SORT_KEYS)))
+    if args.grid:
+        # these modes work on sequences of frames, and never group the grids
+        ungridded = (("--top", args.top is not None), ("--sort", args.sort), ("--diff", args.diff),
+                     ("--save-scan", args.save_scan), ("--cat", args.cat), ("--sequence", args.sequence),
+                     ("--manifest", args.manifest), ("--verify", args.verify), ("--headers", args.headers))
+        for flag, value in ungridded:
+            if value:
+                parser.error("argument --grid: not allowed with argument {}".format(flag))
+    if args.timeout is not None:
+        # only the plain scan and --summary stop on a deadline
+        untimed = (("--from-file", args.from_file or args.filename == stream_utils.STDIN_NAME),
+                   ("--top", args.top is not None), ("--sort", args.sort), ("--out-of-core", args.out_of_core),
+                   ("--serve", args.serve), ("--diff", args.diff), ("--save-scan", args.save_scan),
+                   ("--cat", args.cat), ("--sequence", args.sequence), ("--manifest", args.manifest),
+                   ("--verify", args.verify), ("--headers", args.headers))
+        for flag, value in untimed:
+            if value:
+                parser.error("argument --timeout: not allowed with argument {}".format(flag))
+    if args.serve:
+        # the daemon serves the plain scan to every client, the scans it caches cannot be shaped by its own arguments
+        shaping = (("--listing", args.listing), ("--grid", args.grid), ("--convention", args.convention),
+                   ("--conventions", args.conventions), ("--ext", args.ext), ("--include", args.include),
+                   ("--exclude", args.exclude), ("--min-length", args.min_length))
+        for flag, value in shaping:
+            if value:
+                parser.error("argument --serve: not allowed with argument {}".format(flag))
+    memory_budget = spill_utils.DEFAULT_MEMORY_BUDGET
+    if args.memory is not None:
+        memory_budget = args.memory * 1024 * 1024
     utils.__verbosity__ = args.verbosity
-    utils.do_it(glob_search=args.filename, path_name=args.path)
-    return True
+    if args.memprofile:
+        memprofile_utils.start()
+        atexit.register(memprofile_utils.print_report, args.memprofile)
+    log_file = args.log or os.environ.get(log_utils.LOG_ENV)
+    if log_file:
+        log_utils.configure(log_file)
+        utils.__debugging__ = True
+    if args.convention or args.conventions:
+        convention_utils.set_conventions(args.convention, args.conventions)
+    if args.listing:
+        listing_utils.set_backend(args.listing)
+    if args.grid:
+        grid_utils.set_grids(True)
+    file_filters = args.ext or args.include or args.exclude or args.min_length
+    if file_filters:
+        filter_utils.set_file_filter(args.ext, args.include, args.exclude, args.min_length)
+    if args.serve:
+        daemon_utils.serve(utils.scan_directory_lines)
+        return 0
+    if args.diff:
+        # exits like diff does: 0 when the same, 1 when different
+        if diff_utils.do_diff(*args.diff):
+            return 0
+        return 1
+    if args.cat:
+        concat_utils.do_cat(args.cat, args.output)
+        return 0
+    if args.sequence:
+        mode, destination = "rename", ""
+        if args.copy:
+            mode, destination = "copy", args.copy
+        elif args.link:
+            mode, destination = "link", args.link
+        batch_utils.do_batch(args.sequence, start=args.renumber, padding=args.pad, destination=destination,
+                             mode=mode, dry_run=args.dry_run, workers=args.workers)
+        return 0
+    if args.manifest or args.verify:
+        # a verify exits with 1 when any frame changed
+        if manifest_utils.do_manifest(args.path or os.getcwd(), verify=args.verify,
+                                      manifest_dir=args.manifest_dir, workers=args.workers):
+            return 0
+        return 1
+    if args.headers:
+        # exits with 1 when any frame differs from its sequence
+        if header_utils.do_headers(args.path or os.getcwd(), workers=args.workers):
+            return 0
+        return 1
+    if args.save_scan:
+        diff_utils.do_save_scan(args.path or os.getcwd(), args.save_scan)
+        return 0
+    progress = None
+    if args.progress:
+        progress = progress_utils.Progress(progress_utils.ProgressLine())
+    if args.summary:
+        summary_utils.do_summary(args.path or os.getcwd(), with_bytes=args.bytes, workers=args.workers,
+                                 cancel_token=cancel_token, progress=progress)
+        return 0
+    if args.from_file or args.filename == stream_utils.STDIN_NAME:
+        stream_utils.do_from_file(args.from_file or stream_utils.STDIN_NAME, count_only=args.count,
+                                  out_of_core=args.out_of_core, memory_budget=memory_budget,
+                                  spill_dir=args.spill_dir, workers=args.workers)
+        return 0
+    if args.top is not None or args.sort:
+        rank_utils.do_top(args.path or os.getcwd(), top=args.top, sort_by=args.sort or "count",
+                          out_of_core=args.out_of_core, memory_budget=memory_budget,
+                          spill_dir=args.spill_dir)
+        return 0
+    if args.out_of_core:
+        spill_utils.do_out_of_core(args.path or os.getcwd(), memory_budget, args.spill_dir)
+        return 0
+    # the daemon was already asked, when it can serve the scan at all
+    if utils.do_it(glob_search=args.filename, path_name=args.path, use_daemon=False, count_only=args.count,
+                   cancel_token=cancel_token, progress=progress):
+        return 0
+    return 1
+
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,324 @@
+"""
+manifest_utils.py: resumable checksum manifests of the detected sequences.
+
+Every sequence gets its own manifest file, named after its format name: image-%04d.png.lss-manifest
+The manifests are kept in the hidden .lss-manifests directory of the sequences, a name without an extension
+the listing skips, so they never show up in later scans. A manifest written next to its sequence is still read.
+The manifest starts with a header line, then holds one tab separated line for every frame:
+    # lss manifest 1 sha256 image-%04d.png
+    0001	1048576	1597412345123456789	9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08
+
+The lines are appended while the frames are hashed, so an interrupted run resumes from the partial manifest,
+skipping the frames whose size and modification time did not change.
+A verify run only hashes the frames whose size or modification time changed since the manifest was written.
+The frames are hashed in a pool of worker threads with large buffered reads, hashlib releases the GIL while hashing.
+"""
+# import standard modules
+import os
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# import local modules
+from . import utils
+from . import path_utils
+from . import diff_utils
+
+# define local variables
+MANIFEST_VERSION = 1
+MANIFEST_EXTENSION = ".lss-manifest"
+MANIFEST_DIR = ".lss-manifests"
+DEFAULT_ALGORITHM = "sha256"
+HASH_BUFFER_SIZE = 8 * 1024 * 1024
+# flush the appended manifest lines after this many frames, a resumed run loses at most these
+FLUSH_INTERVAL = 64
+VERIFY_STATES = ("changed", "missing", "new")
+
+
+def manifest_path(directory_name, sequence, manifest_dir=""):
+    """
+    get the manifest file name of the sequence.
+    :param directory_name: <str> the directory of the sequence.
+    :param sequence: <FileSequence> the sequence.
+    :param manifest_dir: <str> the directory of the manifests, defaults to the MANIFEST_DIR of the sequence directory.
+    :return: <str> manifest file name.
+    """
+    manifest_dir = manifest_dir or path_utils.join_file_path(directory_name, MANIFEST_DIR)
+    return path_utils.join_file_path(manifest_dir, sequence.format_name() + MANIFEST_EXTENSION)
+
+
+def existing_manifest_path(directory_name, sequence, manifest_dir=""):
+    """
+    get the manifest file name of the sequence to read, falling back on a manifest written next to the sequence.
+    :param directory_name: <str> the directory of the sequence.
+    :param sequence: <FileSequence> the sequence.
+    :param manifest_dir: <str> the directory of the manifests, defaults to the MANIFEST_DIR of the sequence directory.
+    :return: <str> manifest file name.
+    """
+    file_name = manifest_path(directory_name, sequence, manifest_dir)
+    if manifest_dir or path_utils.is_file(file_name):
+        return file_name
+    legacy_name = path_utils.join_file_path(directory_name, sequence.format_name() + MANIFEST_EXTENSION)
+    return legacy_name if path_utils.is_file(legacy_name) else file_name
+
+
+def hash_file(file_name="", algorithm=DEFAULT_ALGORITHM):
+    """
+    hash the file contents with large buffered reads.
+    :param file_name: <str> the file to hash.
+    :param algorithm: <str> hashlib algorithm name.
+    :return: <str> hex digest.
+    """
+    digest = hashlib.new(algorithm)
+    buffer = bytearray(HASH_BUFFER_SIZE)
+    view = memoryview(buffer)
+    with open(file_name, 'rb', buffering=0) as f_obj:
+        while True:
+            size = f_obj.readinto(buffer)
+            if not size:
+                break
+            digest.update(view[:size])
+    return digest.hexdigest()
+
+
+def _hash_frame(file_name, number_string, file_stat, algorithm):
+    """
+    hash one frame, in a worker thread.
+    :return: <tuple> number string, size, modification time, hex digest.
+    """
+    return number_string, file_stat.st_size, file_stat.st_mtime_ns, hash_file(file_name, algorithm)
+
+
+def hash_frames(frames, algorithm=DEFAULT_ALGORITHM, workers=None):
+    """
+    hash the frames in a pool of worker threads, yielding the results as they finish.
+    only a few frames per worker are queued at a time, so the pending work stays small.
+    :param frames: <iterable> (file name, number string, stat result) of the frames to hash.
+    :param algorithm: <str> hashlib algorithm name.
+    :param workers: <int> the number of worker threads. defaults to the number of cpus.
+    :return: <generator> (number string, size, modification time, hex digest) tuples.
+    """
+    workers = workers or os.cpu_count()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for file_name, number_string, file_stat in frames:
+            pending.add(executor.submit(_hash_frame, file_name, number_string, file_stat, algorithm))
+            if len(pending) >= workers * 4:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        for future in pending:
+            yield future.result()
+
+
+def read_manifest(file_name=""):
+    """
+    read a manifest, complete or partial. lines cut short by an interruption are skipped.
+    :param file_name: <str> manifest file name.
+    :return: <str> algorithm, <dict> (size, modification time, hex digest) by number string.
+        <None>, <dict> empty if there is no manifest.
+    """
+    entries = {}
+    if not path_utils.is_file(file_name):
+        return None, entries
+
+    with open(file_name) as f_obj:
+        header = f_obj.readline().split()
+        if header[:3] != ["#", "lss", "manifest"] or len(header) < 5 or header[3] != str(MANIFEST_VERSION):
+            raise ValueError("[ReadManifest] :: Not an lss manifest. path_name: {}".format(file_name))
+        algorithm = header[4]
+        for line in f_obj:
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) != 4 or not line.endswith("\n"):
+                continue
+            number_string, size, mtime_ns, digest = fields
+            entries[number_string] = (int(size), int(mtime_ns), digest)
+    return algorithm, entries
+
+
+def _manifest_line(number_string, size, mtime_ns, digest):
+    """
+    format one manifest line.
+    :return: <str> manifest line.
+    """
+    return "{}\t{}\t{}\t{}\n".format(number_string, size, mtime_ns, digest)
+
+
+def _sequence_frames(directory_name, sequence):
+    """
+    the frames of the sequence with their current stat results.
+    :return: <generator> (file name, number string, stat result) tuples.
+    """
+    for index in range(len(sequence)):
+        file_name = path_utils.join_file_path(directory_name, sequence.file_name(index))
+        yield file_name, sequence.number_string(index), os.stat(file_name)
+
+
+def _number_ranges(number_strings=()):
+    """
+    collapse number strings into ranges for display.
+    :param number_strings: <list> number strings.
+    :return: <str> ranges.
+    """
+    frames_by_width = {}
+    for number_string in number_strings:
+        frames_by_width.setdefault(len(number_string), []).append(int(number_string))
+    ranges = []
+    for width in sorted(frames_by_width):
+        for start, end in diff_utils.frame_intervals(sorted(frames_by_width[width])):
+            if start == end:
+                ranges.append(str(start).zfill(width))
+            else:
+                ranges.append('{}-{}'.format(str(start).zfill(width), str(end).zfill(width)))
+    return ' '.join(ranges)
+
+
+def sequence_number_strings(sequence):
+    """
+    the number strings of the sequence, in frame order.
+    :param sequence: <FileSequence> the sequence.
+    :return: <generator> number strings.
+    """
+    for index in range(len(sequence)):
+        yield sequence.number_string(index)
+
+
+def write_manifest(directory_name, sequence, manifest_dir="", algorithm=DEFAULT_ALGORITHM, workers=None):
+    """
+    write the manifest of the sequence, resuming from a partial or older manifest.
+    frames whose size and modification time match the manifest are not hashed again.
+    :param directory_name: <str> the directory of the sequence.
+    :param sequence: <FileSequence> the sequence.
+    :param manifest_dir: <str> the directory of the manifests, defaults to the MANIFEST_DIR of the sequence directory.
+    :param algorithm: <str> hashlib algorithm name.
+    :param workers: <int> the number of worker threads.
+    :return: <dict> the number of frames hashed and kept.
+    """
+    file_name = manifest_path(directory_name, sequence, manifest_dir)
+    os.makedirs(os.path.dirname(file_name), exist_ok=True)
+    read_name = existing_manifest_path(directory_name, sequence, manifest_dir)
+    manifest_algorithm, entries = read_manifest(read_name)
+    if manifest_algorithm != algorithm:
+        entries = {}
+    if read_name != file_name:
+        # a manifest next to the sequence is moved into the manifest directory on its next write
+        manifest_algorithm = None
+
+    hashes = {}
+    to_hash = []
+    for frame_name, number_string, file_stat in _sequence_frames(directory_name, sequence):
+        entry = entries.get(number_string)
+        if entry and entry[:2] == (file_stat.st_size, file_stat.st_mtime_ns):
+            hashes[number_string] = entry
+        else:
+            to_hash.append((frame_name, number_string, file_stat))
+
+    # append to the partial manifest, so this run can be resumed as well
+    mode = 'a' if manifest_algorithm == algorithm else 'w'
+    with open(file_name, mode) as f_obj:
+        if mode == 'w':
+            f_obj.write("# lss manifest {} {} {}\n".format(MANIFEST_VERSION, algorithm, sequence.format_name()))
+        for count, result in enumerate(hash_frames(to_hash, algorithm, workers), 1):
+            hashes[result[0]] = result[1:]
+            f_obj.write(_manifest_line(*result))
+            if not count % FLUSH_INTERVAL:
+                f_obj.flush()
+
+    # rewrite the complete manifest in frame order, without the stale lines
+    temporary_name = file_name + ".tmp"
+    with open(temporary_name, 'w') as f_obj:
+        f_obj.write("# lss manifest {} {} {}\n".format(MANIFEST_VERSION, algorithm, sequence.format_name()))
+        for number_string in sequence_number_strings(sequence):
+            f_obj.write(_manifest_line(number_string, *hashes[number_string]))
+    os.replace(temporary_name, file_name)
+    if read_name != file_name:
+        os.remove(read_name)
+    return {"hashed": len(to_hash), "kept": len(sequence) - len(to_hash)}
+
+
+def verify_manifest(directory_name, sequence, manifest_dir="", workers=None):
+    """
+    verify the sequence against its manifest.
+    only the frames whose size or modification time changed are hashed again.
+    :param directory_name: <str> the directory of the sequence.
+    :param sequence: <FileSequence> the sequence.
+    :param manifest_dir: <str> the directory of the manifests, defaults to the MANIFEST_DIR of the sequence directory.
+    :param workers: <int> the number of worker threads.
+    :return: <dict> the number strings of the changed, missing and new frames, and the number of frames checked.
+    """
+    file_name = existing_manifest_path(directory_name, sequence, manifest_dir)
+    algorithm, entries = read_manifest(file_name)
+    if algorithm is None:
+        raise IOError("[VerifyManifest] :: There is no manifest. path_name: {}".format(file_name))
+
+    result = {"changed": [], "missing": [], "new": [], "checked": 0, "hashed": 0}
+    to_hash = []
+    found = set()
+    for frame_name, number_string, file_stat in _sequence_frames(directory_name, sequence):
+        found.add(number_string)
+        entry = entries.get(number_string)
+        if not entry:
+            result["new"].append(number_string)
+        elif entry[:2] != (file_stat.st_size, file_stat.st_mtime_ns):
+            to_hash.append((frame_name, number_string, file_stat))
+        else:
+            result["checked"] += 1
+
+    for number_string, size, mtime_ns, digest in hash_frames(to_hash, algorithm, workers):
+        result["hashed"] += 1
+        result["checked"] += 1
+        if entries[number_string][2] != digest:
+            result["changed"].append(number_string)
+
+    result["missing"] = [number_string for number_string in entries if number_string not in found]
+    return result
+
+
+def manifest_sequences(path_name=""):
+    """
+    the detected sequences of the directory, without the single files and the manifests themselves.
+    :param path_name: <str> the directory, or a file inside the directory.
+    :return: <str> directory name, <list> sequences.
+    """
+    directory_name = path_utils.get_directory_from_file_name(path_name)
+    if not directory_name:
+        raise IOError("[ManifestSequences] :: Incorrect path given. path_name: {}".format(path_name))
+    # a manifest is kept for every sequence of frames, the files numbered on two axes are never grouped into grids
+    pf = utils.PatternFinder(directory_name=directory_name, grids=False)
+    return directory_name, [sequence for sequence in pf.FILE_SEQUENCES.values()
+                            if sequence.position is not None and not sequence.tail.endswith(MANIFEST_EXTENSION)]
+
+
+def do_manifest(path_name="", verify=False, manifest_dir="", workers=None):
+    """
+    write or verify the manifests of every sequence in the directory.
+    :param path_name: <str> the directory, or a file inside the directory.
+    :param verify: <bool> verify against the manifests instead of writing them.
+    :param manifest_dir: <str> the directory of the manifests, defaults to the MANIFEST_DIR of the directory.
+    :param workers: <int> the number of worker threads.
+    :return: <bool> True for success. <bool> False when a verify found differences.
+    """
+    directory_name, sequences = manifest_sequences(path_name)
+    success = True
+    lines = []
+    for sequence in sequences:
+        if not verify:
+            counts = write_manifest(directory_name, sequence, manifest_dir, workers=workers)
+            lines.append('{} {}\thashed {}, kept {}'.format(
+                len(sequence), sequence.format_name(), counts["hashed"], counts["kept"]))
+            continue
+
+        parts = ['{} {}'.format(len(sequence), sequence.format_name())]
+        if not path_utils.is_file(existing_manifest_path(directory_name, sequence, manifest_dir)):
+            success = False
+            lines.append('\t'.join(parts + ['no manifest']))
+            continue
+
+        result = verify_manifest(directory_name, sequence, manifest_dir, workers=workers)
+        parts.append('checked {}'.format(result["checked"]))
+        for state in VERIFY_STATES:
+            if result[state]:
+                success = False
+                parts.append('{} {}: {}'.format(state, len(result[state]), _number_ranges(result[state])))
+        lines.append('\t'.join(parts))
+    utils.display_lines(lines)
+    return success
@@ -0,0 +1,182 @@
+"""
+memprofile_utils.py: the memory accounting of the PatternFinder stages, with tracemalloc.
+
+Every stage of a PatternFinder, the listing, the grouping and the metadata, records the memory it kept (net),
+the most it took up while it ran (peak), and the lines of code that allocated the most:
+    lss -p /renders --memprofile
+    lss -p /renders --memprofile json
+The report goes to stderr once lss is done, next to the normal output.
+Nothing is traced unless the profiling is started, the stages cost a single check then.
+"""
+# import standard modules
+import os
+import sys
+import json
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+# define local variables
+__profiler__ = None
+PROFILE_FORMATS = ("text", "json")
+TOP_SITES = 5
+
+
+class MemoryProfiler:
+    """
+    the net and peak memory of every stage, summed over the PatternFinders of the run.
+    """
+    def __init__(self, top=TOP_SITES):
+        """
+        :param top: <int> the number of allocation sites to keep for every stage.
+        """
+        self.top = top
+        self.stages = {}
+        self._active = False
+        # the snapshots leave out the allocations of the profiling itself
+        self._filters = [tracemalloc.Filter(False, tracemalloc.__file__),
+                         tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                         tracemalloc.Filter(False, __file__)]
+
+    @contextmanager
+    def stage(self, name=""):
+        """
+        record the memory of the stage. a stage inside another stage is recorded as part of the outer one.
+        :param name: <str> the stage name.
+        :return: <None>
+        """
+        if self._active or not tracemalloc.is_tracing():
+            yield
+            return
+
+        self._active = True
+        start = tracemalloc.take_snapshot().filter_traces(self._filters)
+        tracemalloc.reset_peak()
+        start_size = tracemalloc.get_traced_memory()[0]
+        try:
+            yield
+        finally:
+            size, peak = tracemalloc.get_traced_memory()
+            end = tracemalloc.take_snapshot().filter_traces(self._filters)
+            self.record(name, size - start_size, peak - start_size, end.compare_to(start, "lineno"))
+            self._active = False
+
+    def record(self, name, net=0, peak=0, statistics=()):
+        """
+        add the memory of one run of the stage.
+        :param name: <str> the stage name.
+        :param net: <int> the bytes kept by the stage.
+        :param peak: <int> the most bytes taken up while the stage ran.
+        :param statistics: <list> tracemalloc.StatisticDiff by line.
+        :return: <None>
+        """
+        stage = self.stages.setdefault(name, {"calls": 0, "net": 0, "peak": 0, "sites": {}})
+        stage["calls"] += 1
+        stage["net"] += net
+        stage["peak"] = max(stage["peak"], peak)
+        for statistic in statistics:
+            if not statistic.size_diff:
+                continue
+            frame = statistic.traceback[0]
+            site = "{}:{}".format(short_file_name(frame.filename), frame.lineno)
+            size, count = stage["sites"].get(site, (0, 0))
+            stage["sites"][site] = (size + statistic.size_diff, count + statistic.count_diff)
+
+    def report(self):
+        """
+        the stages with their top allocation sites, in the order they ran first.
+        :return: <dict> report by stage name.
+        """
+        report = {}
+        for name, stage in self.stages.items():
+            sites = sorted(stage["sites"].items(), key=lambda item: abs(item[1][0]), reverse=True)[:self.top]
+            report[name] = {"calls": stage["calls"], "net": stage["net"], "peak": stage["peak"],
+                            "sites": [{"site": site, "size": size, "blocks": count} for site, (size, count) in sites]}
+        return report
+
+
+def short_file_name(file_name=""):
+    """
+    shorten the file names of the lss sources to their package path.
+    :param file_name: <str> the file name of an allocation site.
+    :return: <str> file name.
+    """
+    package_path = os.path.dirname(os.path.abspath(__file__))
+    if file_name.startswith(package_path):
+        return os.path.basename(package_path) + file_name[len(package_path):]
+    return file_name
+
+
+def size_text(size=0, signed=False):
+    """
+    format the bytes for display.
+    :param size: <int> bytes.
+    :param signed: <bool> show the sign of the size.
+    :return: <str> size text.
+    """
+    sign = "-" if size < 0 else ("+" if signed else "")
+    if abs(size) < 1024:
+        return "{}{} B".format(sign, abs(size))
+    size = abs(size) / 1024.0
+    for unit in ("KiB", "MiB"):
+        if size < 1024:
+            return "{}{:.1f} {}".format(sign, size, unit)
+        size /= 1024.0
+    return "{}{:.1f} GiB".format(sign, size)
+
+
+def report_lines(report):
+    """
+    the display lines of the report.
+    :param report: <dict> report by stage name.
+    :return: <list> display lines.
+    """
+    lines = ["{:<10} {:>12} {:>12} {:>6}".format("stage", "net", "peak", "calls")]
+    for name, stage in report.items():
+        lines.append("{:<10} {:>12} {:>12} {:>6}".format(
+            name, size_text(stage["net"], signed=True), size_text(stage["peak"]), stage["calls"]))
+        for site in stage["sites"]:
+            lines.append("    {} {} in {} blocks".format(
+                site["site"], size_text(site["size"], signed=True), site["blocks"]))
+    return lines
+
+
+def start(top=TOP_SITES):
+    """
+    start tracing the memory of the PatternFinder stages.
+    :param top: <int> the number of allocation sites to keep for every stage.
+    :return: <MemoryProfiler> the profiler.
+    """
+    global __profiler__
+    __profiler__ = MemoryProfiler(top)
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    return __profiler__
+
+
+def stage(name=""):
+    """
+    the memory accounting of a stage, nothing when the profiling is not started.
+    :param name: <str> the stage name.
+    :return: <contextmanager>
+    """
+    if __profiler__ is None:
+        return nullcontext()
+    return __profiler__.stage(name)
+
+
+def print_report(output_format="text", stream=None):
+    """
+    print the report of the profiling on the standard error.
+    :param output_format: <str> text or json.
+    :param stream: <file> the stream to print on. defaults to the standard error.
+    :return: <bool> True for success.
+    """
+    if __profiler__ is None:
+        return False
+    stream = stream or sys.stderr
+    report = __profiler__.report()
+    if output_format == "json":
+        print(json.dumps({"memory": report}), file=stream)
+    else:
+        print("\n".join(report_lines(report)), file=stream)
+    return True
@@ -7,6 +7,9 @@ import os
 import posixpath
 import glob
 
+# import local modules
+from . import listing_utils
+
 
 def find_files(file_path="", file_name=""):
     """
@@ -52,7 +55,7 @@ def get_this_directory_path():
     get the path of the current file directory.
     :return: <str> directory path name.
     """
-    return posixpath.dirname(posixpath.basename(__file__).replace('\\', '/'))
+    return posixpath.dirname(os.path.abspath(__file__).replace('\\', '/'))
 
 
 def extract_base_name_from_path(file_name=""):
@@ -123,22 +126,27 @@ def has_extension(file_name=""):
     return bool(os.path.splitext(file_name)[1])
 
 
-def list_files_from_dir(dir_name="", sort_key=None):
+def list_files_from_dir(dir_name="", file_filter=None, progress=None):
     """
     lists all the files in a given directory name.
     Does not list file directories.
+    The files are returned in directory order, sorting is done later on the precomputed sequence keys.
+    The directory is read with the configured listing backend, see listing_utils.
     :param dir_name: <str> the file path to check.
-    :param sort_key: <str> sort by this string.
+    :param file_filter: <function> keep only the file names passing this filter, see filter_utils.FileFilter.
+        defaults to the files with an extension.
+    :param progress: <Progress> report the files listed after every batch of the backend, see progress_utils.
     :return: <tuple> list of files inside the directory.
     """
-    return tuple(
-        sorted(
-            filter(
-                lambda x: has_extension(x), os.listdir(dir_name)
-            ),
-            key=sort_key
-        )
-    )
+    if progress is None:
+        return tuple(listing_utils.iter_names(dir_name, file_filter or has_extension))
+    file_filter = file_filter or has_extension
+    files = []
+    for batch in listing_utils.iter_batches(dir_name):
+        length_of_files = len(files)
+        files.extend([name for name, d_type in batch if file_filter(name)])
+        progress.update(listed=len(files) - length_of_files)
+    return tuple(files)
 
 
 def list_files_from_filepath(path_name=""):
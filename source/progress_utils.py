@@ -0,0 +1,145 @@
+"""
+progress_utils.py: progress reports of long scans, the entries listed and grouped, the sequences found and the speed.
+
+A scan given a Progress updates its counters as it goes, and the Progress calls back with a snapshot of them,
+at most once every interval:
+    progress = Progress(lambda snapshot: print(snapshot["grouped"], snapshot["files_per_second"]))
+    pf = utils.PatternFinder(directory_name="/mnt/archive", progress=progress)
+    lss -p /mnt/archive --progress
+    lss --summary -p /mnt/archive --progress
+The scans only touch the counters every CHECK_INTERVAL files, see cancel_utils, and the callback is rate limited,
+so the reports cost nothing noticeable in the grouping loop.
+"""
+# import standard modules
+import sys
+import time
+
+# define local variables
+REPORT_INTERVAL = 0.5
+
+
+class Progress:
+    """
+    the progress counters of a scan, reported to a callback at most once every interval.
+    """
+    def __init__(self, callback=None, interval=REPORT_INTERVAL):
+        """
+        :param callback: <function> called with the snapshot dictionary of the counters.
+        :param interval: <float> the seconds in between two reports.
+        """
+        self.callback = callback
+        self.interval = interval
+        self.listed = 0
+        self.grouped = 0
+        self.sequences = 0
+        self.directories = 0
+        self.queued = 0
+        # the number of entries to group, once known
+        self.total = None
+        self.started = time.monotonic()
+        self._last_time = self.started
+        self._last_grouped = 0
+
+    def update(self, listed=0, grouped=0, sequences=0, directories=0, queued=None):
+        """
+        add to the counters, and report them if the interval passed.
+        :param listed: <int> entries listed.
+        :param grouped: <int> entries grouped.
+        :param sequences: <int> sequences finalized.
+        :param directories: <int> directories scanned.
+        :param queued: <int> the directories waiting to be scanned. <None> to keep the number.
+        :return: <None>
+        """
+        self.listed += listed
+        self.grouped += grouped
+        self.sequences += sequences
+        self.directories += directories
+        if queued is not None:
+            self.queued = queued
+        self.report()
+
+    def snapshot(self, now=None, done=False):
+        """
+        the counters, with the current speed: the files grouped per second since the last report.
+        :param now: <float> the monotonic time of the snapshot.
+        :param done: <bool> this is the last snapshot of the scan.
+        :return: <dict> counters.
+        """
+        now = time.monotonic() if now is None else now
+        elapsed = now - self._last_time
+        files_per_second = 0.0
+        if elapsed > 0:
+            files_per_second = (self.grouped - self._last_grouped) / elapsed
+        if done:
+            files_per_second = self.grouped / max(now - self.started, 1e-9)
+        percent = None
+        if self.total:
+            percent = min(100.0, 100.0 * self.grouped / self.total)
+        return {"listed": self.listed, "grouped": self.grouped, "sequences": self.sequences,
+                "directories": self.directories, "queued": self.queued, "total": self.total, "percent": percent,
+                "files_per_second": files_per_second, "elapsed": now - self.started, "done": done}
+
+    def report(self, force=False):
+        """
+        call back with the counters, if the interval passed since the last report.
+        :param force: <bool> report even if the interval did not pass.
+        :return: <bool> True if reported. <bool> False if not.
+        """
+        now = time.monotonic()
+        if self.callback is None or not force and now - self._last_time < self.interval:
+            return False
+        self.callback(self.snapshot(now))
+        self._last_time = now
+        self._last_grouped = self.grouped
+        return True
+
+    def finish(self):
+        """
+        call back with the final counters of the scan.
+        :return: <None>
+        """
+        if self.callback is not None:
+            self.callback(self.snapshot(done=True))
+
+
+class ProgressLine:
+    """
+    render the progress snapshots on one line of a terminal, rewritten in place.
+    """
+    def __init__(self, stream=None):
+        """
+        :param stream: <file> the stream to render on. defaults to the standard error.
+        """
+        self.stream = stream or sys.stderr
+        self.width = 0
+
+    def __call__(self, snapshot):
+        """
+        render the snapshot.
+        :param snapshot: <dict> the counters of Progress.snapshot.
+        :return: <None>
+        """
+        line = progress_text(snapshot)
+        # pad over the rest of the previous line
+        self.stream.write("\r" + line.ljust(self.width))
+        self.width = len(line)
+        if snapshot["done"]:
+            self.stream.write("\n")
+        self.stream.flush()
+
+
+def progress_text(snapshot):
+    """
+    format the progress snapshot for display.
+    :param snapshot: <dict> the counters of Progress.snapshot.
+    :return: <str> progress text.
+    """
+    parts = []
+    if snapshot["directories"] or snapshot["queued"]:
+        parts.append('{} directories, {} queued'.format(snapshot["directories"], snapshot["queued"]))
+    grouped = '{} grouped'.format(snapshot["grouped"])
+    if snapshot["percent"] is not None:
+        grouped += ' ({:.0f}%)'.format(snapshot["percent"])
+    parts.extend(['{} listed'.format(snapshot["listed"]), grouped, '{} sequences'.format(snapshot["sequences"]),
+                  '{:.0f} files/s'.format(snapshot["files_per_second"]), '{:.1f}s'.format(snapshot["elapsed"])])
+    return ', '.join(parts)
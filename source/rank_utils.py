@@ -0,0 +1,135 @@
+"""
+rank_utils.py: list only the top sequences of a directory, by frame count, size, gaps or name.
+
+The sequences are ranked while they stream out of the scan, keeping only the best ones in a bounded heap,
+so the full results are never sorted or kept around just to show a handful of lines.
+The directory is grouped one batch of whole skeletons at a time, and every batch is ranked before the next one
+is grouped, so only the top sequences and the sequences of one batch are ever held.
+
+Example:
+    lss -p /renders --top 20 --sort size
+    lss -p /archive --out-of-core --top 50 --sort gaps
+"""
+# import standard modules
+import heapq
+
+# import local modules
+from . import utils
+from . import path_utils
+from . import diff_utils
+from . import spill_utils
+from . import filter_utils
+from . import string_utils
+from . import sequence_utils
+
+# define local variables
+SORT_KEYS = ("count", "size", "gaps", "name")
+BATCH_SIZE = 4096
+
+
+def missing_frames(sequence):
+    """
+    count the frames missing in between the ranges of the sequence.
+    :param sequence: <FileSequence> the sequence.
+    :return: <int> the number of missing frames.
+    """
+    return sum([int(end) - int(start) + 1 for start, end in sequence.gaps()])
+
+
+def sequence_size(directory_name, sequence):
+    """
+    the total size of the files of the sequence.
+    :param directory_name: <str> the directory of the sequence.
+    :param sequence: <FileSequence> the sequence.
+    :return: <int> size in bytes.
+    """
+    return sum([diff_utils.file_size(directory_name, file_name) for file_name in sequence.file_names()])
+
+
+def sequence_line(sequence):
+    """
+    the display line of the sequence, as lss prints it.
+    :param sequence: <FileSequence> the sequence. <GridSequence> for a grid.
+    :return: <str> display line.
+    """
+    if isinstance(sequence, sequence_utils.GridSequence):
+        return utils.metadata_line({"count": len(sequence), "format_name": sequence.format_name(),
+                                    "axes": sequence.ranges(), "missing": sequence.missing()})
+    return utils.metadata_line(
+        {"count": len(sequence), "format_name": sequence.format_name(), "increment_tally": sequence.ranges()})
+
+
+def rank_sequences(sequences, directory_name="", top=None, sort_by="count"):
+    """
+    rank the sequences, keeping only the top ones in a bounded heap.
+    :param sequences: <iterable> the sequences, consumed once.
+    :param directory_name: <str> the directory of the sequences, used for the sizes.
+    :param top: <int> the number of sequences to keep. <None> to keep all of them.
+    :param sort_by: <str> count, size and gaps list the largest first, name lists in alphabetical order.
+    :return: <list> the top sequences, in their rank order.
+    """
+    if sort_by not in SORT_KEYS:
+        raise ValueError("[RankSequences] :: Unknown sort key: {}".format(sort_by))
+
+    if sort_by == "name":
+        if top is None:
+            return sorted(sequences, key=lambda sequence: sequence.format_name())
+        return heapq.nsmallest(top, sequences, key=lambda sequence: sequence.format_name())
+
+    if sort_by == "count":
+        score = len
+    elif sort_by == "gaps":
+        score = missing_frames
+    else:
+        def score(sequence):
+            return sequence_size(directory_name, sequence)
+
+    if top is None:
+        return sorted(sequences, key=score, reverse=True)
+    return heapq.nlargest(top, sequences, key=score)
+
+
+def iter_sequences(directory_name="", out_of_core=False, memory_budget=spill_utils.DEFAULT_MEMORY_BUDGET,
+                   spill_dir=None, batch_size=BATCH_SIZE):
+    """
+    stream the sequences and single files of the directory, grouped one batch of skeletons at a time.
+    :param directory_name: <str> the directory.
+    :param out_of_core: <bool> group the directory one partition at a time, see spill_utils.
+    :param memory_budget: <int> the memory a partition may take up while it is grouped, in bytes.
+    :param spill_dir: <str> the directory for the temporary spill files.
+    :param batch_size: <int> the number of files a batch is filled up to, see string_utils.skeleton_batches.
+    :return: <generator> FileSequence objects.
+    """
+    # the ranks are kept to frame sequences, every file numbered on two axes is ranked in its sequence of frames
+    if out_of_core:
+        for pf in spill_utils.scan_out_of_core(
+                spill_utils.iter_directory(directory_name), memory_budget, spill_dir, grids=False):
+            for sequence in pf.FILE_SEQUENCES.values():
+                yield sequence
+        return
+
+    files = path_utils.list_files_from_dir(directory_name, filter_utils.get_file_filter())
+    for batch in string_utils.skeleton_batches(files, batch_size):
+        pf = utils.PatternFinder(files=batch, grids=False)
+        for sequence in pf.FILE_SEQUENCES.values():
+            yield sequence
+
+
+def do_top(path_name="", top=None, sort_by="count", out_of_core=False,
+           memory_budget=spill_utils.DEFAULT_MEMORY_BUDGET, spill_dir=None):
+    """
+    print the top sequences of the directory.
+    :param path_name: <str> the directory, or a file inside the directory.
+    :param top: <int> the number of sequences to print. <None> to print all of them, sorted.
+    :param sort_by: <str> count, size, gaps or name.
+    :param out_of_core: <bool> group the directory one partition at a time.
+    :param memory_budget: <int> the memory a partition may take up while it is grouped, in bytes.
+    :param spill_dir: <str> the directory for the temporary spill files.
+    :return: <bool> True for success.
+    """
+    directory_name = path_utils.get_directory_from_file_name(path_name)
+    if not directory_name:
+        raise IOError("[DoTop] :: Incorrect path given. path_name: {}".format(path_name))
+    sequences = iter_sequences(directory_name, out_of_core, memory_budget, spill_dir)
+    ranked = rank_sequences(sequences, directory_name, top, sort_by)
+    return utils.display_lines([sequence_line(sequence) for sequence in ranked])
@@ -0,0 +1,329 @@
+"""
+sequence_utils.py: compact storage of the files belonging to one sequence.
+
+The file names of a sequence are never kept around as strings.
+Only the interned head and tail of the sequence name are stored, together with the frame numbers and their
+padding widths in flat arrays. The file names are rebuilt on demand.
+A GridSequence stores the files numbered on two axes, like tiles by frames, the same way with an array per axis.
+
+A sequence is keyed by its file name without the frame number, and a single file by its file name.
+Two sequences can strip to the same key name, a1b.png and ab1.png both to ab.png, and so can a sequence and a file:
+the later one is keyed by its name parts and number position joined by a NUL character then, no file name holds one.
+"""
+# import standard modules
+from array import array
+from sys import intern
+
+# import local modules
+from . import string_utils
+from . import template_utils
+
+# define local variables
+FRAME_TYPECODE = 'q'
+KEY_SEPARATOR = "\0"
+
+
+def number_ranges(numbers=(), padding=(), increment=1):
+    """
+    find the ranges of the incrementing numbers, sorted by their padding width, then by their number.
+    :param numbers: <array> the numbers.
+    :param padding: <array> the padding width of every number.
+    :param increment: <int> the increment between two following numbers.
+    :return: <list> (start number string, end number string) tuples.
+    """
+    length_of_numbers = len(numbers)
+    ranges = []
+    start_index = 0
+    for index in range(length_of_numbers):
+        if index == length_of_numbers - 1 or numbers[index] + increment != numbers[index + 1]:
+            ranges.append((str(numbers[start_index]).zfill(padding[start_index]),
+                           str(numbers[index]).zfill(padding[index])))
+            start_index = index + 1
+    return ranges
+
+
+class FileSequence:
+    """
+    the files of one sequence group, stored as the interned name parts and arrays of frame numbers.
+    a single file without a sequence keeps its whole name in the head and has no frames.
+    """
+    __slots__ = ('head', 'tail', 'position', 'frames', 'padding')
+
+    def __init__(self, head="", tail="", position=None):
+        """
+        :param head: <str> the part of the file name before the incrementing number.
+        :param tail: <str> the part of the file name after the incrementing number.
+        :param position: <int> the index of the incrementing number within the numbers of the file name.
+            <None> for a single file.
+        """
+        self.head = intern(head)
+        self.tail = intern(tail)
+        self.position = position
+        self.frames = array(FRAME_TYPECODE)
+        self.padding = array('B')
+
+    def append(self, number_string=""):
+        """
+        append the incrementing number of a file to this sequence.
+        :param number_string: <str> the incrementing number as found in the file name.
+        :return: <None>
+        """
+        self.frames.append(int(number_string))
+        self.padding.append(len(number_string))
+
+    def sort(self):
+        """
+        sort the frames by their padding width, then by their number.
+        :return: <None>
+        """
+        order = sorted(zip(self.padding, self.frames))
+        self.padding = array('B', [p for p, f in order])
+        self.frames = array(FRAME_TYPECODE, [f for p, f in order])
+
+    def number_string(self, index=0):
+        """
+        rebuild the incrementing number string of the file at the index given.
+        :param index: <int> the index of the file in this sequence.
+        :return: <str> the number string.
+        """
+        return str(self.frames[index]).zfill(self.padding[index])
+
+    def file_name(self, index=0):
+        """
+        rebuild the file name at the index given.
+        :param index: <int> the index of the file in this sequence.
+        :return: <str> file name.
+        """
+        if self.position is None:
+            return self.head
+        return self.head + self.number_string(index) + self.tail
+
+    def file_names(self):
+        """
+        rebuild all the file names of this sequence, in frame order.
+        :return: <generator> file names.
+        """
+        for index in range(len(self)):
+            yield self.file_name(index)
+
+    def format_name(self):
+        """
+        the C style printf format name of this sequence, taken from the last file.
+        :return: <str> format name.
+        """
+        if len(self.frames) < 2:
+            return self.file_name(-1)
+        return self.head + string_utils.sequence_string(self.number_string(-1)) + self.tail
+
+    def template(self, directory_name=""):
+        """
+        the compiled frame path template of this sequence, to generate and parse the paths of its frames.
+        :param directory_name: <str> the directory of the sequence, the paths are plain file names without it.
+        :return: <FrameTemplate> frame path template.
+        """
+        if self.position is None:
+            raise ValueError("[FileSequence] :: Not a sequence: {}".format(self.head))
+        format_name = self.head + string_utils.sequence_string(self.number_string(-1)) + self.tail
+        if directory_name:
+            format_name = directory_name.rstrip("/") + "/" + format_name
+        return template_utils.FrameTemplate(format_name)
+
+    def ranges(self, increment=1):
+        """
+        find the ranges of the incrementing frames in this sequence.
+        :param increment: <int> the increment between two following frames.
+        :return: <list> (start number string, end number string) tuples. <str> empty for a single file.
+        """
+        if len(self.frames) < 2:
+            return ""
+        return number_ranges(self.frames, self.padding, increment)
+
+    def gaps(self, increment=1):
+        """
+        find the missing frames in between the ranges of this sequence.
+        :param increment: <int> the increment between two following frames.
+        :return: <list> (first missing number string, last missing number string) tuples.
+        """
+        frames = self.frames
+        gaps = []
+        for index in range(len(frames) - 1):
+            if frames[index + 1] > frames[index] + increment:
+                width = self.padding[index]
+                gaps.append((str(frames[index] + increment).zfill(width),
+                             str(frames[index + 1] - increment).zfill(width)))
+        return gaps
+
+    def __contains__(self, file_name):
+        if self.position is None:
+            return file_name == self.head
+        number_string = file_name[len(self.head):len(file_name) - len(self.tail)]
+        if not (file_name.startswith(self.head) and file_name.endswith(self.tail) and number_string.isdigit()):
+            return False
+        return (int(number_string), len(number_string)) in zip(self.frames, self.padding)
+
+    def __len__(self):
+        if self.position is None:
+            return 1
+        return len(self.frames)
+
+    def __iter__(self):
+        return self.file_names()
+
+    def __repr__(self):
+        return '<FileSequence {} ({})>'.format(self.format_name(), len(self))
+
+
+class GridSequence:
+    """
+    the files of one grid, numbered on two axes: tiles by frames, or the u and v of UDIM-style texture names.
+    stored as the interned name parts around the two numbers and an array of numbers and paddings for every axis.
+    """
+    __slots__ = ('head', 'middle', 'tail', 'position', 'axes', 'padding')
+
+    def __init__(self, head="", middle="", tail="", position=(0, 1)):
+        """
+        :param head: <str> the part of the file name before the first number.
+        :param middle: <str> the part of the file name in between the two numbers.
+        :param tail: <str> the part of the file name after the second number.
+        :param position: <tuple> the indices of the two numbers within the numbers of the file name.
+        """
+        self.head = intern(head)
+        self.middle = intern(middle)
+        self.tail = intern(tail)
+        self.position = tuple(position)
+        self.axes = (array(FRAME_TYPECODE), array(FRAME_TYPECODE))
+        self.padding = (array('B'), array('B'))
+
+    def append(self, first_string="", second_string=""):
+        """
+        append the two numbers of a file to this grid.
+        :param first_string: <str> the number of the first axis as found in the file name.
+        :param second_string: <str> the number of the second axis as found in the file name.
+        :return: <None>
+        """
+        for axis, number_string in enumerate((first_string, second_string)):
+            self.axes[axis].append(int(number_string))
+            self.padding[axis].append(len(number_string))
+
+    def sort(self):
+        """
+        sort the files by their first number, then by their second number, the numbers by padding width first.
+        :return: <None>
+        """
+        order = sorted(zip(self.padding[0], self.axes[0], self.padding[1], self.axes[1]))
+        self.padding = (array('B', [o[0] for o in order]), array('B', [o[2] for o in order]))
+        self.axes = (array(FRAME_TYPECODE, [o[1] for o in order]), array(FRAME_TYPECODE, [o[3] for o in order]))
+
+    def number_string(self, axis=0, index=0):
+        """
+        rebuild the number string of the axis of the file at the index given.
+        :param axis: <int> 0 for the first axis, 1 for the second axis.
+        :param index: <int> the index of the file in this grid.
+        :return: <str> the number string.
+        """
+        return str(self.axes[axis][index]).zfill(self.padding[axis][index])
+
+    def file_name(self, index=0):
+        """
+        rebuild the file name at the index given.
+        :param index: <int> the index of the file in this grid.
+        :return: <str> file name.
+        """
+        return self.head + self.number_string(0, index) + self.middle + self.number_string(1, index) + self.tail
+
+    def file_names(self):
+        """
+        rebuild all the file names of this grid, in grid order.
+        :return: <generator> file names.
+        """
+        for index in range(len(self)):
+            yield self.file_name(index)
+
+    def format_name(self):
+        """
+        the C style printf format name of this grid, with a format for every axis, taken from the last file.
+        :return: <str> format name.
+        """
+        return (self.head + string_utils.sequence_string(self.number_string(0, -1)) + self.middle +
+                string_utils.sequence_string(self.number_string(1, -1)) + self.tail)
+
+    def values(self, axis=0):
+        """
+        the distinct numbers of the axis, sorted by their padding width, then by their number.
+        :param axis: <int> 0 for the first axis, 1 for the second axis.
+        :return: <list> (padding, number) tuples.
+        """
+        return sorted(set(zip(self.padding[axis], self.axes[axis])))
+
+    def ranges(self, increment=1):
+        """
+        find the ranges of the distinct numbers of every axis.
+        :param increment: <int> the increment between two following numbers.
+        :return: <list> the (start number string, end number string) tuples of the first and of the second axis.
+        """
+        ranges = []
+        for axis in range(2):
+            values = self.values(axis)
+            ranges.append(number_ranges([v[1] for v in values], [v[0] for v in values], increment))
+        return ranges
+
+    def missing(self):
+        """
+        count the files missing from the full grid, every number of one axis with every number of the other.
+        :return: <int> the number of missing files.
+        """
+        return len(self.values(0)) * len(self.values(1)) - len(self)
+
+    def __contains__(self, file_name):
+        if not (file_name.startswith(self.head) and file_name.endswith(self.tail)):
+            return False
+        numbers = file_name[len(self.head):len(file_name) - len(self.tail)].split(self.middle, 1)
+        if len(numbers) != 2 or not all([n.isdigit() for n in numbers]):
+            return False
+        return (int(numbers[0]), len(numbers[0]), int(numbers[1]), len(numbers[1])) in zip(
+            self.axes[0], self.padding[0], self.axes[1], self.padding[1])
+
+    def __len__(self):
+        return len(self.axes[0])
+
+    def __iter__(self):
+        return self.file_names()
+
+    def __repr__(self):
+        return '<GridSequence {} ({})>'.format(self.format_name(), len(self))
+
+
+def sequence_identity(sequence):
+    """
+    the name parts and number position that tell the sequence apart from every other one.
+    :param sequence: <FileSequence> the sequence or single file. <GridSequence> a grid.
+    :return: <tuple> (head, tail, position), or (head, middle, tail, position) for a grid.
+    """
+    if isinstance(sequence, GridSequence):
+        return sequence.head, sequence.middle, sequence.tail, sequence.position
+    return sequence.head, sequence.tail, sequence.position
+
+
+def unique_key_name(sequence):
+    """
+    the key name of the sequence when its plain key name is taken: the parts of its identity joined by KEY_SEPARATOR.
+    :param sequence: <FileSequence> the sequence or single file. <GridSequence> a grid.
+    :return: <str> key name.
+    """
+    return KEY_SEPARATOR.join([str(part) for part in sequence_identity(sequence)])
+
+
+def add_entry(data, keys, key_name, sequence):
+    """
+    add the sequence to the grouped entries under its key name, never over another entry.
+    :param data: <dict> the grouped entries, with a sequence and a metadata dictionary by key name.
+    :param keys: <dict> the key name of every entry by its sequence identity, updated.
+    :param key_name: <str> the plain key name of the sequence.
+    :param sequence: <FileSequence> the sequence or single file. <GridSequence> a grid.
+    :return: <str> the key name the sequence is added under.
+    """
+    if key_name in data:
+        key_name = unique_key_name(sequence)
+    keys[sequence_identity(sequence)] = key_name
+    data[key_name] = {'files': sequence, 'metadata': {}}
+    return key_name
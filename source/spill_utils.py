@@ -0,0 +1,194 @@
+"""
+spill_utils.py: the out-of-core scan, for directories with more file names than fit in memory.
+
+The file names are streamed from the directory into temporary spill files, partitioned by a hash of their skeleton,
+see string_utils.extract_skeleton. All files of a sequence share one skeleton, so every sequence ends up
+in a single partition, and the partitions are grouped one at a time by the usual PatternFinder.
+A partition estimated to take more memory than the budget is split again with another hash,
+unless all of its files share one skeleton, then it cannot be split and is grouped as it is.
+
+A file is grouped only with the files sharing its skeleton, see PatternFinder.resort_files_by_key_name_pattern,
+so the sequences found are the same as the ones of an in-memory scan, listed partition by partition.
+Only the key names of colliding sequences may differ, the one found first keeps the plain key name.
+
+Example:
+    lss -p /archive/plates --out-of-core --memory 2048
+"""
+# import standard modules
+import os
+import zlib
+import tempfile
+
+# import local modules
+from . import utils
+from . import path_utils
+from . import string_utils
+from . import filter_utils
+from . import listing_utils
+
+# define local variables
+SPILL_SEPARATOR = b"\0"
+SPILL_BUFFER_SIZE = 256 * 1024
+DEFAULT_PARTITIONS = 64
+MAX_PARTITIONS = 1024
+DEFAULT_MEMORY_BUDGET = 512 * 1024 * 1024
+# the rough memory a file name takes up while it is grouped, besides the name itself
+ENTRY_OVERHEAD = 400
+
+
+def iter_directory(directory_name="", file_filter=None):
+    """
+    stream the file names of the directory, without listing them all at once.
+    :param directory_name: <str> the directory.
+    :param file_filter: <FileFilter> the files to keep. defaults to the configured one.
+    :return: <generator> file names.
+    """
+    return listing_utils.iter_names(directory_name, file_filter or filter_utils.get_file_filter())
+
+
+def partition_index(file_name="", partitions=DEFAULT_PARTITIONS, salt=0):
+    """
+    the partition of the file name, by a stable hash of its skeleton.
+    :param file_name: <str> the file name.
+    :param partitions: <int> the number of partitions.
+    :param salt: <int> a different salt splits the same skeletons differently.
+    :return: <int> partition index.
+    """
+    skeleton = string_utils.extract_skeleton(file_name)
+    return zlib.crc32(os.fsencode(skeleton), salt) % partitions
+
+
+def spill_names(names=(), temp_dir="", partitions=DEFAULT_PARTITIONS, salt=0):
+    """
+    write the file names into the partition spill files.
+    :param names: <iterable> file names.
+    :param temp_dir: <str> the directory for the spill files.
+    :param partitions: <int> the number of partitions.
+    :param salt: <int> the hash salt.
+    :return: <list> (spill file name, number of names, number of bytes) of the partitions holding names.
+    """
+    spill_files = [path_utils.join_file_path(temp_dir, "salt{}_part{}.spill".format(salt, index))
+                   for index in range(partitions)]
+    f_objs = {}
+    counts = [0] * partitions
+    sizes = [0] * partitions
+    try:
+        for file_name in names:
+            index = partition_index(file_name, partitions, salt)
+            if index not in f_objs:
+                f_objs[index] = open(spill_files[index], 'wb', buffering=SPILL_BUFFER_SIZE)
+            data = os.fsencode(file_name) + SPILL_SEPARATOR
+            f_objs[index].write(data)
+            counts[index] += 1
+            sizes[index] += len(data)
+    finally:
+        for f_obj in f_objs.values():
+            f_obj.close()
+    return [(spill_files[index], counts[index], sizes[index]) for index in sorted(f_objs)]
+
+
+def iter_spill(spill_file=""):
+    """
+    stream the file names back from a spill file, a buffer at a time.
+    :param spill_file: <str> the spill file name.
+    :return: <generator> file names.
+    """
+    remainder = b""
+    with open(spill_file, 'rb') as f_obj:
+        while True:
+            data = f_obj.read(SPILL_BUFFER_SIZE)
+            if not data:
+                break
+            names = (remainder + data).split(SPILL_SEPARATOR)
+            remainder = names.pop()
+            for name in names:
+                yield os.fsdecode(name)
+
+
+def estimate_memory(count=0, size=0):
+    """
+    estimate the memory taken up by grouping a partition.
+    :param count: <int> the number of file names.
+    :param size: <int> the bytes of the file names.
+    :return: <int> bytes.
+    """
+    return count * ENTRY_OVERHEAD + size
+
+
+def iter_partitions(names=(), memory_budget=DEFAULT_MEMORY_BUDGET, temp_dir="", partitions=DEFAULT_PARTITIONS):
+    """
+    spill the file names into partitions, splitting the partitions over the memory budget again.
+    every spill file is removed once it is read back.
+    :param names: <iterable> file names.
+    :param memory_budget: <int> the memory a partition may take up while it is grouped, in bytes.
+    :param temp_dir: <str> the directory for the spill files.
+    :param partitions: <int> the number of partitions of the first split.
+    :return: <generator> the file names of one partition at a time.
+    """
+    pending = [(spill, 0) for spill in spill_names(names, temp_dir, partitions)]
+    while pending:
+        (spill_file, count, size), salt = pending.pop(0)
+        estimate = estimate_memory(count, size)
+        if estimate > memory_budget and count > 1:
+            sub_partitions = min(MAX_PARTITIONS, 2 * (estimate // memory_budget + 1))
+            spills = spill_names(iter_spill(spill_file), temp_dir, sub_partitions, salt + 1)
+            os.remove(spill_file)
+            # a single skeleton cannot be split any further
+            if len(spills) > 1:
+                pending[:0] = [(spill, salt + 1) for spill in spills]
+                continue
+            spill_file = spills[0][0]
+
+        partition_names = list(iter_spill(spill_file))
+        os.remove(spill_file)
+        yield partition_names
+
+
+def scan_out_of_core(names=(), memory_budget=DEFAULT_MEMORY_BUDGET, spill_dir=None, grids=None):
+    """
+    group the file names one partition at a time.
+    :param names: <iterable> file names.
+    :param memory_budget: <int> the memory a partition may take up while it is grouped, in bytes.
+    :param spill_dir: <str> the directory for the temporary spill files. defaults to the temporary directory.
+    :param grids: <bool> group the files numbered on two axes into grids. <None> for the default, see grid_utils.
+    :return: <generator> PatternFinder of every partition.
+    """
+    with tempfile.TemporaryDirectory(prefix="lss-spill-", dir=spill_dir) as temp_dir:
+        for partition_names in iter_partitions(names, memory_budget, temp_dir):
+            yield utils.PatternFinder(files=partition_names, grids=grids)
+
+
+def directory_lines_out_of_core(directory_name="", memory_budget=DEFAULT_MEMORY_BUDGET, spill_dir=None):
+    """
+    the display lines of the directory, grouped out of core.
+    :param directory_name: <str> the directory.
+    :param memory_budget: <int> the memory a partition may take up while it is grouped, in bytes.
+    :param spill_dir: <str> the directory for the temporary spill files.
+    :return: <generator> display lines.
+    """
+    for pf in scan_out_of_core(iter_directory(directory_name), memory_budget, spill_dir):
+        for line in pf.information_lines():
+            yield line
+
+
+def do_out_of_core(path_name="", memory_budget=DEFAULT_MEMORY_BUDGET, spill_dir=None):
+    """
+    print the sequences of the directory, grouped out of core. every partition is printed once it is grouped.
+    :param path_name: <str> the directory, or a file inside the directory.
+    :param memory_budget: <int> the memory a partition may take up while it is grouped, in bytes.
+    :param spill_dir: <str> the directory for the temporary spill files.
+    :return: <bool> True for success.
+    """
+    directory_name = path_utils.get_directory_from_file_name(path_name)
+    if not directory_name:
+        raise IOError("[DoOutOfCore] :: Incorrect path given. path_name: {}".format(path_name))
+
+    print("\n")
+    count = 0
+    for line in directory_lines_out_of_core(directory_name, memory_budget, spill_dir):
+        print(line)
+        count += 1
+    if not count:
+        print("There is nothing here.")
+    print("\n")
+    return True
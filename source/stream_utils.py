@@ -0,0 +1,307 @@
+"""
+stream_utils.py: the sequences of a list of file paths, read from a file or a pipe instead of listing directories.
+
+For storage that cannot be listed directly, from find, an inventory dump or a tape catalog:
+    find /shows -type f -print0 | lss -
+    lss --from-file inventory.txt --count
+The paths are separated by newlines, or by NUL characters when the input holds any.
+
+The input is read in chunks by a reader thread, while the paths read so far are grouped, so the analysis
+overlaps with the reading. The paths are expected grouped by directory subtree, as find and sorted listings give them:
+a directory is grouped as soon as the paths move on out of it, and its file names are dropped afterwards.
+Paths in any other order are grouped with --out-of-core, which spills them into partitions first, see spill_utils.
+"""
+# import standard modules
+import os
+import sys
+import queue
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# import local modules
+from . import utils
+from . import path_utils
+from . import spill_utils
+from . import grid_utils
+from . import filter_utils
+from . import convention_utils
+
+# define local variables
+READ_SIZE = 1024 * 1024
+# the chunks read ahead of the analysis
+READ_AHEAD = 16
+STDIN_NAME = "-"
+
+
+def detect_separator(data=b""):
+    """
+    detect the separator of the paths from the start of the input.
+    :param data: <bytes> the input read so far.
+    :return: <bytes> NUL if the input holds any, newline if it holds a newline. <None> if it holds neither yet.
+    """
+    if b"\0" in data:
+        return b"\0"
+    if b"\n" in data:
+        return b"\n"
+    return None
+
+
+def iter_path_chunks(f_obj, separator=None, read_size=READ_SIZE):
+    """
+    read the paths in chunks from a binary file object.
+    :param f_obj: <file> binary file object.
+    :param separator: <bytes> the path separator. detected from the input if not given.
+    :param read_size: <int> the bytes to read at a time.
+    :return: <generator> lists of paths.
+    """
+    # read1 returns what a pipe holds right away, instead of waiting for the whole chunk
+    read = getattr(f_obj, "read1", f_obj.read)
+    remainder = b""
+    while True:
+        data = read(read_size)
+        if not data:
+            break
+        if separator is None:
+            separator = detect_separator(remainder + data)
+            if separator is None:
+                remainder += data
+                continue
+        paths = (remainder + data).split(separator)
+        remainder = paths.pop()
+        yield [os.fsdecode(path.rstrip(b"\r")) for path in paths if path.strip(b"\r")]
+    if remainder.strip(b"\r\n"):
+        yield [os.fsdecode(remainder.rstrip(b"\r\n"))]
+
+
+def read_ahead(chunks, max_chunks=READ_AHEAD):
+    """
+    read the chunks in a thread, at most max_chunks ahead of the caller.
+    :param chunks: <iterable> the chunks to read.
+    :param max_chunks: <int> the number of chunks held at most.
+    :return: <generator> the chunks, in order.
+    """
+    chunk_queue = queue.Queue(max_chunks)
+
+    def reader():
+        try:
+            for chunk in chunks:
+                chunk_queue.put(chunk)
+        except Exception as error:
+            chunk_queue.put(error)
+        chunk_queue.put(None)
+
+    threading.Thread(target=reader, name="lss-read-ahead", daemon=True).start()
+    while True:
+        chunk = chunk_queue.get()
+        if chunk is None:
+            break
+        if isinstance(chunk, Exception):
+            raise chunk
+        yield chunk
+
+
+def is_inside(directory_name="", path_name=""):
+    """
+    check if the path is inside the directory, or is the directory.
+    :param directory_name: <str> the directory.
+    :param path_name: <str> the path to check.
+    :return: <bool> True for success. <bool> False for failure.
+    """
+    if directory_name == path_name:
+        return True
+    if not directory_name:
+        # every relative path is inside the current directory
+        return not os.path.isabs(path_name)
+    return path_name.startswith(directory_name.rstrip("/") + "/")
+
+
+def iter_directories(chunks, file_filter=None):
+    """
+    group the streamed paths by directory, in subtree order.
+    the directories opened form a chain of parents, a directory is finished once a path outside of it comes up.
+    :param chunks: <iterable> lists of paths.
+    :param file_filter: <FileFilter> the files to keep. defaults to the configured one.
+    :return: <generator> (directory name, file names) of every finished directory.
+    """
+    file_filter = file_filter or filter_utils.get_file_filter()
+    opened = {}
+    finished = set()
+    directory_name, names = None, None
+    for chunk in chunks:
+        for path_name in chunk:
+            head, file_name = os.path.split(path_name)
+            if not file_filter(file_name):
+                continue
+            if head != directory_name:
+                while opened:
+                    last_directory = next(reversed(opened))
+                    if is_inside(last_directory, head):
+                        break
+                    finished.add(last_directory)
+                    yield last_directory, opened.pop(last_directory)
+                if head not in opened:
+                    if head in finished:
+                        raise ValueError(
+                            "[IterDirectories] :: The paths are not grouped by directory, {} came up again. "
+                            "Sort the list, or use --out-of-core.".format(head or "."))
+                    opened[head] = []
+                directory_name, names = head, opened[head]
+            names.append(file_name)
+    while opened:
+        last_directory = next(reversed(opened))
+        yield last_directory, opened.pop(last_directory)
+
+
+def iter_directories_out_of_core(chunks, file_filter=None, memory_budget=spill_utils.DEFAULT_MEMORY_BUDGET,
+                                 spill_dir=None):
+    """
+    group the streamed paths by directory, in any order, one spill partition at a time.
+    the files of a sequence share the skeleton of their path, so all of them end up in one partition.
+    a directory may come up once for every partition holding some of its files.
+    :param chunks: <iterable> lists of paths.
+    :param file_filter: <FileFilter> the files to keep. defaults to the configured one.
+    :param memory_budget: <int> the memory a partition may take up while it is grouped, in bytes.
+    :param spill_dir: <str> the directory for the temporary spill files.
+    :return: <generator> (directory name, file names) of every partition.
+    """
+    file_filter = file_filter or filter_utils.get_file_filter()
+    path_names = (path_name for chunk in chunks for path_name in chunk
+                  if file_filter(os.path.basename(path_name)))
+    with tempfile.TemporaryDirectory(prefix="lss-spill-", dir=spill_dir) as temp_dir:
+        for partition_names in spill_utils.iter_partitions(path_names, memory_budget, temp_dir):
+            directories = {}
+            for path_name in partition_names:
+                head, file_name = os.path.split(path_name)
+                directories.setdefault(head, []).append(file_name)
+            for directory_name, names in directories.items():
+                yield directory_name, names
+
+
+def directory_lines(directory_name, pf):
+    """
+    the display lines of the pattern finder, with the directory in the format names.
+    :param directory_name: <str> the directory of the files.
+    :param pf: <PatternFinder> the pattern finder.
+    :return: <list> display lines.
+    """
+    lines = []
+    for v_data in pf.FILES_METADATA.values():
+        metadata = dict(v_data["metadata"])
+        metadata["format_name"] = path_utils.join_file_path(directory_name, metadata["format_name"])
+        lines.append(utils.metadata_line(metadata))
+    return lines
+
+
+def group_directory(directory_name="", names=(), conventions=None, file_filter=None, count_only=False, grids=False):
+    """
+    group the file names of one directory, in a worker process.
+    the settings are passed in, a worker process does not share the globals set by the command line.
+    :param directory_name: <str> the directory of the files.
+    :param names: <list> the file names, already filtered.
+    :param conventions: <list> compiled naming conventions.
+    :param file_filter: <FileFilter> the file filter, for its minimum sequence length.
+    :param count_only: <bool> only count the sequences, frames and single files.
+    :param grids: <bool> group the files numbered on two axes into grids, see grid_utils.
+    :return: <dict> counts when count_only, <list> display lines otherwise.
+    """
+    pf = utils.PatternFinder(files=names, conventions=conventions, file_filter=file_filter, grids=grids)
+    if count_only:
+        return pf.counts()
+    return directory_lines(directory_name, pf)
+
+
+def scan_stream(f_obj, separator=None, count_only=False, out_of_core=False,
+                memory_budget=spill_utils.DEFAULT_MEMORY_BUDGET, spill_dir=None, workers=None):
+    """
+    group the paths streamed from the file object, a directory at a time.
+    the finished directories are grouped by a pool of worker processes while the next ones are read,
+    a bounded number of them at a time, and come out in the order of the input.
+    :param f_obj: <file> binary file object.
+    :param separator: <bytes> the path separator. detected from the input if not given.
+    :param count_only: <bool> only count the sequences, frames and single files.
+    :param out_of_core: <bool> the paths come in any order, spill them into partitions first.
+    :param memory_budget: <int> the memory a partition may take up while it is grouped, in bytes.
+    :param spill_dir: <str> the directory for the temporary spill files.
+    :param workers: <int> the number of worker processes. defaults to the number of cpus, 1 groups in-process.
+    :return: <generator> counts or display lines of every directory.
+    """
+    conventions = convention_utils.get_conventions()
+    file_filter = filter_utils.get_file_filter()
+    grids = grid_utils.get_grids()
+    chunks = read_ahead(iter_path_chunks(f_obj, separator))
+    if out_of_core:
+        directories = iter_directories_out_of_core(chunks, file_filter, memory_budget, spill_dir)
+    else:
+        directories = iter_directories(chunks, file_filter)
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for directory_name, names in directories:
+            yield group_directory(directory_name, names, conventions, file_filter, count_only, grids)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = deque()
+        for directory_name, names in directories:
+            futures.append(executor.submit(
+                group_directory, directory_name, names, conventions, file_filter, count_only, grids))
+            # keep the workers busy, without holding every directory read so far
+            if len(futures) > 2 * workers:
+                yield futures.popleft().result()
+        while futures:
+            yield futures.popleft().result()
+
+
+def open_list(list_name=""):
+    """
+    open the list of paths, the standard input for -.
+    :param list_name: <str> the list file name, or -.
+    :return: <file> binary file object.
+    """
+    if list_name == STDIN_NAME:
+        return sys.stdin.buffer
+    if not path_utils.is_file(list_name):
+        raise IOError("[OpenList] :: Incorrect list given. list_name: {}".format(list_name))
+    return open(list_name, 'rb')
+
+
+def do_from_file(list_name=STDIN_NAME, count_only=False, out_of_core=False,
+                 memory_budget=spill_utils.DEFAULT_MEMORY_BUDGET, spill_dir=None, workers=None):
+    """
+    print the sequences of the listed paths, every directory once it is grouped.
+    :param list_name: <str> the list file name, or - for the standard input.
+    :param count_only: <bool> print the counts of sequences, frames and single files only.
+    :param out_of_core: <bool> the paths come in any order, spill them into partitions first.
+    :param memory_budget: <int> the memory a partition may take up while it is grouped, in bytes.
+    :param spill_dir: <str> the directory for the temporary spill files.
+    :param workers: <int> the number of worker processes.
+    :return: <bool> True for success.
+    """
+    f_obj = open_list(list_name)
+    counts = {"sequences": 0, "frames": 0, "singles": 0}
+    found = False
+    try:
+        if not count_only:
+            print("\n")
+        for result in scan_stream(f_obj, count_only=count_only, out_of_core=out_of_core,
+                                  memory_budget=memory_budget, spill_dir=spill_dir, workers=workers):
+            if count_only:
+                for key, value in result.items():
+                    counts[key] += value
+                continue
+            for line in result:
+                print(line)
+                found = True
+    finally:
+        if f_obj is not sys.stdin.buffer:
+            f_obj.close()
+
+    if count_only:
+        print(utils.count_line(counts))
+        return True
+    if not found:
+        print("There is nothing here.")
+    print("\n")
+    return True
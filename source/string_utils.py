@@ -6,10 +6,10 @@ import re
 import os
 
 # define local variables
-re_digits = re.compile("\d+")           # get all digits
-re_letters = re.compile("[A-Za-z]+")    # get all letters
+re_digits = re.compile(r"\d+")          # get all digits
+re_letters = re.compile(r"[A-Za-z]+")   # get all letters
 re_split = re.compile(r"([0-9]+)")      # split everything by numbers
-re_zeroes = re.compile("^0+")           # find all leading zeroes
+re_zeroes = re.compile(r"^0+")          # find all leading zeroes
 
 
 def concatenate_data(*args):
@@ -21,7 +21,7 @@ def concatenate_data(*args):
     for arg in args:
         if isinstance(arg, (list, tuple)):
             concat_str += '_'.join(arg)
-        elif isinstance(arg, (str, unicode)):
+        elif isinstance(arg, str):
             concat_str += '_' + arg
         elif isinstance(arg, (int, float)):
             concat_str += '_' + str(arg)
@@ -40,9 +40,9 @@ def replace_number_format_in_string(file_name="", sequence_format=False, regex_f
     """
     numbers_in_name = extract_numbers(file_name)
     if sequence_format:
-        formatted_numbers = map(sequence_string, numbers_in_name)
+        formatted_numbers = [sequence_string(n) for n in numbers_in_name]
     if regex_format:
-        formatted_numbers = map(regex_number_string, numbers_in_name)
+        formatted_numbers = [regex_number_string(n) for n in numbers_in_name]
     split_name = split_numbered_strings(file_name)
     # replace all the numbers into a string format
     new_file_name = ""
@@ -94,6 +94,59 @@ def extract_numbers(file_name=""):
     return tuple(re_digits.findall(file_name))
 
 
+def extract_skeleton(file_name=""):
+    """
+    replaces every number in the file name with a single marker, so all members of a sequence share one skeleton.
+    :param file_name: the file name to iterate the regex from.
+    :return: <str> the skeleton of the file name.
+    """
+    return re_digits.sub("#", file_name)
+
+
+def skeleton_batches(files=(), batch_size=4096):
+    """
+    split the files into batches of whole skeletons, in skeleton order, so no sequence is split over two batches.
+    :param files: <iterable> file names.
+    :param batch_size: <int> the number of files a batch is filled up to. a skeleton with more files is a batch alone.
+    :return: <generator> batches of file names.
+    """
+    skeleton_groups = {}
+    for file_name in files:
+        skeleton_groups.setdefault(extract_skeleton(file_name), []).append(file_name)
+
+    batch = []
+    for skeleton in sorted(skeleton_groups):
+        batch.extend(skeleton_groups.pop(skeleton))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def extract_sort_key(file_name="", numbers_in_name=None):
+    """
+    build the sort key of the file name from its number tokens.
+    every number is keyed by its width first and then by its integer value,
+    so 9 sorts before 10 and padded runs like 01 and 0001 do not interleave.
+    :param file_name: the file name to build the key from.
+    :param numbers_in_name: <tuple> the already extracted numbers of the file name, if any.
+    :return: <tuple> (skeleton, ((width, number), ...))
+    """
+    if numbers_in_name is None:
+        numbers_in_name = extract_numbers(file_name)
+    return extract_skeleton(file_name), tuple([(len(n), int(n)) for n in numbers_in_name])
+
+
+def is_frame_number(snumber=""):
+    """
+    check if the string number fits into a 64-bit frame number.
+    :param snumber: <str> the string number to check.
+    :return: <bool> True for success. <bool> False for failure.
+    """
+    return len(snumber.lstrip("0")) < 19
+
+
 def extract_letters(file_name=""):
     """
     extracts all numbers from the filename.
@@ -0,0 +1,220 @@
+"""
+summary_utils.py: the summary of a directory tree, the sequences, frames, single files and gaps of every directory,
+rolled up to every ancestor directory.
+
+Every directory is listed and grouped once, in a pool of worker processes.
+A worker returns the counts of its directory and its sub directories, which are then scanned in turn.
+A directory is rolled up into its parent as soon as the scans of all its sub directories are done,
+so the totals are added up bottom-up while the scans finish, without a second pass over the tree.
+With a deadline, the directories not scanned by then are counted as skipped in their parent, see cancel_utils.
+
+Example:
+    lss --summary -p /shows/abc --bytes
+"""
+# import standard modules
+import os
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+# import local modules
+from . import utils
+from . import rank_utils
+from . import path_utils
+from . import filter_utils
+from . import convention_utils
+from . import grid_utils
+from . import listing_utils
+from . import cancel_utils
+
+# define local variables
+SUMMARY_KEYS = ("sequences", "frames", "singles", "gaps", "bytes", "errors", "skipped")
+
+
+def empty_counts():
+    """
+    the counts of an empty directory.
+    :return: <dict> counts.
+    """
+    return dict.fromkeys(SUMMARY_KEYS, 0)
+
+
+def add_counts(counts, other):
+    """
+    add the other counts into the counts.
+    :param counts: <dict> counts, updated in place.
+    :param other: <dict> counts to add.
+    :return: <dict> counts.
+    """
+    for key in SUMMARY_KEYS:
+        counts[key] += other[key]
+    return counts
+
+
+def scan_directory_counts(directory_name="", conventions=(), file_filter=None, with_bytes=False, grids=False,
+                          backend="listdir"):
+    """
+    list and group a single directory, in a worker process.
+    the settings are given explicitly, the worker may not share the settings of lss.
+    :param directory_name: <str> the directory.
+    :param conventions: <list> compiled naming conventions.
+    :param file_filter: <FileFilter> the files to keep.
+    :param with_bytes: <bool> add up the size of the files too.
+    :param grids: <bool> group the files numbered on two axes into grids, see grid_utils.
+    :param backend: <str> the listing backend, see listing_utils. listdir lists with scandir, for the directories.
+    :return: <str> directory name, <dict> counts, <list> sub directories.
+    """
+    counts = empty_counts()
+    file_filter = file_filter or filter_utils.FileFilter()
+    files = []
+    sub_directories = []
+    try:
+        # the walk needs the type of every entry, a backend that does not know it would stat every file
+        for batch in listing_utils.iter_batches(directory_name, listing_utils.typed_backend(backend)):
+            for name, d_type in batch:
+                if listing_utils.is_directory(directory_name, name, d_type):
+                    sub_directories.append(os.path.join(directory_name, name))
+                elif file_filter(name):
+                    files.append(name)
+                    if with_bytes:
+                        counts["bytes"] += os.stat(os.path.join(directory_name, name)).st_size
+    except OSError:
+        counts["errors"] += 1
+        return directory_name, counts, sub_directories
+
+    pf = utils.PatternFinder(files=files, conventions=conventions, file_filter=file_filter, grids=grids)
+    counts.update(pf.counts())
+    for sequence in pf.FILE_SEQUENCES.values():
+        if sequence.position is not None:
+            counts["gaps"] += rank_utils.missing_frames(sequence)
+    for grid in pf.FILE_GRIDS.values():
+        counts["gaps"] += grid.missing()
+    return directory_name, counts, sub_directories
+
+
+def summarize_tree(directory_name="", with_bytes=False, workers=None, cancel_token=None, progress=None):
+    """
+    scan the directory tree in parallel and roll the counts up to every ancestor directory.
+    :param directory_name: <str> the top directory.
+    :param with_bytes: <bool> add up the size of the files too.
+    :param workers: <int> the number of worker processes. defaults to the number of cpus.
+    :param cancel_token: <CancelToken> stop scanning once cancelled, the directories left are counted as skipped.
+    :param progress: <Progress> report the directories scanned and queued, see progress_utils.
+    :return: <dict> ('own' counts, 'tree' counts) by directory name.
+    """
+    cancel_token = cancel_token or cancel_utils.CancelToken()
+    conventions = convention_utils.get_conventions()
+    file_filter = filter_utils.get_file_filter()
+    grids = grid_utils.get_grids()
+    backend = listing_utils.get_backend()
+    parents = {directory_name: None}
+    # the sub directories every directory still waits for, known once its own scan is done
+    pending = {}
+    summary = {}
+
+    def roll_up(finished):
+        # a finished directory may finish its parent in turn, and so on up the tree
+        while finished is not None and pending[finished] == 0:
+            del pending[finished]
+            parent = parents.pop(finished)
+            if parent is not None:
+                add_counts(summary[parent][1], summary[finished][1])
+                pending[parent] -= 1
+            finished = parent
+
+    executor = ProcessPoolExecutor(max_workers=workers or os.cpu_count())
+    futures = {executor.submit(
+        scan_directory_counts, directory_name, conventions, file_filter, with_bytes, grids, backend): directory_name}
+    try:
+        while futures and not cancel_token.cancelled:
+            done, _ = wait(futures, timeout=cancel_token.remaining(), return_when=FIRST_COMPLETED)
+            for future in done:
+                del futures[future]
+                scanned, counts, sub_directories = future.result()
+                summary[scanned] = (counts, dict(counts))
+                pending[scanned] = len(sub_directories)
+                for sub_directory in sub_directories:
+                    parents[sub_directory] = scanned
+                    futures[executor.submit(scan_directory_counts, sub_directory, conventions, file_filter,
+                                            with_bytes, grids, backend)] = sub_directory
+                roll_up(scanned)
+                if progress is not None:
+                    files = counts["frames"] + counts["singles"]
+                    progress.update(listed=files, grouped=files, sequences=counts["sequences"], directories=1,
+                                    queued=len(futures))
+    finally:
+        # shutdown forgets the worker processes, a worker stuck listing a directory would hold up the exit of lss
+        processes = list((getattr(executor, "_processes", None) or {}).values())
+        executor.shutdown(wait=not futures, cancel_futures=True)
+        if futures:
+            for process in processes:
+                process.terminate()
+
+    # the directories left when the scan was cancelled count in their parent, which may roll up in turn
+    for skipped in futures.values():
+        parent = parents.pop(skipped)
+        if parent is None:
+            counts = empty_counts()
+            counts["skipped"] = 1
+            summary[skipped] = (counts, dict(counts))
+            continue
+        summary[parent][0]["skipped"] += 1
+        summary[parent][1]["skipped"] += 1
+        pending[parent] -= 1
+        roll_up(parent)
+    return summary
+
+
+def counts_text(counts, with_bytes=False):
+    """
+    format the counts for display.
+    :param counts: <dict> counts.
+    :param with_bytes: <bool> show the size too.
+    :return: <str> counts text.
+    """
+    text = '{} sequences, {} frames, {} single files, {} missing frames'.format(
+        counts["sequences"], counts["frames"], counts["singles"], counts["gaps"])
+    if with_bytes:
+        text += ', {} bytes'.format(counts["bytes"])
+    if counts["errors"]:
+        text += ', {} unreadable directories'.format(counts["errors"])
+    if counts["skipped"]:
+        text += ', {} directories not scanned in time'.format(counts["skipped"])
+    return text
+
+
+def summary_lines(summary, with_bytes=False):
+    """
+    the display lines of the summary, in tree order. directories with sub directories show their tree total too.
+    :param summary: <dict> ('own' counts, 'tree' counts) by directory name.
+    :param with_bytes: <bool> show the sizes too.
+    :return: <list> display lines.
+    """
+    lines = []
+    for directory_name in sorted(summary, key=lambda name: name.split(os.sep)):
+        own, tree = summary[directory_name]
+        line = '{}\t{}'.format(directory_name, counts_text(own, with_bytes))
+        if own != tree:
+            line += '\n{}\ttotal: {}'.format(' ' * len(directory_name), counts_text(tree, with_bytes))
+        lines.append(line)
+    return lines
+
+
+def do_summary(path_name="", with_bytes=False, workers=None, cancel_token=None, progress=None):
+    """
+    print the summary of the directory tree.
+    :param path_name: <str> the top directory, or a file inside it.
+    :param with_bytes: <bool> add up the size of the files too.
+    :param workers: <int> the number of worker processes.
+    :param cancel_token: <CancelToken> stop scanning once cancelled, and print the partial summary.
+    :param progress: <Progress> report the progress of the scan, see progress_utils.
+    :return: <bool> True for success.
+    """
+    directory_name = path_utils.get_directory_from_file_name(path_name)
+    if not directory_name:
+        raise IOError("[DoSummary] :: Incorrect path given. path_name: {}".format(path_name))
+    summary = summarize_tree(os.path.normpath(directory_name), with_bytes, workers, cancel_token, progress)
+    if progress is not None:
+        progress.finish()
+    utils.display_lines(summary_lines(summary, with_bytes))
+    if any([own["skipped"] for own, tree in summary.values()]):
+        cancel_utils.partial_message(cancel_token)
+    return True
@@ -0,0 +1,114 @@
+"""
+template_utils.py: compiled frame path templates, to expand a sequence into its paths and to parse paths back.
+
+A template is compiled once from a format name, as lss prints it:
+    template = FrameTemplate("/renders/shot_%04d.exr")
+    template.path(12)                   # /renders/shot_0012.exr
+    template.paths("1001-1100x2 1200")  # the paths of every frame, generated one at a time
+    template.frame("/renders/shot_0012.exr")  # 12, <None> for a path outside of the sequence
+Generating a path is a single printf, parsing a path is a single match of one precompiled regular expression.
+"""
+# import standard modules
+import re
+
+# define local variables
+re_frame_format = re.compile(r"%(?:0(\d+))?d")      # find the %d and %0Nd formats
+re_frame_range = re.compile(r"(\d+)(?:-(\d+)(?:x(\d+))?)?")      # match 1001, 1001-1100, 1001-1100x2
+re_frame_separators = re.compile(r"[,\s]+")
+
+
+def frame_set(spec=""):
+    """
+    expand the frame ranges into frame numbers.
+    the ranges are separated by commas or spaces, so the ranges lss prints are frame ranges too: 0001-0003 0007-0007
+    :param spec: <str> frame ranges: 1001, 1001-1100, 1001-1100x2 for every second frame.
+    :return: <generator> frame numbers, in the order given.
+    """
+    for token in re_frame_separators.split(spec.strip()):
+        if not token:
+            continue
+        match = re_frame_range.fullmatch(token)
+        if not match:
+            raise ValueError("[FrameSet] :: Invalid frame range: {}".format(token))
+        start = int(match.group(1))
+        end = int(match.group(2) or start)
+        step = int(match.group(3) or 1)
+        if end < start or not step:
+            raise ValueError("[FrameSet] :: Invalid frame range: {}".format(token))
+        for frame in range(start, end + 1, step):
+            yield frame
+
+
+class FrameTemplate:
+    """
+    a format name compiled into its printf format and its regular expression.
+    the last %d or %0Nd of the format name is the frame number.
+    """
+    __slots__ = ('format_name', 'head', 'tail', 'padding', '_format', '_regex')
+
+    def __init__(self, format_name=""):
+        """
+        :param format_name: <str> the format name of the sequence, with or without its directory.
+        """
+        matches = list(re_frame_format.finditer(format_name))
+        if not matches:
+            raise ValueError("[FrameTemplate] :: No frame number format in: {}".format(format_name))
+        match = matches[-1]
+        self.format_name = format_name
+        self.head = format_name[:match.start()]
+        self.tail = format_name[match.end():]
+        self.padding = int(match.group(1) or 0)
+
+        if self.padding:
+            frame_format = "%0{}d".format(self.padding)
+            # a padded number only grows past its padding without leading zeroes
+            frame_pattern = r"(\d{{{0}}}|[1-9]\d{{{0},}})".format(self.padding)
+        else:
+            frame_format = "%d"
+            # lss prints %d for a sequence ending on a number without leading zeroes, so any number is taken
+            frame_pattern = r"(\d+)"
+        self._format = self.head.replace("%", "%%") + frame_format + self.tail.replace("%", "%%")
+        self._regex = re.compile(re.escape(self.head) + frame_pattern + re.escape(self.tail))
+
+    def path(self, frame=0):
+        """
+        the path of the frame.
+        :param frame: <int> the frame number.
+        :return: <str> path.
+        """
+        return self._format % frame
+
+    def paths(self, frames=()):
+        """
+        the paths of the frames, generated one at a time.
+        :param frames: <iterable> frame numbers, or <str> frame ranges, see frame_set.
+        :return: <iterator> paths.
+        """
+        if isinstance(frames, str):
+            frames = frame_set(frames)
+        return map(self._format.__mod__, frames)
+
+    def frame(self, path=""):
+        """
+        parse the frame number from the path.
+        :param path: <str> the path, written the same way as the format name.
+        :return: <int> frame number. <None> if the path is not a frame of this template.
+        """
+        match = self._regex.fullmatch(path)
+        if match is None:
+            return None
+        return int(match.group(1))
+
+    def frames(self, paths=()):
+        """
+        parse the frame numbers from the paths.
+        :param paths: <iterable> paths.
+        :return: <iterator> frame numbers, <None> for every path that is not a frame of this template.
+        """
+        return map(self.frame, paths)
+
+    def __contains__(self, path):
+        return self._regex.fullmatch(path) is not None
+
+    def __repr__(self):
+        return '<FrameTemplate {}>'.format(self.format_name)
@@ -8,12 +8,48 @@ Goal:
 """
 
 # import standard modules
+import os
+import io
+import json
+import random
+import asyncio
+import contextlib
+import sys
+import shutil
+import subprocess
+import struct
+import tempfile
+import threading
 import unittest
+from unittest import mock
 
 # import local modules
-import path_utils
-import utils
-import file_utils
+from . import path_utils
+from . import utils
+from . import file_utils
+from . import sequence_utils
+from . import daemon_utils
+from . import diff_utils
+from . import batch_utils
+from . import concat_utils
+from . import manifest_utils
+from . import header_utils
+from . import log_utils
+from . import convention_utils
+from . import grid_utils
+from . import listing_utils
+from . import filter_utils
+from . import spill_utils
+from . import rank_utils
+from . import summary_utils
+from . import index_utils
+from . import stream_utils
+from . import template_utils
+from . import cancel_utils
+from . import progress_utils
+from . import memprofile_utils
+from . import async_utils
+from . import lss
 
 # define local variables
 __directory_path__ = path_utils.get_this_upper_path()
@@ -68,6 +104,1046 @@ class TestFilenames(unittest.TestCase):
         self.assertEqual(utils.do_it(path_name=sequence_dir), True)
 
 
+class TestSortKeys(unittest.TestCase):
+    """
+    Perform a battery of tests against the precomputed sort keys.
+    """
+
+    def test_sort_key_numeric(self):
+        files = ['image_10.png', 'image_9.png', 'image_100.png']
+        sorted_files = utils.PatternFinder.sort_files_by_sequence_key(files)
+        self.assertEqual(sorted_files, ['image_9.png', 'image_10.png', 'image_100.png'])
+
+    def test_sort_key_mixed_padding(self):
+        files = ['comp_0002.jpg', 'comp_02.jpg', 'comp_01.jpg', 'comp_0001.jpg']
+        sorted_files = utils.PatternFinder.sort_files_by_sequence_key(files)
+        self.assertEqual(sorted_files, ['comp_01.jpg', 'comp_02.jpg', 'comp_0001.jpg', 'comp_0002.jpg'])
+
+    def test_unsorted_files_ranges(self):
+        files = ['a_0003.png', 'a_0001.png', 'a_0005.png', 'a_0002.png']
+        pf = utils.PatternFinder(files=files)
+        metadata = pf.FILES_METADATA['a_.png']['metadata']
+        self.assertEqual(metadata['increment_tally'], [('0001', '0003'), ('0005', '0005')])
+
+
+class TestFileSequence(unittest.TestCase):
+    """
+    Perform a battery of tests against the compact sequence storage.
+    """
+
+    def test_file_names_rebuilt(self):
+        sequence = sequence_utils.FileSequence('comp_', '.jpg', 0)
+        for number_string in ('09', '10', '0001'):
+            sequence.append(number_string)
+        self.assertEqual(list(sequence), ['comp_09.jpg', 'comp_10.jpg', 'comp_0001.jpg'])
+        self.assertEqual(sequence.ranges(), [('09', '10'), ('0001', '0001')])
+
+    def test_key_name_taken(self):
+        # ab.png is the key name of a%db.png too, neither of them is lost
+        pf = utils.PatternFinder(files=('a1b.png', 'a2b.png', 'a3b.png', 'ab.png'))
+        self.assertEqual(pf.information_lines(), ['3 a%db.png\t1-3', '1 ab.png\t'])
+        self.assertEqual(list(pf.FILE_SEQUENCES), ['ab.png', 'ab.png\0\0None'])
+        pf = utils.PatternFinder(files=('ab.png', 'a1b.png', 'a2b.png', 'c_1.png'), conventions=[])
+        self.assertEqual(sorted(pf.information_lines()), ['1 ab.png\t', '1 c_1.png\t', '2 a%db.png\t1-2'])
+
+    def test_single_file(self):
+        sequence = sequence_utils.FileSequence('emptyfile.bmp')
+        self.assertEqual(len(sequence), 1)
+        self.assertEqual(sequence.format_name(), 'emptyfile.bmp')
+
+
+class TestTemplate(unittest.TestCase):
+    """
+    Perform a battery of tests against the compiled frame path templates.
+    """
+
+    def test_paths(self):
+        template = template_utils.FrameTemplate('/renders/shot_v2.%04d.exr')
+        self.assertEqual(template.path(12), '/renders/shot_v2.0012.exr')
+        self.assertEqual(list(template.paths('1-5x2 0007-0008')),
+                         ['/renders/shot_v2.{:04d}.exr'.format(frame) for frame in (1, 3, 5, 7, 8)])
+        with self.assertRaises(ValueError):
+            list(template_utils.frame_set('10-1'))
+        with self.assertRaises(ValueError):
+            template_utils.FrameTemplate('notes.txt')
+
+    def test_frame(self):
+        template = template_utils.FrameTemplate('shot_%04d.exr')
+        self.assertEqual(template.frame('shot_0012.exr'), 12)
+        self.assertEqual(template.frame('shot_12345.exr'), 12345)
+        self.assertIsNone(template.frame('shot_012.exr'))
+        self.assertIsNone(template.frame('shot_0012.exr.bak'))
+        self.assertEqual(list(template_utils.FrameTemplate('image-%d.png').frames(['image-9.png', 'image-10.png'])),
+                         [9, 10])
+
+    def test_sequence_template(self):
+        files = ['a_{:03d}.png'.format(frame) for frame in range(1, 4)]
+        sequence = list(utils.PatternFinder(files=files).FILE_SEQUENCES.values())[0]
+        template = sequence.template('/renders')
+        self.assertEqual(template.format_name, '/renders/a_%03d.png')
+        self.assertEqual(list(template.paths(sequence.frames)), ['/renders/' + name for name in files])
+
+
+class TestLazyPatternFinder(unittest.TestCase):
+    """
+    Perform a battery of tests against the staged analysis of the pattern finder.
+    """
+
+    def test_count_only(self):
+        files = ['plate.{:04d}.exr'.format(frame) for frame in (1, 2, 3, 7)] + ['notes.txt']
+        pf = utils.PatternFinder(files=files)
+        self.assertEqual(pf.counts(), {"sequences": 1, "frames": 4, "singles": 1})
+        # counting stops after the grouping
+        self.assertIsNone(pf._files_metadata)
+        self.assertEqual(pf.FILES_METADATA['plate..exr']['metadata']['increment_tally'],
+                         [('0001', '0003'), ('0007', '0007')])
+
+
+class TestIndex(unittest.TestCase):
+    """
+    Perform a battery of tests against the single file lookup.
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        names = ['image-{}.png'.format(frame) for frame in range(8, 12)]
+        names += ['shot_v{}.{:04d}.exr'.format(version, frame) for version in (1, 2) for frame in range(1, 4)]
+        names += ['notes.txt']
+        for name in names:
+            open(os.path.join(self.temp_dir, name), 'w').close()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_prefix_range(self):
+        names = ['a.1', 'b.1', 'b.2', 'bb.1', 'c.1']
+        start, end = index_utils.prefix_range(names, 'b')
+        self.assertEqual(names[start:end], ['b.1', 'b.2', 'bb.1'])
+        self.assertEqual(index_utils.prefix_range(names, 'd'), (5, 5))
+
+    def test_sequence_siblings(self):
+        files, convention = index_utils.sequence_siblings(self.temp_dir, 'image-9.png')
+        self.assertEqual(sorted(files), ['image-10.png', 'image-11.png', 'image-8.png', 'image-9.png'])
+        # the frame number is the last number, not the version
+        files, convention = index_utils.sequence_siblings(self.temp_dir, 'shot_v2.0002.exr')
+        self.assertEqual(files, ('shot_v2.0001.exr', 'shot_v2.0002.exr', 'shot_v2.0003.exr'))
+        self.assertEqual(index_utils.sequence_siblings(self.temp_dir, 'notes.txt'), (('notes.txt',), None))
+
+    def test_filtered_listing(self):
+        # the listing passes the file filter, so the excluded frames are not siblings
+        filter_utils.set_file_filter(exclude=['image-1?.png'])
+        try:
+            files, convention = index_utils.sequence_siblings(self.temp_dir, 'image-9.png')
+        finally:
+            filter_utils.set_file_filter()
+        self.assertEqual(sorted(files), ['image-8.png', 'image-9.png'])
+
+    def test_file_name_lookup(self):
+        pf = utils.PatternFinder(file_name=os.path.join(self.temp_dir, 'shot_v1.0003.exr'))
+        self.assertEqual(pf.information_lines(), ['3 shot_v1.%04d.exr\t0001-0003'])
+
+
+class TestCancel(unittest.TestCase):
+    """
+    Perform a battery of tests against the deadlines and cancellation of scans.
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        os.mkdir(os.path.join(self.temp_dir, 'sub'))
+        for frame in range(1, 4):
+            open(os.path.join(self.temp_dir, 'a_{:04d}.png'.format(frame)), 'w').close()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_token(self):
+        self.assertTrue(cancel_utils.CancelToken(timeout=0).cancelled)
+        token = cancel_utils.CancelToken(timeout=60)
+        self.assertFalse(token.cancelled)
+        token.cancel()
+        self.assertTrue(token.cancelled)
+        self.assertEqual(token.remaining(), 0.0)
+
+    def test_partial_scan(self):
+        pf = utils.PatternFinder(directory_name=self.temp_dir, cancel_token=cancel_utils.CancelToken(timeout=60))
+        self.assertEqual(pf.information_lines(), ['3 a_%04d.png\t0001-0003'])
+        self.assertFalse(pf.PARTIAL)
+        pf = utils.PatternFinder(files=['a_0001.png', 'a_0002.png'], cancel_token=cancel_utils.CancelToken(timeout=0))
+        self.assertEqual(pf.FILE_SEQUENCES, {})
+        self.assertTrue(pf.PARTIAL)
+
+    def test_untimed_modes(self):
+        # the modes without a deadline refuse --timeout instead of ignoring it
+        for argv in (['--from-file', 'paths.txt'], ['-'], ['--top', '5'], ['--sort', 'size'], ['--out-of-core'],
+                     ['--headers']):
+            with self.subTest(argv=argv), self.assertRaises(SystemExit) as context:
+                with contextlib.redirect_stderr(io.StringIO()):
+                    lss.main(['-p', self.temp_dir, '--timeout', '5'] + argv)
+            self.assertEqual(context.exception.code, 2)
+
+    def test_partial_summary(self):
+        summary = summary_utils.summarize_tree(self.temp_dir, workers=1, cancel_token=cancel_utils.CancelToken(0))
+        self.assertEqual(summary[self.temp_dir][0]["skipped"], 1)
+
+
+class TestProgress(unittest.TestCase):
+    """
+    Perform a battery of tests against the progress reports of scans.
+    """
+
+    def test_scan_progress(self):
+        snapshots = []
+        progress = progress_utils.Progress(snapshots.append, interval=0)
+        files = ['a_{:04d}.png'.format(frame) for frame in range(1, 3001)] + ['notes.txt']
+        pf = utils.PatternFinder(files=files, progress=progress)
+        pf.group_files()
+        progress.finish()
+        # the grouping reports every CHECK_INTERVAL files
+        self.assertEqual([snapshot["grouped"] for snapshot in snapshots[1:3]], [1024, 2048])
+        self.assertEqual([snapshot["sequences"] for snapshot in snapshots[1:3]], [1, 1])
+        last = snapshots[-1]
+        self.assertTrue(last["done"])
+        self.assertEqual((last["listed"], last["grouped"], last["sequences"], last["percent"]), (3001, 3001, 1, 100))
+        self.assertIn('3001 grouped (100%), 1 sequences', progress_utils.progress_text(last))
+
+    def test_listing_progress(self):
+        # the listing reports every batch of the backend, before the total is known
+        temp_dir = tempfile.mkdtemp()
+        try:
+            for frame in range(1, 4):
+                open(os.path.join(temp_dir, 'a_{:04d}.png'.format(frame)), 'w').close()
+            for cancel_token in (None, cancel_utils.CancelToken(timeout=60)):
+                snapshots = []
+                progress = progress_utils.Progress(snapshots.append, interval=0)
+                utils.PatternFinder(directory_name=temp_dir, cancel_token=cancel_token, progress=progress)
+                self.assertEqual((snapshots[0]["listed"], snapshots[0]["total"]), (3, None))
+                self.assertEqual((snapshots[-1]["listed"], snapshots[-1]["total"]), (3, 3))
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_rate_limit(self):
+        snapshots = []
+        progress = progress_utils.Progress(snapshots.append, interval=60)
+        for _ in range(100):
+            progress.update(listed=1)
+        self.assertEqual(snapshots, [])
+        progress.finish()
+        self.assertEqual(snapshots[0]["listed"], 100)
+
+
+class TestMemoryProfile(unittest.TestCase):
+    """
+    Perform a battery of tests against the memory accounting of the scan stages.
+    """
+
+    def setUp(self):
+        self.profiler = memprofile_utils.start(top=3)
+
+    def tearDown(self):
+        memprofile_utils.__profiler__ = None
+        memprofile_utils.tracemalloc.stop()
+
+    def test_stages(self):
+        files = ['a_{:04d}.png'.format(frame) for frame in range(1, 2001)]
+        pf = utils.PatternFinder(files=files)
+        pf.information_lines()
+        report = self.profiler.report()
+        self.assertEqual(list(report), ['listing', 'grouping', 'metadata'])
+        self.assertEqual(report['grouping']['calls'], 1)
+        self.assertGreaterEqual(report['grouping']['peak'], report['grouping']['net'])
+        self.assertLessEqual(len(report['grouping']['sites']), 3)
+        self.assertEqual(memprofile_utils.report_lines(report)[0].split(), ['stage', 'net', 'peak', 'calls'])
+
+
+class TestAsync(unittest.TestCase):
+    """
+    Perform a battery of tests against the asyncio scans.
+    """
+
+    def setUp(self):
+        test_directory = path_utils.join_file_path(__directory_path__, 'testdirectories')
+        self.directories = [path_utils.join_file_path(test_directory, name) for name in sorted(os.listdir(test_directory))]
+
+    def test_scan_directories(self):
+        # batches of one skeleton each, the results are the same as a single PatternFinder
+        scanner = async_utils.AsyncScanner(concurrency=2, batch_size=1)
+        results = asyncio.run(scanner.scan_directories(self.directories))
+        self.assertEqual(list(results), self.directories)
+        for directory_name in self.directories:
+            pf = utils.PatternFinder(directory_name=directory_name)
+            self.assertEqual(list(results[directory_name]), list(pf.FILE_SEQUENCES))
+            self.assertEqual([rank_utils.sequence_line(sequence) for sequence in results[directory_name].values()],
+                             pf.information_lines())
+
+    def test_key_name_collision(self):
+        # a1b.png and ab1.png both strip to ab.png, the later sequence gets its unique key name
+        temp_dir = tempfile.mkdtemp()
+        try:
+            for file_name in ('a1b.png', 'a2b.png', 'ab1.png', 'ab2.png'):
+                open(os.path.join(temp_dir, file_name), 'w').close()
+            sequences = asyncio.run(async_utils.AsyncScanner(batch_size=1).scan(temp_dir))
+            pf = utils.PatternFinder(directory_name=temp_dir)
+            self.assertEqual(list(sequences), ['ab.png', 'ab\0.png\x000'])
+            self.assertEqual(list(sequences), list(pf.FILE_SEQUENCES))
+            self.assertEqual(list(sequences['ab.png']), ['a1b.png', 'a2b.png'])
+            self.assertEqual(list(sequences['ab\0.png\x000']), ['ab1.png', 'ab2.png'])
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_merge_keeps_sequences(self):
+        # neither a sequence nor a single file on a taken key name is split up or lost
+        tex_b = sequence_utils.FileSequence('tex', 'b.png', 0)
+        texb = sequence_utils.FileSequence('texb', '.png', 0)
+        for frame in ('1', '2', '3', '4'):
+            tex_b.append(frame)
+            texb.append(frame)
+        sequences = {'texb.png': tex_b}
+        async_utils.merge_sequences(sequences, {'texb.png': texb})
+        async_utils.merge_sequences(sequences, {'texb.png': sequence_utils.FileSequence('texb.png')})
+        self.assertEqual([sequence.format_name() for sequence in sequences.values()],
+                         ['tex%db.png', 'texb%d.png', 'texb.png'])
+
+    def test_cancel(self):
+        async def scan():
+            return await asyncio.wait_for(async_utils.AsyncScanner().scan(self.directories[0]), timeout=0)
+        with self.assertRaises(asyncio.TimeoutError):
+            asyncio.run(scan())
+
+
+@unittest.skipUnless(daemon_utils.has_unix_sockets(), "needs Unix domain sockets")
+class TestDaemon(unittest.TestCase):
+    """
+    Perform a battery of tests against the lss daemon and its scan cache.
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        for frame in range(1, 4):
+            open(os.path.join(self.temp_dir, 'a_{:04d}.png'.format(frame)), 'w').close()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_cache_invalidated_by_mtime(self):
+        scans = []
+        cache = daemon_utils.ScanCache(lambda d: scans.append(d) or utils.scan_directory_lines(d), racy_seconds=0)
+        self.assertEqual(cache.get(self.temp_dir), ['3 a_%04d.png\t0001-0003'])
+        self.assertEqual(cache.get(self.temp_dir), ['3 a_%04d.png\t0001-0003'])
+        self.assertEqual(len(scans), 1)
+
+        open(os.path.join(self.temp_dir, 'a_0004.png'), 'w').close()
+        os.utime(self.temp_dir, ns=(0, os.stat(self.temp_dir).st_mtime_ns + 1))
+        self.assertEqual(cache.get(self.temp_dir), ['4 a_%04d.png\t0001-0004'])
+        self.assertEqual(len(scans), 2)
+
+    def test_request_scan(self):
+        socket_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, socket_dir)
+        socket_name = os.path.join(socket_dir, 'lss.sock')
+        self.assertEqual(daemon_utils.request_scan(self.temp_dir, socket_name), None)
+
+        server = daemon_utils.make_server(utils.scan_directory_lines, socket_name)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            self.assertEqual(daemon_utils.request_scan(self.temp_dir, socket_name), ['3 a_%04d.png\t0001-0003'])
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+
+    def serve(self):
+        socket_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, socket_dir)
+        socket_name = os.path.join(socket_dir, 'lss.sock')
+        server = daemon_utils.make_server(utils.scan_directory_lines, socket_name)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+
+        def stop():
+            server.shutdown()
+            server.server_close()
+            thread.join()
+        self.addCleanup(stop)
+        return socket_name
+
+    def test_conventions_mismatch(self):
+        # a client with other default conventions than the daemon scans in-process
+        socket_name = self.serve()
+        os.environ[convention_utils.CONVENTIONS_ENV] = os.path.join(self.temp_dir, 'conventions')
+        try:
+            self.assertEqual(daemon_utils.request_scan(self.temp_dir, socket_name), None)
+        finally:
+            del os.environ[convention_utils.CONVENTIONS_ENV]
+        self.assertEqual(daemon_utils.request_scan(self.temp_dir, socket_name), ['3 a_%04d.png\t0001-0003'])
+
+    def test_thin_client(self):
+        # a scan answered by the daemon never imports the scanning modules
+        socket_name = self.serve()
+        package = __name__.rpartition('.')[0]
+        script = ("import sys; from {0} import lss; sys.argv = ['lss', '-p', sys.argv[1]]; lss.main(); "
+                  "print('{0}.utils' in sys.modules)".format(package))
+        output = subprocess.run([sys.executable, '-c', script, self.temp_dir], check=True, capture_output=True,
+                                text=True, cwd=__directory_path__,
+                                env=dict(os.environ, **{daemon_utils.SOCKET_ENV: socket_name})).stdout
+        self.assertEqual(output.split(), ['3', 'a_%04d.png', '0001-0003', 'False'])
+
+    def test_serve_plain_scans(self):
+        # the scans of the daemon are served to every client, its own arguments cannot shape them
+        for argv in (['--ext', 'png'], ['--include', '*.png'], ['--exclude', '*.exr'], ['--min-length', '2'],
+                     ['--grid'], ['--convention', r'a_(?P<frame>\d+)\.png'], ['--listing', 'scandir']):
+            with self.subTest(argv=argv), self.assertRaises(SystemExit) as context:
+                with contextlib.redirect_stderr(io.StringIO()):
+                    lss.main(['--serve'] + argv)
+            self.assertEqual(context.exception.code, 2)
+
+
+class TestDiff(unittest.TestCase):
+    """
+    Perform a battery of tests against the scan differences.
+    """
+
+    def test_interval_operations(self):
+        intervals_a = [[1, 10], [20, 30]]
+        intervals_b = [[3, 4], [8, 22], [30, 40]]
+        self.assertEqual(diff_utils.interval_difference(intervals_a, intervals_b), [[1, 2], [5, 7], [23, 29]])
+        self.assertEqual(diff_utils.interval_difference(intervals_b, intervals_a), [[11, 19], [31, 40]])
+        self.assertEqual(diff_utils.interval_intersection(intervals_a, intervals_b),
+                         [[3, 4], [8, 10], [20, 22], [30, 30]])
+
+    def test_diff_directories(self):
+        dir_a = tempfile.mkdtemp()
+        dir_b = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, dir_a)
+        self.addCleanup(shutil.rmtree, dir_b)
+        for frame in range(1, 11):
+            for dir_name in (dir_a, dir_b):
+                with open(os.path.join(dir_name, 'a_{:04d}.png'.format(frame)), 'w') as f_obj:
+                    f_obj.write('frame')
+        os.remove(os.path.join(dir_b, 'a_0005.png'))
+        with open(os.path.join(dir_b, 'a_0007.png'), 'w') as f_obj:
+            f_obj.write('larger frame')
+        open(os.path.join(dir_b, 'a_0011.png'), 'w').close()
+
+        snapshot_file = os.path.join(dir_b, 'scan.json')
+        diff_utils.save_snapshot(diff_utils.scan_snapshot(dir_a), snapshot_file)
+        differences = diff_utils.diff_snapshots(diff_utils.load_snapshot(snapshot_file), diff_utils.scan_snapshot(dir_b))
+        self.assertEqual(diff_utils.difference_line(differences['a_.png']),
+                         'a_%04d.png\tadded 1: 0011-0011\tremoved 1: 0005-0005\tchanged 1: 0007-0007')
+        self.assertEqual(differences['scan.json']['file'], 'added')
+
+
+class TestBatch(unittest.TestCase):
+    """
+    Perform a battery of tests against the batch operations.
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        for frame in range(1, 6):
+            with open(os.path.join(self.temp_dir, 'a_{:02d}.png'.format(frame)), 'w') as f_obj:
+                f_obj.write(str(frame))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_order_renames_chain(self):
+        operations = [('a1', 'a2'), ('a2', 'a3'), ('a3', 'a4')]
+        self.assertEqual(batch_utils.order_renames(operations), [('a3', 'a4'), ('a2', 'a3'), ('a1', 'a2')])
+
+    def test_order_renames_cycle(self):
+        operations = [('a1', 'a2'), ('a2', 'a1')]
+        self.assertEqual(batch_utils.order_renames(operations),
+                         [('a1', 'a1.lss-tmp'), ('a2', 'a1'), ('a1.lss-tmp', 'a2')])
+
+    def test_order_renames_cycle_existing_temporary(self):
+        a1 = os.path.join(self.temp_dir, 'a1')
+        a2 = os.path.join(self.temp_dir, 'a2')
+        open(a1 + '.lss-tmp', 'w').close()
+        ordered = batch_utils.order_renames([(a1, a2), (a2, a1)])
+        self.assertEqual(ordered[0], (a1, a1 + '.lss-tmp.1'))
+        self.assertEqual(ordered[-1], (a1 + '.lss-tmp.1', a2))
+
+    def test_renumber_in_place(self):
+        spec = os.path.join(self.temp_dir, 'a_%02d.png')
+        batch_utils.do_batch(spec, start=2, padding=4)
+        self.assertEqual(sorted(os.listdir(self.temp_dir)), ['a_{:04d}.png'.format(frame) for frame in range(2, 7)])
+        with open(os.path.join(self.temp_dir, 'a_0006.png')) as f_obj:
+            self.assertEqual(f_obj.read(), '5')
+
+    def test_renumber_unpadded(self):
+        sequence = sequence_utils.FileSequence('r_', '.png', 0)
+        for frame in ('10', '11', '12'):
+            sequence.append(frame)
+        operations = batch_utils.plan_batch(self.temp_dir, sequence, start=1)
+        self.assertEqual([os.path.basename(target) for source, target in operations],
+                         ['r_1.png', 'r_2.png', 'r_3.png'])
+        # a padded sequence keeps its padding
+        sequence = sequence_utils.FileSequence('r_', '.png', 0)
+        for frame in ('08', '09', '10'):
+            sequence.append(frame)
+        operations = batch_utils.plan_batch(self.temp_dir, sequence, start=1)
+        self.assertEqual([os.path.basename(target) for source, target in operations],
+                         ['r_01.png', 'r_02.png', 'r_03.png'])
+
+    def test_copy(self):
+        destination = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, destination)
+        batch_utils.do_batch(os.path.join(self.temp_dir, 'a_01.png'), start=1001, destination=destination, mode='copy')
+        self.assertEqual(sorted(os.listdir(destination)), ['a_{}.png'.format(frame) for frame in range(1001, 1006)])
+        self.assertRaises(ValueError, batch_utils.do_batch, os.path.join(self.temp_dir, 'a_01.png'),
+                          start=1001, destination=destination, mode='copy')
+
+
+class TestConcat(unittest.TestCase):
+    """
+    Perform a battery of tests against the sequence concatenation.
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        for frame in (1, 2, 3, 5):
+            with open(os.path.join(self.temp_dir, 'chunk_{:04d}.raw'.format(frame)), 'w') as f_obj:
+                f_obj.write('frame{}\n'.format(frame) * frame)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_gaps(self):
+        directory_name, sequence = utils.find_sequence(os.path.join(self.temp_dir, 'chunk_%04d.raw'))
+        self.assertEqual(sequence.gaps(), [('0004', '0004')])
+
+    def test_cat(self):
+        output = os.path.join(tempfile.mkdtemp(), 'chunks.raw')
+        self.addCleanup(shutil.rmtree, os.path.dirname(output))
+        concat_utils.do_cat(os.path.join(self.temp_dir, 'chunk_0001.raw'), output)
+        with open(output) as f_obj:
+            self.assertEqual(f_obj.read(), ''.join(['frame{}\n'.format(frame) * frame for frame in (1, 2, 3, 5)]))
+
+    def test_append_file_buffered(self):
+        output = os.path.join(self.temp_dir, 'buffered.out')
+        with open(output, 'wb') as out_obj:
+            file_utils.append_file(os.path.join(self.temp_dir, 'chunk_0003.raw'), out_obj.fileno(), copy_functions=[])
+        with open(output) as f_obj:
+            self.assertEqual(f_obj.read(), 'frame3\n' * 3)
+
+
+class TestManifest(unittest.TestCase):
+    """
+    Perform a battery of tests against the checksum manifests.
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        for frame in range(1, 6):
+            with open(os.path.join(self.temp_dir, 'plate.{:04d}.dpx'.format(frame)), 'w') as f_obj:
+                f_obj.write('frame{}\n'.format(frame))
+        self.directory_name, self.sequence = utils.find_sequence(os.path.join(self.temp_dir, 'plate.%04d.dpx'))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_resume(self):
+        # a manifest cut short after two frames, the last line half written
+        file_name = manifest_utils.manifest_path(self.directory_name, self.sequence)
+        manifest_utils.write_manifest(self.directory_name, self.sequence)
+        with open(file_name) as f_obj:
+            lines = f_obj.readlines()
+        with open(file_name, 'w') as f_obj:
+            f_obj.writelines(lines[:3] + [lines[3][:7]])
+        counts = manifest_utils.write_manifest(self.directory_name, self.sequence, workers=2)
+        self.assertEqual(counts, {"hashed": 3, "kept": 2})
+        algorithm, entries = manifest_utils.read_manifest(file_name)
+        self.assertEqual(sorted(entries), ['0001', '0002', '0003', '0004', '0005'])
+
+    def test_verify(self):
+        manifest_utils.write_manifest(self.directory_name, self.sequence)
+        with open(os.path.join(self.temp_dir, 'plate.0002.dpx'), 'w') as f_obj:
+            f_obj.write('changed\n')
+        os.remove(os.path.join(self.temp_dir, 'plate.0005.dpx'))
+        directory_name, sequence = utils.find_sequence(os.path.join(self.temp_dir, 'plate.%04d.dpx'))
+        result = manifest_utils.verify_manifest(directory_name, sequence)
+        self.assertEqual(result["changed"], ['0002'])
+        self.assertEqual(result["missing"], ['0005'])
+        self.assertEqual(result["hashed"], 1)
+
+    def test_hidden_location(self):
+        manifest_utils.write_manifest(self.directory_name, self.sequence)
+        pf = utils.PatternFinder(directory_name=self.temp_dir)
+        self.assertEqual([sequence.format_name() for sequence in pf.FILE_SEQUENCES.values()], ['plate.%04d.dpx'])
+
+    def test_legacy_location(self):
+        file_name = manifest_utils.manifest_path(self.directory_name, self.sequence)
+        manifest_utils.write_manifest(self.directory_name, self.sequence)
+        legacy_name = os.path.join(self.temp_dir, os.path.basename(file_name))
+        os.rename(file_name, legacy_name)
+        self.assertEqual(manifest_utils.verify_manifest(self.directory_name, self.sequence)["checked"], 5)
+        counts = manifest_utils.write_manifest(self.directory_name, self.sequence)
+        self.assertEqual(counts, {"hashed": 0, "kept": 5})
+        self.assertFalse(os.path.exists(legacy_name))
+
+
+class TestHeaders(unittest.TestCase):
+    """
+    Perform a battery of tests against the image header checks.
+    """
+
+    @staticmethod
+    def png(width, height, color_type=6):
+        return (header_utils.PNG_SIGNATURE + struct.pack(">I", 13) + b"IHDR" +
+                struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0) + b"\0" * 4)
+
+    @staticmethod
+    def exr(width, height, channels="BGR", owner=b""):
+        def attribute(name, attribute_type, value):
+            return name + b"\0" + attribute_type + b"\0" + struct.pack("<i", len(value)) + value
+        channel_list = b"".join([c.encode() + b"\0" + struct.pack("<iB3xii", 1, 0, 1, 1) for c in channels]) + b"\0"
+        return (header_utils.EXR_MAGIC + struct.pack("<i", 2) + attribute(b"owner", b"string", owner) +
+                attribute(b"channels", b"chlist", channel_list) +
+                attribute(b"dataWindow", b"box2i", struct.pack("<iiii", 0, 0, width - 1, height - 1)) + b"\0")
+
+    def test_parse(self):
+        self.assertEqual(header_utils.parse_header(self.png(64, 32, 2)), ("png", 64, 32, 3, 8))
+        self.assertEqual(header_utils.parse_header(self.exr(2048, 1152, "ABGR")), ("exr", 2048, 1152, 4, 16))
+        dpx = bytearray(1024)
+        dpx[:4] = b"XPDS"
+        dpx[772:780] = struct.pack("<II", 1920, 1080)
+        dpx[800], dpx[803] = 50, 10
+        self.assertEqual(header_utils.parse_header(bytes(dpx)), ("dpx", 1920, 1080, 3, 10))
+        jpeg = (b"\xff\xd8\xff\xe0" + struct.pack(">H", 16) + b"\0" * 14 +
+                b"\xff\xc0" + struct.pack(">HBHHB", 17, 8, 600, 800, 3))
+        self.assertEqual(header_utils.parse_header(jpeg), ("jpg", 800, 600, 3, 8))
+        # cut short, or not an image
+        self.assertIsNone(header_utils.parse_header(jpeg[:-4]))
+        self.assertIsNone(header_utils.parse_header(b"frame0001"))
+
+    def test_corrupt_headers(self):
+        def attribute(name, attribute_type, value, size=None):
+            return name + b"\0" + attribute_type + b"\0" + struct.pack("<i", len(value) if size is None else size) + value
+        channels = attribute(b"channels", b"chlist", b"B\0" + struct.pack("<iB3xii", 1, 0, 1, 1) + b"\0")
+        window = attribute(b"dataWindow", b"box2i", struct.pack("<iiii", 0, 0, 63, 31))
+        start = header_utils.EXR_MAGIC + struct.pack("<i", 2)
+        corrupt = {
+            # the channel list ends right after a channel name
+            'channels': start + attribute(b"channels", b"chlist", b"B\0\0") + window + b"\0",
+            'window': start + channels + attribute(b"dataWindow", b"box2i", struct.pack("<ii", 0, 0)) + b"\0",
+            # a negative size stepping back to the start of its own attribute
+            'negative': start + attribute(b"owner", b"string", b"x" * 16, size=-17) + channels + window + b"\0",
+            # the start of frame segment cut short, and a segment length shorter than its own two bytes
+            'jpeg': b"\xff\xd8\xff\xc0" + struct.pack(">H", 17) + b"\x08\x02",
+            'jpeg_length': b"\xff\xd8\xff\xe0" + struct.pack(">H", 1) + b"\0" * 14,
+        }
+        temp_dir = tempfile.mkdtemp()
+        try:
+            for name, data in corrupt.items():
+                file_name = os.path.join(temp_dir, name)
+                with open(file_name, 'wb') as f_obj:
+                    f_obj.write(data)
+                with self.subTest(name=name):
+                    self.assertIsNone(header_utils.read_header(file_name))
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_check_sequence(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            for frame in range(1, 8):
+                # a header longer than the first read is read again
+                data = self.exr(1920, 1080, "BGR" if frame != 3 else "ABGR", owner=b"x" * 2000)
+                if frame == 6:
+                    data = data[:100]
+                with open(os.path.join(temp_dir, 'plate.{:04d}.exr'.format(frame)), 'wb') as f_obj:
+                    f_obj.write(data)
+            directory_name, sequence = utils.find_sequence(os.path.join(temp_dir, 'plate.%04d.exr'))
+            majority, differing = header_utils.check_sequence(directory_name, sequence, workers=2)
+            self.assertEqual(majority, ("exr", 1920, 1080, 3, 16))
+            self.assertEqual({header_utils.header_text(header): header_utils.frame_ranges(sequence, indices)
+                              for header, indices in differing.items()},
+                             {"exr 1920x1080 4ch 16bit": "0003-0003", "unreadable": "0006-0006"})
+        finally:
+            shutil.rmtree(temp_dir)
+
+
+class TestLog(unittest.TestCase):
+    """
+    Perform a battery of tests against the background log writer.
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.log_file = os.path.join(self.temp_dir, 'lss.log')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_concurrent_records(self):
+        log_writer = log_utils.LogWriter(self.log_file, max_records=8)
+        threads = [threading.Thread(target=lambda: [log_writer.write("scan", count=n) for n in range(200)])
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        log_writer.close()
+        with open(self.log_file) as f_obj:
+            records = [json.loads(line) for line in f_obj]
+        self.assertEqual(len(records), 800)
+        self.assertEqual(sum([record["count"] for record in records]), 4 * sum(range(200)))
+
+    def test_rotate(self):
+        log_writer = log_utils.LogWriter(self.log_file, max_bytes=1024, backup_count=2)
+        for _ in range(50):
+            log_writer.write("scan", lines=["x" * 100])
+            log_writer.flush()
+        log_writer.close()
+        self.assertTrue(os.path.exists(self.log_file + '.2'))
+        self.assertFalse(os.path.exists(self.log_file + '.3'))
+        self.assertLessEqual(os.path.getsize(self.log_file + '.1'), 1024)
+
+    def test_environment(self):
+        # LSS_LOG logs the scans the same as --log
+        directory_name = path_utils.join_file_path(__directory_path__, 'testdirectories', 'sequence_00')
+        subprocess.run([sys.executable, '-m', __name__.rpartition('.')[0], '-p', directory_name], check=True,
+                       capture_output=True, cwd=__directory_path__, env=dict(os.environ, LSS_LOG=self.log_file))
+        with open(self.log_file) as f_obj:
+            records = [json.loads(line) for line in f_obj]
+        self.assertEqual([record["event"] for record in records], ["scan"])
+
+
+class TestConventions(unittest.TestCase):
+    """
+    Perform a battery of tests against the naming convention fast path.
+    """
+    conventions = [convention_utils.compile_convention(r'^.+\.(?P<frame>\d+)\.\w+$'),
+                   convention_utils.compile_convention(r'^.+[-_](?P<frame>\d+)\.\w+$')]
+
+    def test_same_as_heuristics(self):
+        for sequence_dir in ('sequence_00', 'sequence_01', 'sequence_02', 'sequence_03', 'sequence_04', 'sequence_06'):
+            directory_name = path_utils.join_file_path(__directory_path__, 'testdirectories', sequence_dir)
+            heuristic_lines = utils.PatternFinder(directory_name=directory_name, conventions=[]).information_lines()
+            convention_lines = utils.PatternFinder(
+                directory_name=directory_name, conventions=self.conventions).information_lines()
+            self.assertEqual(sorted(convention_lines), sorted(heuristic_lines))
+
+    def test_leftovers_sorted(self):
+        # the three digit frames miss the convention, they join its sequence from the neighbour scan
+        conventions = [convention_utils.compile_convention(r'^.+\.(?P<frame>\d{4})\.exr$')]
+        files = ('plate.0005.exr', 'plate.0006.exr', 'plate.0007.exr', 'plate.001.exr', 'plate.002.exr')
+        pf = utils.PatternFinder(files=files, conventions=conventions)
+        sequence = pf.FILE_SEQUENCES['plate..exr']
+        self.assertEqual(list(sequence.frames), [1, 2, 5, 6, 7])
+
+    def test_single_file_falls_back(self):
+        files = ('plate_v01.0001.exr', 'plate_v02.0001.exr', 'plate_v03.0001.exr', 'comp.0001.exr', 'comp.0002.exr')
+        groups, leftover = convention_utils.group_by_conventions(files, self.conventions)
+        self.assertEqual(list(groups), ['comp..exr'])
+        self.assertEqual(sorted(leftover), sorted(files[:3]))
+        pf = utils.PatternFinder(files=files, conventions=self.conventions)
+        self.assertEqual(sorted(pf.information_lines()), ['2 comp.%04d.exr\t0001-0002', '3 plate_v%02d.0001.exr\t01-03'])
+
+    def test_frame_group_required(self):
+        self.assertRaises(ValueError, convention_utils.compile_convention, r'^.+\.(\d+)\.exr$')
+
+
+class TestGrid(unittest.TestCase):
+    """
+    Perform a battery of tests against the grids of files numbered on two axes.
+    """
+    tiles = tuple(['render_tile_{:02d}_{:04d}.exr'.format(t, f) for t in range(1, 5) for f in range(1, 25)])
+    textures = tuple(['tex_1001_u{}_v{}.exr'.format(u, v) for u in range(1, 11) for v in range(1, 4)])
+
+    def test_grid_lines(self):
+        pf = utils.PatternFinder(files=self.tiles[1:] + self.textures + ('notes.txt',), grids=True)
+        self.assertEqual(sorted(pf.information_lines()), [
+            '1 notes.txt\t', '30 tex_1001_u%d_v%d.exr\t1-10 x 1-3',
+            '95 render_tile_%02d_%04d.exr\t01-04 x 0001-0024 (1 missing)'])
+        self.assertEqual(list(pf.FILE_GRIDS), ['render_tile__.exr', 'tex_1001_u_v.exr'])
+        self.assertEqual(pf.counts(), {"sequences": 2, "frames": 125, "singles": 1})
+
+    def test_grid_sequence(self):
+        grid = grid_utils.find_grid(list(reversed(self.tiles)))
+        self.assertEqual(list(grid), list(self.tiles))
+        self.assertIn('render_tile_03_0012.exr', grid)
+        self.assertNotIn('render_tile_03_12.exr', grid)
+        self.assertNotIn('render_tile_05_0012.exr', grid)
+
+    def test_not_a_grid(self):
+        # a single varying number, a diagonal and three varying numbers are left to the sequences
+        diagonal = ['a_{}_{}.exr'.format(n, n) for n in range(1, 6)]
+        for files in (self.tiles[:24], diagonal, ['b_{0}_{0}_{0}.exr'.format(n) for n in range(1, 6)]):
+            self.assertIsNone(grid_utils.find_grid(files))
+
+    def test_frame_modes(self):
+        # with the grids turned on, the modes working on sequences of frames still see every file
+        temp_dir = tempfile.mkdtemp()
+        grid_utils.set_grids(True)
+        try:
+            for file_name in self.tiles:
+                open(os.path.join(temp_dir, file_name), 'w').close()
+            self.assertEqual(sum(map(len, rank_utils.iter_sequences(temp_dir))), 96)
+            self.assertEqual(sum(map(len, rank_utils.iter_sequences(temp_dir, out_of_core=True))), 96)
+            self.assertEqual(len(diff_utils.scan_snapshot(temp_dir, sizes=False)["sequences"]), 4)
+            self.assertEqual(len(manifest_utils.manifest_sequences(temp_dir)[1]), 4)
+            directory_name, sequence = utils.find_sequence(os.path.join(temp_dir, 'render_tile_02_%04d.exr'))
+            self.assertEqual(len(sequence), 24)
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                header_utils.do_headers(temp_dir)
+            self.assertEqual(output.getvalue().count('render_tile_'), 4)
+            # the async scan groups the grids, as the plain scan does
+            sequences = asyncio.run(async_utils.AsyncScanner(batch_size=1).scan(temp_dir))
+            self.assertEqual([rank_utils.sequence_line(sequence) for sequence in sequences.values()],
+                             ['96 render_tile_%02d_%04d.exr\t01-04 x 0001-0024'])
+        finally:
+            grid_utils.set_grids(False)
+            shutil.rmtree(temp_dir)
+
+    def test_frame_modes_refuse_grid(self):
+        for argv in (['--top', '5'], ['--sort', 'size'], ['--diff', 'a', 'b'], ['--save-scan', 'scan.json'],
+                     ['--cat', 'a_%04d.exr'], ['--sequence', 'a_%04d.exr'], ['--manifest'], ['--verify'],
+                     ['--headers']):
+            with self.subTest(argv=argv), self.assertRaises(SystemExit) as context:
+                with contextlib.redirect_stderr(io.StringIO()):
+                    lss.main(['--grid'] + argv)
+            self.assertEqual(context.exception.code, 2)
+
+    def test_stream_workers(self):
+        # a worker process groups with the grids setting it is given, not the globals of its own interpreter
+        lines = stream_utils.group_directory('renders', self.tiles, grids=True)
+        self.assertEqual(lines, ['96 renders/render_tile_%02d_%04d.exr\t01-04 x 0001-0024'])
+        self.assertEqual(len(stream_utils.group_directory('renders', self.tiles, grids=False)), 4)
+
+    def test_off_by_default(self):
+        directory_name = path_utils.join_file_path(__directory_path__, 'testdirectories', 'sequence_06')
+        self.assertFalse(utils.PatternFinder(directory_name=directory_name).FILE_GRIDS)
+        pf = utils.PatternFinder(directory_name=directory_name, grids=True)
+        self.assertIn('4 d.%04d.%04d.png\t0001-0002 x 0000-0001', pf.information_lines())
+
+
+class TestListing(unittest.TestCase):
+    """
+    Perform a battery of tests against the directory listing backends.
+    """
+    backends = [backend for backend in ("listdir", "scandir", "getdents")
+                if backend != "getdents" or listing_utils.getdents_available()]
+
+    def setUp(self):
+        self.directory_name = path_utils.join_file_path(__directory_path__, 'testdirectories')
+
+    def tearDown(self):
+        listing_utils.set_backend("listdir")
+
+    def test_same_names(self):
+        for sequence_dir in sorted(os.listdir(self.directory_name)):
+            directory_name = path_utils.join_file_path(self.directory_name, sequence_dir)
+            for backend in self.backends:
+                names = [name for batch in listing_utils.iter_batches(directory_name, backend) for name, _ in batch]
+                self.assertEqual(sorted(names), sorted(os.listdir(directory_name)))
+
+    def test_directories(self):
+        for backend in self.backends:
+            entries = [entry for batch in listing_utils.iter_batches(self.directory_name, backend) for entry in batch]
+            self.assertTrue(all([listing_utils.is_directory(self.directory_name, name, d_type)
+                                 for name, d_type in entries]))
+
+    def test_pattern_finder(self):
+        directory_name = path_utils.join_file_path(self.directory_name, 'sequence_01')
+        lines = utils.PatternFinder(directory_name=directory_name).information_lines()
+        for backend in self.backends:
+            listing_utils.set_backend(backend)
+            self.assertEqual(utils.PatternFinder(directory_name=directory_name).information_lines(), lines)
+
+    def test_unknown_backend(self):
+        self.assertRaises(ValueError, listing_utils.set_backend, "readdir")
+
+
+class TestFilters(unittest.TestCase):
+    """
+    Perform a battery of tests against the listing filters.
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        for file_name in ['beauty.{:04d}.exr'.format(frame) for frame in range(1, 11)] + \
+                ['beauty.{:04d}.xml'.format(frame) for frame in range(1, 11)] + \
+                ['beauty_tmp.{:04d}.exr'.format(frame) for frame in range(1, 4)] + ['notes.txt', 'README']:
+            open(os.path.join(self.temp_dir, file_name), 'w').close()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_listing(self):
+        file_filter = filter_utils.FileFilter(extensions=['EXR,.dpx'], exclude=['*_tmp*'])
+        files = path_utils.list_files_from_dir(self.temp_dir, file_filter)
+        self.assertEqual(sorted(files), ['beauty.{:04d}.exr'.format(frame) for frame in range(1, 11)])
+        self.assertEqual(len(path_utils.list_files_from_dir(self.temp_dir)), 24)
+
+    def test_min_length(self):
+        file_filter = filter_utils.FileFilter(include=['beauty*'], min_length=5)
+        pf = utils.PatternFinder(directory_name=self.temp_dir, file_filter=file_filter)
+        self.assertEqual(sorted(pf.information_lines()),
+                         ['10 beauty.%04d.exr\t0001-0010', '10 beauty.%04d.xml\t0001-0010'])
+
+
+class TestOutOfCore(unittest.TestCase):
+    """
+    Perform a battery of tests against the out-of-core scan.
+    """
+
+    def test_same_as_in_memory(self):
+        # random names, mixing paddings, colliding key names, single files and skeletons sorting next to each other
+        rng = random.Random(37)
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        for attempt in range(50):
+            names = set()
+            for count in range(rng.randint(1, 120)):
+                head = rng.choice(['r-', 'img4_', 'a', 'ab', 'tex', 'texb', 'plate.'])
+                tail = rng.choice(['.png', '.exr', 'b.png', '_v2.exr', ''])
+                frame = rng.choice([None, 0, 1, 2, 6, 10, 34, 86, 100, rng.randint(0, 2000)])
+                if frame is None:
+                    names.add(head + tail)
+                else:
+                    names.add(head + rng.choice(['{}', '{:02d}', '{:04d}']).format(frame) + tail)
+            names = sorted(names)
+            rng.shuffle(names)
+            in_memory_lines = utils.PatternFinder(files=list(names)).information_lines()
+            # a tiny budget splits the partitions again and again
+            out_of_core_lines = [line for pf in spill_utils.scan_out_of_core(iter(names), 512, temp_dir)
+                                 for line in pf.information_lines()]
+            self.assertEqual(sorted(out_of_core_lines), sorted(in_memory_lines), names)
+
+    def test_neighbour_skeletons(self):
+        # the files of other skeletons sorting next to a sequence do not change how it is grouped
+        for names in (['r-6.exr', 'r-34.exr'], ['img4_0.png', 'img4_86.png']):
+            expected = utils.PatternFinder(files=list(names)).information_lines()
+            pf = utils.PatternFinder(files=names + ['r-6_v2.exr', 'q.1.exr', 'img4_0006b.png', 'img4.png'])
+            for line in expected:
+                self.assertIn(line, pf.information_lines())
+
+    def test_spill_round_trip(self):
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        names = ['plate.{:04d}.exr'.format(frame) for frame in range(1, 5000)] + ['caf\udce9.exr', 'notes.txt']
+        spills = spill_utils.spill_names(names, temp_dir, partitions=4)
+        self.assertEqual(sum([count for spill_file, count, size in spills]), len(names))
+        read_names = []
+        for spill_file, count, size in spills:
+            read_names.extend(spill_utils.iter_spill(spill_file))
+        self.assertEqual(sorted(read_names), sorted(names))
+
+
+class TestFromFile(unittest.TestCase):
+    """
+    Perform a battery of tests against the sequences of streamed path lists.
+    """
+
+    def setUp(self):
+        # in find order, the files of a come up again after its sub directory
+        self.paths = ['a/x.0001.exr', 'a/b/y_1.png', 'a/b/y_2.png', 'a/x.0002.exr', 'c/z.10.dpx', 'c/z.11.dpx', 'a']
+
+    def test_path_chunks(self):
+        data = io.BytesIO(b"\0".join([path.encode() for path in self.paths]))
+        chunks = list(stream_utils.iter_path_chunks(data, read_size=7))
+        self.assertEqual([path for chunk in chunks for path in chunk], self.paths)
+        data = io.BytesIO(b"a/x.0001.exr\r\na/x.0002.exr\r\n")
+        self.assertEqual(list(stream_utils.iter_path_chunks(data)), [['a/x.0001.exr', 'a/x.0002.exr']])
+
+    def test_directories(self):
+        directories = list(stream_utils.iter_directories([self.paths]))
+        self.assertEqual(directories, [('a/b', ['y_1.png', 'y_2.png']), ('a', ['x.0001.exr', 'x.0002.exr']),
+                                       ('c', ['z.10.dpx', 'z.11.dpx'])])
+        with self.assertRaises(ValueError):
+            list(stream_utils.iter_directories([['a/x.0001.exr', 'c/z.10.dpx', 'a/x.0002.exr']]))
+
+    def test_scan_stream(self):
+        data = "\n".join(self.paths).encode()
+        lines = [line for result in stream_utils.scan_stream(io.BytesIO(data), workers=1) for line in result]
+        self.assertEqual(lines, ['2 a/b/y_%d.png\t1-2', '2 a/x.%04d.exr\t0001-0002', '2 c/z.%d.dpx\t10-11'])
+        # any order, grouped out of core
+        data = "\n".join(reversed(self.paths)).encode()
+        results = stream_utils.scan_stream(io.BytesIO(data), out_of_core=True, memory_budget=1, workers=1)
+        self.assertEqual(sorted([line for result in results for line in result]), lines)
+        counts = list(stream_utils.scan_stream(io.BytesIO(data), count_only=True, workers=1))
+        self.assertEqual(sum([result["frames"] for result in counts]), 6)
+
+
+class TestRank(unittest.TestCase):
+    """
+    Perform a battery of tests against the top sequences.
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        for name, frames, size in (('small', (1, 2, 3, 4, 5, 6), 1), ('large', (1, 2, 3), 100),
+                                   ('gappy', (1, 5, 10, 11), 1)):
+            for frame in frames:
+                with open(os.path.join(self.temp_dir, '{}.{:04d}.exr'.format(name, frame)), 'w') as f_obj:
+                    f_obj.write('x' * size)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def ranked_names(self, top, sort_by, out_of_core=False):
+        sequences = rank_utils.iter_sequences(self.temp_dir, out_of_core=out_of_core)
+        return [sequence.format_name() for sequence in rank_utils.rank_sequences(sequences, self.temp_dir, top, sort_by)]
+
+    def test_sort_keys(self):
+        self.assertEqual(self.ranked_names(1, 'count'), ['small.%04d.exr'])
+        self.assertEqual(self.ranked_names(1, 'size'), ['large.%04d.exr'])
+        self.assertEqual(self.ranked_names(1, 'gaps'), ['gappy.%04d.exr'])
+        self.assertEqual(self.ranked_names(None, 'name'), ['gappy.%04d.exr', 'large.%04d.exr', 'small.%04d.exr'])
+
+    def test_out_of_core(self):
+        self.assertEqual(self.ranked_names(2, 'count', out_of_core=True), self.ranked_names(2, 'count'))
+
+    def test_batches(self):
+        # one skeleton a batch, ranked before the next one is grouped
+        sequences = rank_utils.iter_sequences(self.temp_dir, batch_size=1)
+        self.assertEqual(next(sequences).format_name(), 'gappy.%04d.exr')
+        ranked = rank_utils.rank_sequences(sequences, self.temp_dir, 1, 'count')
+        self.assertEqual([sequence.format_name() for sequence in ranked], ['small.%04d.exr'])
+
+
+class TestSummary(unittest.TestCase):
+    """
+    Perform a battery of tests against the directory tree summary.
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        for sub_directory, frames in (('', (1, 2)), ('shot_010', (1, 2, 3)), ('shot_010/comp', (1, 2, 4)),
+                                      ('shot_020', (1, 5))):
+            directory_name = os.path.join(self.temp_dir, sub_directory)
+            os.makedirs(directory_name, exist_ok=True)
+            for frame in frames:
+                with open(os.path.join(directory_name, 'plate.{:04d}.exr'.format(frame)), 'w') as f_obj:
+                    f_obj.write('x' * 10)
+        open(os.path.join(self.temp_dir, 'shot_010', 'notes.txt'), 'w').close()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_roll_up(self):
+        summary = summary_utils.summarize_tree(self.temp_dir, with_bytes=True, workers=2)
+        own, tree = summary[os.path.join(self.temp_dir, 'shot_010')]
+        self.assertEqual((own["sequences"], own["frames"], own["singles"], own["gaps"]), (1, 3, 1, 0))
+        self.assertEqual((tree["sequences"], tree["frames"], tree["singles"], tree["gaps"]), (2, 6, 1, 1))
+        own, tree = summary[self.temp_dir]
+        self.assertEqual((tree["sequences"], tree["frames"], tree["singles"], tree["gaps"]), (4, 10, 1, 4))
+        self.assertEqual(tree["bytes"], 100)
+
+    def test_no_stat_walk(self):
+        # the directories are told apart by their d_type, even with the listdir backend configured
+        directory_name = os.path.join(self.temp_dir, 'shot_010')
+        with mock.patch('os.lstat', wraps=os.lstat) as lstat:
+            scanned, counts, sub_directories = summary_utils.scan_directory_counts(directory_name, backend="listdir")
+        self.assertEqual(lstat.call_count, 0)
+        self.assertEqual(sub_directories, [os.path.join(directory_name, 'comp')])
+        self.assertEqual((counts["sequences"], counts["frames"], counts["singles"]), (1, 3, 1))
+
+
 if __name__ == '__main__':
     file_utils.delete_logfile()
     unittest.main()
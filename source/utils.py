@@ -32,17 +32,29 @@ Important Information:
 Versions:
     1.0.0: Initial release.
     1.0.1: Concatenate files by dictionary key index.
+    1.1.0: Python 3 port, installable as the lss package.
 """
 # import standard modules
+import posixpath
+from itertools import zip_longest, chain
 from pprint import pprint
 
 # import local modules
-import path_utils
-import string_utils
-import file_utils
+from . import path_utils
+from . import string_utils
+from . import log_utils
+from . import sequence_utils
+from . import daemon_utils
+from . import convention_utils
+from . import grid_utils
+from . import filter_utils
+from . import index_utils
+from . import cancel_utils
+from . import progress_utils
+from . import memprofile_utils
 
 # define private variables
-__version__ = "1.0.1"
+__version__ = "1.1.0"
 __verbosity__ = 0
 __debugging__ = False
 
@@ -218,6 +230,29 @@ def name_strip(file_name, cur_file_indices, num_position):
         string_name=file_name, number_indices=cur_file_indices, num_position=num_position)
 
 
+def metadata_line(metadata_info):
+    """
+    format the metadata of one sequence into its display line.
+    :param metadata_info: <dict> the metadata with count, format_name and increment_tally,
+        or with count, format_name, axes and missing for a grid.
+    :return: <str> display line.
+    """
+    if "axes" in metadata_info:
+        # a grid prints the ranges of both of its axes, and the files missing from the full grid
+        increment_tally = ' x '.join(
+            [' '.join(map(lambda x: '{}-{}'.format(x[0], x[1]), axis)) for axis in metadata_info["axes"]])
+        if metadata_info.get("missing"):
+            increment_tally += ' ({} missing)'.format(metadata_info["missing"])
+        return '{} {}\t{}'.format(metadata_info["count"], metadata_info["format_name"], increment_tally)
+    increment_tally = ' '.join(
+        map(lambda x: '{}-{}'.format(x[0], x[1]), metadata_info.get("increment_tally", ())))
+    return '{} {}\t{}'.format(metadata_info["count"], metadata_info["format_name"], increment_tally)
+
+
+# the daemon client prints its lines without importing this module, see lss.main
+display_lines = daemon_utils.display_lines
+
+
 def check_file_exists(file_name=""):
     """
     check if this file exists.
@@ -230,7 +265,8 @@ class PatternFinder:
     """
     find the patterns from the parameters given.
     """
-    def __init__(self, files=(), file_name="", directory_name=""):
+    def __init__(self, files=(), file_name="", directory_name="", conventions=None, file_filter=None,
+                 cancel_token=None, progress=None, grids=None):
         """
         conditional initialization.
         if files are given, then scan through all files as-is.
@@ -239,29 +275,129 @@ class PatternFinder:
         :param files: <list>, <tuple> loop through all these files and try to find patterns.
         :param file_name: <str> look only for this file_name in the current directory.
         :param directory_name: <str> sorts all files, then match patterns by scanning one ahead and one behind.
+        :param conventions: <list> compiled naming conventions, see convention_utils. defaults to the configured ones.
+        :param file_filter: <FileFilter> the files to keep, see filter_utils. defaults to the configured one.
+        :param cancel_token: <CancelToken> stop listing and grouping once cancelled, see cancel_utils.
+            the results are then partial, and PARTIAL is set.
+        :param progress: <Progress> report the entries listed and grouped and the sequences found, see progress_utils.
+        :param grids: <bool> group the files numbered on two axes into grids, see grid_utils.
+            defaults to the configured setting.
         """
         self.INCREMENT = 1
+        self.CONVENTIONS = convention_utils.get_conventions() if conventions is None else conventions
+        self.FILE_FILTER = file_filter or filter_utils.get_file_filter()
         self.LENGTH_OF_ALL_FILES = 0
+        self.CANCEL_TOKEN = cancel_token
+        self.PARTIAL = False
+        self.PROGRESS = progress
+        self.GRIDS = grid_utils.get_grids() if grids is None else grids
+
+        # the analysis is staged, every stage runs on first access only:
+        # grouping fills the compact FileSequence of every entry, the metadata adds the format names and ranges.
+        self._grouped_files = None
+        self._file_sequences = None
+        self._file_grids = None
+        self._files_metadata = None
+
+        with memprofile_utils.stage("listing"):
+            if file_name:
+                # glob search this file name
+                files = self.get_files(file_name=file_name)
+
+            elif not file_name and directory_name:
+                # get a semi-sorted list from the directory given.
+                files = self.get_files(directory_name=directory_name)
+
+            elif not self.FILE_FILTER.is_empty:
+                files = self.FILE_FILTER.filter_files(files)
+
+        self.FILES = files
+        self.LENGTH_OF_ALL_FILES = len(files)
+        if progress is not None:
+            progress.total = len(files)
+            # a directory listing reports its files batch by batch while it lists them
+            progress.update(listed=0 if directory_name and not file_name else len(files))
 
-        # the metadata information used for printing the final results
-        self.FILES_METADATA = {}
-        self.LOG_FILE = None
+    def group_files(self):
+        """
+        the grouping stage: sort and group the files into sequences and single files, once.
+        :return: <dict> the grouped files, with a FileSequence and an empty metadata dictionary by key name.
+        """
+        if self._grouped_files is None:
+            sequences_before = self.PROGRESS.sequences if self.PROGRESS is not None else 0
+            with memprofile_utils.stage("grouping"):
+                # sort and group that list nice-like according to the length of the file name
+                sorted_files_dict = self.resort_files_by_key_name_pattern(self.FILES)
+                if self.FILE_FILTER.min_length:
+                    sorted_files_dict = self.filter_by_length(sorted_files_dict, self.FILE_FILTER.min_length)
+                self._grouped_files = sorted_files_dict
+                self._file_sequences = {}
+                self._file_grids = {}
+                for k_name, v_data in sorted_files_dict.items():
+                    if isinstance(v_data['files'], sequence_utils.GridSequence):
+                        self._file_grids[k_name] = v_data['files']
+                    else:
+                        self._file_sequences[k_name] = v_data['files']
+            if self.PROGRESS is not None:
+                # the count during the grouping holds the sequences a single file joins later, this is the final one
+                self.PROGRESS.sequences = sequences_before + len(self._file_grids) + len(
+                    [sequence for sequence in self._file_sequences.values() if sequence.position is not None])
+                self.PROGRESS.report()
+        return self._grouped_files
+
+    def analyze_files(self):
+        """
+        the metadata stage: the format names and ranges of the grouped files, once.
+        :return: <dict> the files metadata.
+        """
+        if self._files_metadata is None:
+            grouped_files = self.group_files()
+            with memprofile_utils.stage("metadata"):
+                self._files_metadata = {}
+                # find breaks in the incrementation in between files
+                updated_files_dict = self.get_relevant_files_info(grouped_files)
+                self.update_files_metadata(updated_files_dict)
+        return self._files_metadata
 
-        if file_name:
-            # glob search this file name
-            files = self.get_files(file_name=file_name)
+    @property
+    def FILE_SEQUENCES(self):
+        """
+        the compact FileSequence of every entry, grouped on first access.
+        :return: <dict> FileSequence by key name.
+        """
+        self.group_files()
+        return self._file_sequences
 
-        elif not file_name and directory_name:
-            # get a semi-sorted list from the directory given.
-            files = self.get_files(directory_name=directory_name)
+    @property
+    def FILE_GRIDS(self):
+        """
+        the GridSequence of every grid, grouped on first access. always empty unless the grids are grouped.
+        :return: <dict> GridSequence by key name.
+        """
+        self.group_files()
+        return self._file_grids
 
-        self.LENGTH_OF_ALL_FILES = len(files)
+    @property
+    def FILES_METADATA(self):
+        """
+        the metadata information used for printing the final results, analyzed on first access.
+        :return: <dict> metadata by key name.
+        """
+        return self.analyze_files()
 
-        # sort and group that list nice-like according to the length of the file name
-        sorted_files_dict = self.resort_files_by_key_name_pattern(files)
-        # find breaks in the incrementation in between files
-        updated_files_dict = self.get_relevant_files_info(sorted_files_dict)
-        self.update_files_metadata(updated_files_dict)
+    def counts(self):
+        """
+        count the sequences, their frames and the single files. only groups the files, without any formatting.
+        :return: <dict> sequences, frames and singles counts.
+        """
+        counts = {"sequences": 0, "frames": 0, "singles": 0}
+        for sequence in chain(self.FILE_SEQUENCES.values(), self.FILE_GRIDS.values()):
+            if sequence.position is None:
+                counts["singles"] += 1
+            else:
+                counts["sequences"] += 1
+                counts["frames"] += len(sequence)
+        return counts
 
     @staticmethod
     def _get_incrementing_indices(num_position=(), number_indices=()):
@@ -284,21 +420,16 @@ class PatternFinder:
         :param array_2: <tuple> an array of numbers to check against array 1/
         :return: <str> the difference number
         """
-        match_num = map(lambda x, y: x == y, array_1, array_2)
+        match_num = [x == y for x, y in zip_longest(array_1, array_2)]
         return tuple([n for n in range(len(array_2)) if match_num[n] is False])
 
     def display_information(self, file_write=False):
         """
         displays the collection of FILES_METADATA dictionary class variable to the command prompt.
-        :param file_write: <bool> saves it to the local file log.
+        :param file_write: <bool> saves it to the lss log, see log_utils.
         :return: <bool> True for success.
         """
-        increment_tally = ""
-
-        if file_write:
-            self.LOG_FILE = file_utils.LogFile()
-            self.LOG_FILE.write_file(string_line=get_path_name_variable() + '\n')
-            self.LOG_FILE.write_file(string_line='{}\n'.format(self.length_of_all_files))
+        log_lines = []
 
         if self.FILES_METADATA:
             if __verbosity__:
@@ -311,22 +442,11 @@ class PatternFinder:
             print("\n")
             for key_name in self.FILES_METADATA:
                 if 'files' in self.FILES_METADATA[key_name]:
-                    pprint(self.FILES_METADATA[key_name]["files"])
-                metadata_info = self.FILES_METADATA[key_name]["metadata"]
-                sequence_count = metadata_info["count"]
-                format_name = metadata_info["format_name"]
-                if "increment_tally" in metadata_info:
-                    increment_tally = ' '.join(
-                        map(lambda x: '{}-{}'.format(x[0], x[1]), metadata_info["increment_tally"]))
-
-                message = '{} {}\t{}'.format(sequence_count, format_name, increment_tally)
+                    pprint(list(self.FILES_METADATA[key_name]["files"]))
+                message = metadata_line(self.FILES_METADATA[key_name]["metadata"])
                 print(message)
 
-                if file_write:
-                    self.LOG_FILE.write_file(string_line=message + '\n')
-
-            if file_write:
-                self.LOG_FILE.write_file(string_line='\n')
+                log_lines.append(message)
 
             print("\n")
 
@@ -346,14 +466,19 @@ class PatternFinder:
 
             print(message)
 
-            if file_write:
-                self.LOG_FILE.write_file(string_line=message + '\n')
-
         if file_write:
-            self.LOG_FILE.close_file()
+            log_utils.log_record("scan", path=get_path_name_variable(), count=self.length_of_all_files,
+                                 lines=log_lines)
 
         return True
 
+    def information_lines(self):
+        """
+        the display lines of the FILES_METADATA dictionary, one line for each entry.
+        :return: <list> display lines.
+        """
+        return [metadata_line(v_data["metadata"]) for v_data in self.FILES_METADATA.values()]
+
     def key_name(self, file_name="", files=(), index=0, strip=False, replace=False, fformat=False):
         """
         returns a nice key name.
@@ -382,6 +507,36 @@ class PatternFinder:
         else:
             return file_name
 
+    @staticmethod
+    def sort_files_by_skeleton(files=()):
+        """
+        sorts the files once per skeleton group, on the precomputed integer keys of their numbers.
+        :param files: <list> the files to sort.
+        :return: <list> one list of files in frame order for every skeleton, in skeleton order.
+        """
+        skeleton_groups = {}
+        for file_name in files:
+            skeleton, sort_key = string_utils.extract_sort_key(file_name)
+            if skeleton not in skeleton_groups:
+                skeleton_groups[skeleton] = []
+            skeleton_groups[skeleton].append((sort_key, file_name))
+
+        return [[f_name for f_key, f_name in sorted(skeleton_groups.pop(skeleton))]
+                for skeleton in sorted(skeleton_groups)]
+
+    @staticmethod
+    def sort_files_by_sequence_key(files=()):
+        """
+        sorts the files once per skeleton group, on the precomputed integer keys of their numbers.
+        files sharing a skeleton end up next to each other in frame order, ready for the neighbour scans.
+        :param files: <list> the files to sort.
+        :return: <list> sorted files.
+        """
+        sorted_files = []
+        for skeleton_files in PatternFinder.sort_files_by_skeleton(files):
+            sorted_files.extend(skeleton_files)
+        return sorted_files
+
     def resort_files_by_key_name_pattern(self, files=[]):
         """
         resorts the list so it nicely starts and ends with the file increments.
@@ -389,120 +544,144 @@ class PatternFinder:
         So We re-organize the list by finding the patterns in the file name.
         :param files: <list> the files to sort.
         Example:
-            'V3-0002_comp_0001.jpg',
-            'V3-0002_comp_<n+1>.jpg',
-            'V3-0002_comp_0200.jpg',
-
             'V3-0002_comp_01.jpg',
             'V3-0002_comp_<n+1>.jpg',
             'V3-0002_comp_64.jpg'
-        :return: <dict> properly sorted files. with metadata information.
+
+            'V3-0002_comp_0001.jpg',
+            'V3-0002_comp_<n+1>.jpg',
+            'V3-0002_comp_0200.jpg',
+        :return: <dict> properly sorted files, stored as FileSequence objects. with metadata information.
         """
-        key_number_list = map(lambda f_name: self.get_file_name_all_numbers(f_name), files)
-        key_indices_list = map(lambda f_name: self.get_file_name_all_indices(f_name), files)
-        idx = 0
         data = {}
+        # the key name of every entry by its sequence identity, two entries never share a key name
+        keys = {}
+        progress = self.PROGRESS
+
+        # the files following a known naming convention skip the neighbour scans
+        if self.CONVENTIONS:
+            length_of_files = len(files)
+            groups, files = convention_utils.group_by_conventions(files, self.CONVENTIONS)
+            for key_name, (head, tail, position, frames) in groups.items():
+                sequence = sequence_utils.FileSequence(head, tail, position)
+                for frame in frames:
+                    sequence.append(frame)
+                sequence.sort()
+                sequence_utils.add_entry(data, keys, key_name, sequence)
+            if progress is not None:
+                progress.update(grouped=length_of_files - len(files))
+
+        # the files numbered on two axes go into their grids
+        if self.GRIDS:
+            length_of_files = len(files)
+            grids, files = grid_utils.group_grids(files)
+            for key_name, grid in grids.items():
+                sequence_utils.add_entry(data, keys, key_name, grid)
+            if progress is not None:
+                progress.update(grouped=length_of_files - len(files))
+
+        cancel_token = self.CANCEL_TOKEN
+        if cancel_token is not None and cancel_token.cancelled:
+            self.PARTIAL = True
+            return data
+
+        # the files come in any order, so sort them once on their number keys before scanning the neighbours
+        skeleton_runs = self.sort_files_by_skeleton(files)
+        files = [file_name for skeleton_files in skeleton_runs for file_name in skeleton_files]
+        # the neighbours are only looked up within the run of files sharing a skeleton,
+        # so a file is grouped the same way whatever other skeletons are scanned along with it
+        run_index = run_start = run_end = 0
 
         single_files = []
+        grouped_before = progress.grouped if progress is not None else 0
+        sequences_before = progress.sequences if progress is not None else 0
+        # the sequences grouped by a convention or a grid already, the files appended to them are not in order
+        grouped_keys = set(data)
+        unsorted_keys = set()
 
-        # this files array object is not sorted, so let's find some semblance of order
-        # we'll sort everything in compare_files_and_resort_dictionary function
         # files will be organized based on the current, previous and the next index of the files array.
-        for key_indices, key_numbers, file_name in zip(key_indices_list, key_number_list, files):
-            length_of_file = len(file_name)
-            en_pos = None
+        # because the files array is already sorted, every group receives its files in frame order.
+        for idx, file_name in enumerate(files):
+            if not idx % cancel_utils.CHECK_INTERVAL and idx:
+                if progress is not None:
+                    progress.grouped = grouped_before + idx
+                    # every key name that is not a single file is a sequence or a grid
+                    progress.sequences = sequences_before + len(data) - len(single_files)
+                    progress.report()
+                # the files left over are dropped, the results are partial then
+                if cancel_token is not None and cancel_token.cancelled:
+                    self.PARTIAL = True
+                    break
+            sequence = None
+            if idx == run_end:
+                run_start, run_end = run_end, run_end + len(skeleton_runs[run_index])
+                run_index += 1
 
             # finds relevant incrementing file data
-            increment_data = self.find_incrementing_number_by_list_index(files, idx)
-
-            idx += 1
-            if increment_data:
-                num_position = increment_data["num_position"]
-                en_pos = key_indices[num_position[0]][1]
-                key_name = string_utils.strip_name_by_indices(
-                    string_name=file_name, number_indices=key_indices, num_position=num_position)
-            else:
-                key_name = file_name
+            increment_data = self.find_incrementing_number_by_list_index(
+                skeleton_runs[run_index - 1], idx - run_start)
+
+            # numbers too large for the frame array are ids or time stamps, not frame numbers
+            if increment_data and string_utils.is_frame_number(
+                    increment_data["incrementing_number"]):
+                position = increment_data["num_position"][0]
+                start, end = increment_data["file_indices"][position]
+                head, tail = file_name[:start], file_name[end:]
+                key_name = keys.get((head, tail, position))
+                if key_name is None:
+                    key_name = sequence_utils.add_entry(
+                        data, keys, head + tail, sequence_utils.FileSequence(head, tail, position))
+                sequence = data[key_name]['files']
+
+            if sequence is None:
+                sequence_utils.add_entry(data, keys, file_name, sequence_utils.FileSequence(file_name))
                 single_files.append(file_name)
-
-            if key_name not in data:
-                data[key_name] = {'files': [], 'metadata': {'sort_key': [],
-                                                            'file_len': []}}
-
-            if increment_data:
-                if en_pos not in data[key_name]["metadata"]['sort_key']:
-                    data[key_name]["metadata"]['sort_key'].append(en_pos)
-
-                if length_of_file not in data[key_name]["metadata"]['file_len']:
-                    data[key_name]["metadata"]['file_len'].append(length_of_file)
-
-            if file_name not in data[key_name]["files"]:
-                if file_name not in data[key_name]["files"]:
-                    data[key_name]["files"].append(file_name)
+            else:
+                sequence.append(increment_data["incrementing_number"])
+                if key_name in grouped_keys:
+                    unsorted_keys.add(key_name)
         # end loop
+        for key_name in unsorted_keys:
+            data[key_name]['files'].sort()
+        if progress is not None and not self.PARTIAL:
+            progress.grouped = grouped_before + len(files)
 
         # create a beautifully sorted nested dictionary files.
-        return self.compare_files_and_resort_dictionary(data, single_files)
+        return self.compare_files_and_resort_dictionary(data, single_files, keys)
 
     @staticmethod
-    def compare_files_and_resort_dictionary(data, single_files=()):
+    def compare_files_and_resort_dictionary(data, single_files=(), keys=None):
         """
-        compare files against the array in dictionary and sorts them.
+        compare the single files against the sequences in dictionary and move them into their sequence.
         because a beautifully sorted list is totally awesome
         :param data: <dict> data dictionary.
         :param single_files: <tuple> single files with no sequencing metadata information.
-        :return: <dict> a beautiful, beautiful dictionary of properly sorted lists.
-        """
-        # re-make the lists according to their respective lengths
-        for k_name, v in data.items():
-            file_length_dict = {}
-            # if this organizer does not have a sorting key, skip it
-            file_lengths = v['metadata']['file_len']
-
-            for f_name in v['files']:
-                if not file_lengths:
-                    length_key = 0
-                else:
-                    length_key = file_lengths.index(len(f_name))
-                if length_key not in file_length_dict:
-                    file_length_dict[length_key] = []
-                file_length_dict[length_key].append(f_name)
-
-            # delete the old files list
-            del(data[k_name]['files'])
-            # update the new file dict
-            data[k_name]['files'] = file_length_dict
-
+        :param keys: <dict> the key name of every entry by its sequence identity, see sequence_utils.add_entry.
+        :return: <dict> a beautiful, beautiful dictionary of properly sorted sequences.
+        """
+        if keys is None:
+            keys = dict([(sequence_utils.sequence_identity(v_data['files']), k_name)
+                         for k_name, v_data in data.items()])
         # append the single files into their respective groups
-        if single_files:
-            for single_file in single_files:
-                for k_name, v_data in data.items():
-                    for len_idx, v_files in v_data['files'].items():
-                        if len(v_files) != 1:
-                            name_comp = compare_two_file_names(single_file, v_files[0], names=True)
-                            if not name_comp:
-                                continue
-
-                            index_comp = compare_two_file_names(single_file, v_files[0], indices=True)
-                            if not index_comp:
-                                continue
-
-                            diff_comp = compare_two_file_names(single_file, v_files[0], diff=True)
-                            if not len(diff_comp) <= 2:
-                                continue
-
-                            if single_file not in v_data['files'][len_idx]:
-                                v_data['files'][len_idx].insert(0, single_file)
-                                del(data[single_file])
-
-        # now sort all files by the metadata sort_key
-        for k_name, v in data.items():
-            file_lengths = v['metadata']['file_len']
-            # file_sorts = v['metadata']['sort_key']
-            if not file_lengths:
-                continue
-            for len_id in range(len(file_lengths)):
-                v['files'][len_id].sort()
+        for single_file in single_files:
+            numbers_in_name = string_utils.extract_numbers(single_file)
+            number_indices = string_utils.extract_numbers_indices(single_file)
+            for position, (start, end) in enumerate(number_indices):
+                key_name = keys.get((single_file[:start], single_file[end:], position))
+                if key_name is None:
+                    continue
+
+                sequence = data[key_name]['files']
+                if len(sequence) == 1:
+                    continue
+                if not string_utils.is_frame_number(numbers_in_name[position]):
+                    continue
+
+                # only the sequences receiving a single file need sorting again
+                sequence.append(numbers_in_name[position])
+                sequence.sort()
+                del(data[keys.pop((single_file, "", None))])
+                break
         return data
 
     def get_files(self, directory_name="", file_name=""):
@@ -512,18 +691,27 @@ class PatternFinder:
         """
         files = ()
         if directory_name:
-            files = path_utils.list_files_from_dir(directory_name)
+            # filter while listing, so the filtered files are never grouped
+            if self.CANCEL_TOKEN is not None:
+                files, complete = cancel_utils.list_directory(
+                    directory_name, self.FILE_FILTER, self.CANCEL_TOKEN, self.PROGRESS)
+                self.PARTIAL = not complete
+            else:
+                files = path_utils.list_files_from_dir(directory_name, self.FILE_FILTER, self.PROGRESS)
             self.LENGTH_OF_ALL_FILES = len(files)
 
         if file_name:
-            # find by using glob module
+            # only the files of the sequence of this file, found in the sorted directory index
             base_name = path_utils.extract_base_name_from_path(file_name)
             dir_name = path_utils.get_directory_from_file_name(file_name)
             if not dir_name:
                 dir_name = get_directory_name()
-            file_format = string_utils.replace_number_format_in_string(base_name, regex_format=True)
-            # use glob to find files.
-            files = path_utils.find_files(dir_name, file_format)
+            files, convention = index_utils.sequence_siblings(dir_name, base_name)
+            if convention:
+                # the frame number is known already, so the files go straight into their sequence
+                self.CONVENTIONS = [convention]
+            if not self.FILE_FILTER.is_empty:
+                files = self.FILE_FILTER.filter_files(files)
         return files
 
     @property
@@ -534,79 +722,6 @@ class PatternFinder:
         """
         return self.LENGTH_OF_ALL_FILES
 
-    def _find_prinf_format_in_files(self, files):
-        """
-        find the printf formatting in the files given.
-        :param files: <list> scan through these files
-        :return: <str> format name.
-        """
-        cur_file_name = files[-1]
-        length_of_files = len(files)
-        if length_of_files == 1:
-            return cur_file_name
-        prev_file_name = files[-2]
-        cur_file_name_data = extract_file_name_information(cur_file_name)
-        prev_file_name_data = extract_file_name_information(prev_file_name)
-        cur_numbers_in_name = cur_file_name_data["numbers_in_name"]
-        prev_numbers_in_name = prev_file_name_data["numbers_in_name"]
-        num_position = self.get_increment_position(cur_numbers_in_name, prev_numbers_in_name)
-        return self.get_formatted_name(cur_file_name, num_position)
-
-    def _find_ranges_in_files(self, files):
-        """
-        find the incrementing patterns in this list.
-        This function is for nicely sorted lists only.
-
-        :param files: <list> search through these files
-        :return: <dict>, file_indices, numbers_in_name, num_position, incrementing_number. <dict>, empty for no match.
-        """
-        return_data = []
-        length_of_files = len(files)
-        start_increment_num = ""
-        reset_start_num = True
-
-        if length_of_files == 1:
-            return ""
-
-        for idx, f_name in enumerate(files):
-            prev_file_name = prev_file_name_by_index(files, idx)
-            current_file_name = files[idx]
-            next_file_name = next_file_name_by_index(files, idx)
-
-            # find information on current file name
-            cur_file_name_data = extract_file_name_information(current_file_name)
-            cur_numbers_in_name = cur_file_name_data["numbers_in_name"]
-
-            prev_file_name_data = extract_file_name_information(prev_file_name)
-            prev_numbers_in_name = prev_file_name_data["numbers_in_name"]
-
-            # find information on current file name
-            next_file_name_data = extract_file_name_information(next_file_name)
-            next_numbers_in_name = next_file_name_data["numbers_in_name"]
-
-            # if reach the end of the line
-            if idx == length_of_files - 1:
-                incr_number = compare_two_file_names(current_file_name, prev_file_name, numbers=True)
-                num_position = self.get_increment_position(cur_numbers_in_name, prev_numbers_in_name)
-            else:
-                incr_number = compare_two_file_names(current_file_name, next_file_name, numbers=True)
-                num_position = self.get_increment_position(cur_numbers_in_name, next_numbers_in_name)
-
-            # get current increment number
-            cur_incrementing_number = cur_numbers_in_name[num_position[0]]
-
-            # get the beginning of the increment
-            if reset_start_num:
-                start_increment_num = cur_incrementing_number
-                reset_start_num = False
-
-            # identify incrementing pattern
-            check_incr = check_increment(cur_incrementing_number, incr_number[0], increment_idx=self.INCREMENT)
-            if not check_incr:
-                return_data.append((start_increment_num, cur_incrementing_number))
-                reset_start_num = True
-        return return_data
-
     def find_incrementing_number_by_list_index(self, files, idx):
         """
         find the incrementing number in an unsorted list index
@@ -644,7 +759,7 @@ class PatternFinder:
             num_position = ()
 
             # if reached at the end of the line
-            if idx == self.length_of_all_files - 1 and cur_numbers_in_name == next_numbers_in_name:
+            if idx == len(files) - 1 and cur_numbers_in_name == next_numbers_in_name:
                 num_position = self.get_increment_position(cur_numbers_in_name, prev_numbers_in_name)
 
             # else if the length of the current numbers compares against the length of the next number in list
@@ -778,16 +893,38 @@ class PatternFinder:
         :param data: <dict> information to update the files metadata with.
         :return: <bool> True for success.
         """
+        if self._file_sequences is None:
+            self._file_sequences = {}
+        if self._files_metadata is None:
+            self._files_metadata = {}
+        if self._file_grids is None:
+            self._file_grids = {}
+        for k_name, v_data in data.items():
+            if isinstance(v_data['files'], sequence_utils.GridSequence):
+                self._file_grids[k_name] = v_data['files']
+            else:
+                self._file_sequences[k_name] = v_data['files']
+
         if __verbosity__ > 1:
-            self.FILES_METADATA.update(data)
+            self._files_metadata.update(data)
 
         else:
             for k_name, v_data in data.items():
-                if k_name not in self.FILES_METADATA:
-                    self.FILES_METADATA[k_name] = {}
-                self.FILES_METADATA[k_name]["metadata"] = v_data['metadata']
+                if k_name not in self._files_metadata:
+                    self._files_metadata[k_name] = {}
+                self._files_metadata[k_name]["metadata"] = v_data['metadata']
         return True
 
+    @staticmethod
+    def filter_by_length(data, min_length=0):
+        """
+        drop the sequences and single files with fewer files than the minimum length.
+        :param data: <dict> data dictionary.
+        :param min_length: <int> the minimum number of files.
+        :return: <dict> the data dictionary without the short sequences.
+        """
+        return {k_name: v_data for k_name, v_data in data.items() if len(v_data['files']) >= min_length}
+
     def get_relevant_files_info(self, sorted_files_dict={}):
         """
         finds incrementing patterns in the files
@@ -795,20 +932,24 @@ class PatternFinder:
         :return: <data> increment patterns.
         """
         for k_name, v_data in sorted_files_dict.items():
-            files = []
-            # dictionary items are not sorted, so we sort the integer keys here.
-            file_indices = sorted(v_data['files'])
-            for f_index in file_indices:
-                files.extend(v_data['files'][f_index])
+            # the sequence is already sorted in frame order.
+            sequence = v_data['files']
 
             # find the formatted name in files
-            printf_format = self._find_prinf_format_in_files(files)
+            printf_format = sequence.format_name()
             sorted_files_dict[k_name]["metadata"].update({"format_name": printf_format})
 
+            if isinstance(sequence, sequence_utils.GridSequence):
+                # a grid has the ranges of both of its axes instead
+                sorted_files_dict[k_name]["metadata"].update({
+                    "axes": sequence.ranges(increment=self.INCREMENT), "missing": sequence.missing(),
+                    "count": len(sequence)})
+                continue
+
             # find pattern in ranges in files
-            ranges = self._find_ranges_in_files(files)
+            ranges = sequence.ranges(increment=self.INCREMENT)
             sorted_files_dict[k_name]["metadata"].update({"increment_tally": ranges})
-            sorted_files_dict[k_name]["metadata"].update({"count": len(files)})
+            sorted_files_dict[k_name]["metadata"].update({"count": len(sequence)})
         return sorted_files_dict
 
 
@@ -840,11 +981,77 @@ def get_directory_name():
     return path_utils.get_directory_from_file_name(get_path_name_variable())
 
 
-def do_it(glob_search="", path_name=""):
+def scan_directory_lines(directory_name=""):
+    """
+    scan the directory and return its display lines. the lss daemon fills its cache with this.
+    :param directory_name: <str> the directory to scan.
+    :return: <list> display lines.
+    """
+    return PatternFinder(directory_name=directory_name).information_lines()
+
+
+def find_sequence(spec=""):
+    """
+    find the detected sequence given by the spec: its format name as lss prints it, its key name or one of its files.
+    the spec may start with the directory of the sequence, otherwise it is looked for in the current directory.
+    :param spec: <str> sequence spec, like /path/to/image-%04d.png or /path/to/image-0001.png
+    :return: <str> directory name, <FileSequence> the sequence.
+    """
+    directory_name, base_name = posixpath.split(spec.replace('\\', '/'))
+    if not directory_name:
+        directory_name = path_utils.get_current_path()
+    if not path_utils.is_dir(directory_name):
+        raise IOError("[FindSequence] :: Incorrect path given. path_name: {}".format(directory_name))
+
+    # the specs name sequences of frames, so the files numbered on two axes are not grouped into grids
+    pf = PatternFinder(directory_name=directory_name, grids=False)
+    for key_name, sequence in pf.FILE_SEQUENCES.items():
+        if sequence.position is None:
+            continue
+        if base_name in (sequence.format_name(), key_name) or base_name in sequence:
+            return directory_name, sequence
+    raise IOError("[FindSequence] :: No sequence found. spec: {}".format(spec))
+
+
+def count_line(counts):
+    """
+    format the counts of PatternFinder.counts into a single line, easy to parse by scripts.
+    :param counts: <dict> sequences, frames and singles counts.
+    :return: <str> count line.
+    """
+    return '{} sequences, {} frames, {} single files'.format(counts["sequences"], counts["frames"], counts["singles"])
+
+
+def display_pattern_finder(pf, count_only=False):
+    """
+    prints the results of the pattern finder, or only its counts.
+    :param pf: <PatternFinder> the pattern finder.
+    :param count_only: <bool> print the counts only, the files are grouped but never formatted.
+    :return: <bool> True for success.
+    """
+    if pf.PROGRESS is not None:
+        # the progress line is done before the results are printed
+        pf.group_files()
+        pf.PROGRESS.finish()
+    if count_only:
+        print(count_line(pf.counts()))
+    else:
+        pf.display_information(file_write=__debugging__)
+    # the grouping may be cut short while displaying, the flag is only final afterwards
+    if pf.PARTIAL:
+        cancel_utils.partial_message(pf.CANCEL_TOKEN)
+    return True
+
+
+def do_it(glob_search="", path_name="", use_daemon=False, count_only=False, cancel_token=None, progress=None):
     """
     Perform the directory parse.
     :param path_name: <str> path name to parse from.
     :param glob_search: <str> search string into the glob function.
+    :param use_daemon: <bool> ask a running lss daemon for directory scans, scan in-process if there is none.
+    :param count_only: <bool> print the counts of sequences, frames and single files only.
+    :param cancel_token: <CancelToken> stop the scan once cancelled, and print the partial results.
+    :param progress: <Progress> report the progress of the scan, see progress_utils.
     :return: <bool> True for success. <bool> False for failure.
     """
     current_path = path_utils.get_current_path()
@@ -862,22 +1069,24 @@ def do_it(glob_search="", path_name=""):
         if not path_check:
             raise IOError("[DoIt] :: Incorrect path given. path_name: {}".format(path_name))
         if path_check == 'directory':
-            pf = PatternFinder(directory_name=path_name)
-            pf.display_information(file_write=__debugging__)
-            return True
+            # the daemon only serves the plain output
+            if use_daemon and not __verbosity__ and not __debugging__ and not count_only:
+                lines = daemon_utils.request_scan(path_name, timeout=cancel_token and cancel_token.remaining())
+                if lines is not None:
+                    return display_lines(lines)
+            pf = PatternFinder(directory_name=path_name, cancel_token=cancel_token, progress=progress)
+            return display_pattern_finder(pf, count_only)
 
         if path_check == 'filename':
-            pf = PatternFinder(file_name=path_name)
-            pf.display_information(file_write=__debugging__)
-            return True
+            pf = PatternFinder(file_name=path_name, cancel_token=cancel_token, progress=progress)
+            return display_pattern_finder(pf, count_only)
 
     else:
         if not glob_search:
             glob_search = current_path
 
         files = path_utils.glob_search(glob_search)
-        files = map(path_utils.extract_base_name_from_path, files)
-        pf = PatternFinder(files=files)
-        pf.display_information(file_write=__debugging__)
-        return True
+        files = tuple(map(path_utils.extract_base_name_from_path, files))
+        pf = PatternFinder(files=files, cancel_token=cancel_token, progress=progress)
+        return display_pattern_finder(pf, count_only)
     return False
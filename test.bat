@@ -1,4 +1,6 @@
 cls
-python %~dp0\source\unittests.py
-:python %~dp0\source\lss.py -p %~dp0\testdirectories\sequence_02
-:python %~dp0\source\lss.py -p %~dp0\testdirectories\sequence_01\image-0023.png
\ No newline at end of file
+pushd %~dp0
+python -m source.unittests
+:python -m source -p %~dp0\testdirectories\sequence_02
+:python -m source -p %~dp0\testdirectories\sequence_01\image-0023.png
+popd
\ No newline at end of file